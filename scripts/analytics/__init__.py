@@ -0,0 +1,3 @@
+"""
+Módulos de apoio às análises (notebook de insights e dashboards) sobre o banco de dados SQLite.
+"""
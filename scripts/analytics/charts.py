@@ -0,0 +1,252 @@
+"""
+Preparação dos dados e construção dos gráficos de decomposição por assessor usados no notebook de insights.
+
+As transformações (escala logarítmica e máscara de valores sensíveis) são vetorizadas e todos os gráficos são montados a partir de um único melt do DataFrame de vw_aai.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+logger = logging.getLogger(__name__)
+
+# Configuração de cada gráfico: colunas decompostas (com nomes amigáveis), coluna usada no ranking e rótulos
+CHART_SPECS = {
+    "receita": {
+        "title": "Decomposição da Receita por Código de Assessor",
+        "label": "Receita",
+        "sort_by": "receita_bruta_total",
+        "only_positive": False,
+        "columns": {
+            "receita_bovespa_total": "BOVESPA",
+            "receita_futuros_total": "FUTUROS",
+            "receita_rf_bancarios_total": "RF BANCÁRIOS",
+            "receita_rf_privados_total": "RF PRIVADOS",
+            "receita_rf_publicos_total": "RF PÚBLICOS",
+            "receita_aluguel_total": "ALUGUEL",
+            "receita_complemento_total": "COMPLEMENTO",
+        },
+    },
+    "custodia": {
+        "title": "Decomposição da Custódia por Código de Assessor",
+        "label": "Custódia",
+        "sort_by": "net_total",
+        "only_positive": False,
+        "columns": {
+            "net_renda_fixa": "RF",
+            "net_fundos_imobiliarios": "FII",
+            "net_renda_variavel": "RV",
+            "net_fundos": "FUNDOS",
+            "net_financeiro": "FINANCEIRO",
+            "net_previdencia": "PREVIDÊNCIA",
+            "net_outros": "OUTROS",
+        },
+    },
+    "captacao": {
+        "title": "Decomposição da Captação por Código de Assessor",
+        "label": "Captação",
+        "sort_by": "captacao_liquida_total",
+        "only_positive": False,
+        "columns": {
+            "captacao_ted_total": "TED",
+            "captacao_st_total": "ST",
+            "captacao_ota_total": "OTA",
+            "captacao_rf_total": "RF",
+            "captacao_td_total": "TD",
+            "captacao_prev_total": "PREV",
+        },
+    },
+    "clientes": {
+        "title": "Relação de Clientes por Código de Assessor",
+        "label": "Clientes",
+        "sort_by": "total_clientes",
+        "only_positive": True,
+        "columns": {
+            "clientes_pf": "PESSOA FÍSICA",
+            "clientes_pj": "PESSOA JURÍDICA",
+        },
+    },
+    "volume": {
+        "title": "Volume Operado em Ordens por Código de Assessor",
+        "label": "Volume Operado",
+        "sort_by": "volume_operado_total",
+        "only_positive": True,
+        "columns": {
+            "volume_operado_rf": "RENDA FIXA",
+            "volume_operado_rv": "RENDA VARIÁVEL",
+        },
+    },
+}
+
+
+def mask_values(values, integer=None):
+    """Mascara valores numéricos mantendo apenas os 2 primeiros dígitos da parte inteira e ocultando as casas decimais. Inteiros mantêm apenas o primeiro dígito. Valores nulos e zeros são mantidos.
+
+    `integer` indica, por valor ou para toda a série, quais valores devem ser tratados como inteiros; por padrão é inferido do dtype.
+    """
+    values = pd.Series(values)
+    numeric = pd.to_numeric(values, errors="coerce")
+    keep = numeric.isna() | (numeric == 0)
+    if integer is None:
+        integer = pd.api.types.is_integer_dtype(values.dtype)
+    integer = np.broadcast_to(np.asarray(integer, dtype=bool), len(values))
+
+    # Parte inteira com 2 casas decimais de arredondamento, como na formatação "{:.2f}"
+    absolute = numeric.abs().fillna(0)
+    integer_part = np.floor(absolute.round(2)).astype("int64").astype(str)
+    hidden_digits = (integer_part.str.len() - 2).clip(lower=0)
+    masked = (
+        integer_part.str[:2]
+        + pd.Series("*", index=values.index).str.repeat(hidden_digits)
+        + ".**"
+    )
+    masked = masked.where(numeric >= 0, "-" + masked)
+
+    if integer.any():
+        # Se for integer, manter apenas o primeiro dígito
+        masked_int = numeric.fillna(0).astype("int64").astype(str).str[0] + "*"
+        masked = masked.where(~integer, masked_int)
+
+    return masked.where(~keep, values)
+
+
+def log_scale(values):
+    """Aplica log10(x + 1) aos valores positivos; valores nulos, zeros e negativos viram 0."""
+    values = np.asarray(values, dtype="float64")
+    positive = values > 0
+    return np.where(positive, np.log10(np.where(positive, values, 0) + 1), 0.0)
+
+
+def add_totals(df):
+    """Adiciona as colunas de totais usadas no ranking dos gráficos de clientes e volume."""
+    totals = {}
+    if {"clientes_pf", "clientes_pj"}.issubset(df.columns):
+        totals["total_clientes"] = df["clientes_pf"] + df["clientes_pj"]
+    if {"volume_operado_rf", "volume_operado_rv"}.issubset(df.columns):
+        totals["volume_operado_total"] = (
+            df["volume_operado_rf"] + df["volume_operado_rv"]
+        )
+    return df.assign(**totals)
+
+
+def assessor_labels(series):
+    """Converte a coluna de assessor em rótulos para o eixo do gráfico."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.astype(str)
+    return series.astype(str)
+
+
+def build_long_frames(df, top_n=50, charts=None, id_column="codigo_assessor"):
+    """Monta os DataFrames no formato longo de cada gráfico a partir de um único melt. Aceita tanto vw_aai (ranqueada aqui) quanto as linhas pré-ranqueadas de tb_ranking_aai. Retorna um dicionário {nome do gráfico: DataFrame}."""
+    charts = list(charts or CHART_SPECS)
+    df = add_totals(df).reset_index(drop=True)
+
+    value_columns = []
+    for chart in charts:
+        for column in CHART_SPECS[chart]["columns"]:
+            if column not in value_columns:
+                value_columns.append(column)
+
+    # Um único melt para todos os gráficos; o índice identifica a linha de origem
+    labels = assessor_labels(df[id_column])
+    df_long = (
+        pd.DataFrame({id_column: labels})
+        .join(df[value_columns])
+        .melt(
+            id_vars=[id_column],
+            value_vars=value_columns,
+            var_name="Categoria",
+            value_name="Valor",
+            ignore_index=False,
+        )
+    )
+    df_long["Valor_Log"] = log_scale(df_long["Valor"])
+    integer_columns = [
+        column
+        for column in value_columns
+        if pd.api.types.is_integer_dtype(df[column].dtype)
+    ]
+    df_long["Valor_Masked"] = mask_values(
+        df_long["Valor"], integer=df_long["Categoria"].isin(integer_columns)
+    )
+
+    frames = {}
+    for chart in charts:
+        spec = CHART_SPECS[chart]
+        if "metrica" in df.columns:
+            # Linhas já ranqueadas em tb_ranking_aai
+            top_rows = df.index[
+                (df["metrica"] == spec["sort_by"]) & (df["posicao"] <= top_n)
+            ]
+        else:
+            ranking = df[spec["sort_by"]]
+            if spec["only_positive"]:
+                ranking = ranking[ranking > 0]
+            top_rows = ranking.nlargest(top_n).index
+
+        chart_long = df_long[
+            df_long.index.isin(top_rows)
+            & df_long["Categoria"].isin(spec["columns"].keys())
+        ]
+        if spec["only_positive"]:
+            # Filtrar valores zero para evitar espaços em branco
+            chart_long = chart_long[chart_long["Valor"] > 0]
+
+        chart_long = chart_long.reset_index(drop=True)
+        chart_long["Categoria"] = chart_long["Categoria"].map(spec["columns"])
+        frames[chart] = chart_long
+
+    return frames
+
+
+def plot_decomposition(df_long, chart, top_n=50, id_column="codigo_assessor"):
+    """Cria o gráfico de barras empilhadas horizontal com escala logarítmica de um dos gráficos de CHART_SPECS."""
+    spec = CHART_SPECS[chart]
+    fig = px.bar(
+        df_long,
+        x="Valor_Log",  # Usar valor logarítmico para visualização
+        y=id_column,
+        color="Categoria",
+        title=f"{spec['title']} (Top {top_n})",
+        labels={
+            id_column: "Código do Assessor",
+            "Valor_Log": spec["label"],
+        },
+        custom_data=["Valor_Masked", "Categoria"],
+        orientation="h",
+    )
+
+    # Atualizar layout para melhor visualização
+    fig.update_traces(
+        hovertemplate="<b>Assessor:</b> %{y}<br>"
+        + "<b>Categoria:</b> %{customdata[1]}<br>"
+        + "<b>Valor:</b> %{customdata[0]}<br>"
+        + "<extra></extra>"
+    )
+    fig.update_layout(
+        xaxis_title=spec["label"],
+        xaxis=dict(showticklabels=False),  # Esconder valores no eixo X
+        yaxis=dict(categoryorder="total ascending", showticklabels=False),
+        yaxis_title="",
+        plot_bgcolor="white",
+        paper_bgcolor="black",
+        title_font_color="white",
+        height=800,
+        barmode="stack",
+        showlegend=True,
+        legend=dict(
+            title="Categoria",
+            orientation="v",
+            yanchor="top",
+            y=1,
+            xanchor="left",
+            x=1.02,
+            font=dict(color="white"),
+        ),
+    )
+
+    fig.update_xaxes(title_font=dict(color="white"))
+
+    return fig
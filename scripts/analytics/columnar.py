@@ -0,0 +1,443 @@
+"""
+Motor analítico opcional: espelho em Parquet das tabelas de fatos, particionado por mês, consultado pelo DuckDB embarcado.
+
+As views de scripts/database/views/ agregam as tabelas de fatos inteiras com SUM/GROUP BY, o que o executor do SQLite (orientado a linhas e de uma única thread) faz linha a linha. Com o espelho, as mesmas views rodam no DuckDB, que lê apenas as colunas usadas, de forma vetorizada e em todos os núcleos.
+
+- O espelho fica em data/parquet/<tabela>/mes=YYYY-MM/dados.parquet (ou na pasta de PARQUET_DIR). Após cada carga, apenas os meses alterados são regravados: cada mês é identificado pela quantidade de registros e pelo maior id, que muda sempre que o mês é substituído. Meses que não estão mais no banco principal por terem ido para partições anuais ou para o arquivo SQLite de utils/archive.py permanecem no espelho, pois continuam nas conexões de leitura; os meses arquivados em Parquet, fora das views, são removidos dele.
+- As views são criadas no DuckDB a partir dos mesmos arquivos .sql usados no SQLite, com a tradução de DATE(x, 'start of month') e DATE(x) para as funções equivalentes.
+- Com ANALYTICS_ENGINE=duckdb, o DatabaseManager do notebook consulta o DuckDB sempre que a consulta usa apenas tabelas de fatos e views espelhadas e o espelho corresponde ao banco (mesmos meses, com a mesma quantidade de registros e o mesmo maior id); as demais consultas, e todas enquanto o espelho estiver desatualizado, continuam no SQLite. O backup sempre lê o SQLite.
+- Os resultados do DuckDB são montados com a mesma leitura tipada do SQLite (ver analytics/fetch.py), de modo que inteiros, decimais e textos chegam ao DataFrame com os mesmos tipos.
+
+Dependências opcionais: duckdb e pyarrow. Sem elas, o espelho não é gerado e as consultas continuam no SQLite.
+
+Uso:
+    python scripts/analytics/columnar.py --rebuild
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+import importlib.util
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from analytics.fetch import read_frame
+from utils.partitions import PARTITIONED_TABLES
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+VIEWS_DIR = PROJECT_ROOT / "scripts" / "database" / "views"
+
+# Tabelas espelhadas e suas colunas de data (as mesmas das partições anuais)
+MIRROR_TABLES = PARTITIONED_TABLES
+
+MANIFEST_FILE = "_manifest.json"
+MONTH_FILE = "dados.parquet"
+
+# Tradução do dialeto do SQLite usado nas views para o DuckDB
+DATE_TRANSLATIONS = [
+    (
+        re.compile(r"\bDATE\(\s*([\w.]+)\s*,\s*'start of month'\s*\)", re.I),
+        r"strftime(date_trunc('month', TRY_CAST(\1 AS TIMESTAMP)), '%Y-%m-%d')",
+    ),
+    (
+        re.compile(r"\bDATE\(\s*([\w.]+)\s*\)", re.I),
+        r"strftime(TRY_CAST(\1 AS TIMESTAMP), '%Y-%m-%d')",
+    ),
+]
+
+RELATION_PATTERN = re.compile(r"\b((?:tb|vw)_\w+)\b", re.I)
+
+OPTIONAL_DEPENDENCIES = ("duckdb", "pyarrow")
+
+
+def is_enabled():
+    """Indica se o motor analítico foi habilitado pela variável de ambiente ANALYTICS_ENGINE=duckdb."""
+    return os.getenv("ANALYTICS_ENGINE", "sqlite").strip().lower() == "duckdb"
+
+
+def get_missing_dependencies():
+    """Lista as dependências opcionais do motor analítico que não estão instaladas."""
+    return [
+        package
+        for package in OPTIONAL_DEPENDENCIES
+        if importlib.util.find_spec(package) is None
+    ]
+
+
+def get_mirror_dir():
+    """Obtém a pasta do espelho em Parquet."""
+    mirror_dir = Path(os.getenv("PARQUET_DIR", "data/parquet"))
+    if not mirror_dir.is_absolute():
+        mirror_dir = PROJECT_ROOT / mirror_dir
+    return mirror_dir
+
+
+def _load_manifest(mirror_dir):
+    """Lê o manifesto do espelho ({tabela: {mês: [registros, maior id]}})."""
+    manifest_file = Path(mirror_dir) / MANIFEST_FILE
+    if not manifest_file.exists():
+        return {}
+    return json.loads(manifest_file.read_text(encoding="utf-8"))
+
+
+def _save_manifest(mirror_dir, manifest):
+    """Grava o manifesto do espelho de forma atômica."""
+    manifest_file = Path(mirror_dir) / MANIFEST_FILE
+    tmp_file = manifest_file.with_suffix(".json.tmp")
+    tmp_file.write_text(
+        json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8"
+    )
+    os.replace(tmp_file, manifest_file)
+
+
+def get_mirror_version(mirror_dir=None):
+    """Identifica a versão do espelho (data de modificação do manifesto), usada na versão dos dados do cache de consultas."""
+    manifest_file = Path(mirror_dir or get_mirror_dir()) / MANIFEST_FILE
+    if not manifest_file.exists():
+        return ""
+    return str(manifest_file.stat().st_mtime_ns)
+
+
+def get_month_signatures(cursor, table_name, date_column):
+    """Identifica cada mês da tabela pela quantidade de registros e pelo maior id. Retorna {mês: [registros, maior id]}."""
+    cursor.execute(
+        f"""SELECT substr({date_column}, 1, 7) AS mes, COUNT(*), MAX(id)
+            FROM {table_name}
+            WHERE {date_column} IS NOT NULL
+            GROUP BY mes"""
+    )
+    return {month: [count, max_id] for month, count, max_id in cursor}
+
+
+def get_column_types(cursor, table_name):
+    """Obtém o tipo declarado de cada coluna da tabela no SQLite."""
+    # main.table_info: com as partições anexadas, tb_* é uma view TEMP sem tipos declarados
+    cursor.execute(f"PRAGMA main.table_info({table_name})")
+    return {row[1]: row[2].upper() for row in cursor.fetchall()}
+
+
+def cast_month_frame(df, column_types, date_column):
+    """Aplica ao DataFrame do mês os tipos declarados no SQLite, para que todos os arquivos do espelho tenham o mesmo esquema (colunas vazias em um mês não viram tipo nulo)."""
+    for column, declared_type in column_types.items():
+        if column not in df.columns:
+            continue
+        if column == date_column:
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+        elif "INT" in declared_type:
+            values = pd.to_numeric(df[column], errors="coerce")
+            if (values.isna() & df[column].notna()).any():
+                # Textos gravados em coluna INTEGER (o SQLite os mantém como texto) não podem virar nulos
+                df[column] = df[column].astype("string")
+                continue
+            integers = values.round()
+            df[column] = (
+                integers.astype("Int64")
+                if values.dropna().eq(integers.dropna()).all()
+                else values
+            )
+        elif any(name in declared_type for name in ("REAL", "FLOA", "DOUB")):
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(
+                "float64"
+            )
+        else:
+            df[column] = df[column].astype("string")
+    return df
+
+
+def write_month(
+    conn, mirror_dir, table_name, date_column, month, compression="snappy"
+):
+    """Regrava o arquivo Parquet de um mês da tabela. Retorna a quantidade de registros gravados."""
+    year, month_number = (int(part) for part in month.split("-"))
+    month_start = f"{year:04d}-{month_number:02d}-01"
+    next_month = (
+        f"{year + 1:04d}-01-01"
+        if month_number == 12
+        else f"{year:04d}-{month_number + 1:02d}-01"
+    )
+
+    df = pd.read_sql_query(
+        f"SELECT * FROM {table_name} WHERE {date_column} >= ? AND {date_column} < ?",
+        conn,
+        params=(month_start, next_month),
+    )
+    df = cast_month_frame(
+        df, get_column_types(conn.cursor(), table_name), date_column
+    )
+
+    month_dir = Path(mirror_dir) / table_name / f"mes={month}"
+    month_dir.mkdir(parents=True, exist_ok=True)
+    month_file = month_dir / MONTH_FILE
+    tmp_file = month_dir / f"{MONTH_FILE}.tmp"
+    df.to_parquet(tmp_file, index=False, compression=compression)
+    os.replace(tmp_file, month_file)
+    return len(df)
+
+
+def _remove_month_file(mirror_dir, table_name, month):
+    """Remove o arquivo Parquet de um mês e a pasta, se ficar vazia. Retorna True se havia arquivo."""
+    month_dir = Path(mirror_dir) / table_name / f"mes={month}"
+    month_file = month_dir / MONTH_FILE
+    existed = month_file.exists()
+    if existed:
+        month_file.unlink()
+    if month_dir.exists() and not any(month_dir.iterdir()):
+        month_dir.rmdir()
+    return existed
+
+
+def refresh_parquet_mirror(conn, mirror_dir=None, rebuild=False):
+    """Atualiza o espelho em Parquet, regravando apenas os meses novos ou substituídos desde a última atualização (todos, com rebuild=True) e removendo os meses que deixaram de existir no banco. Retorna a quantidade de meses gravados."""
+    mirror_dir = Path(mirror_dir or get_mirror_dir())
+    mirror_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {} if rebuild else _load_manifest(mirror_dir)
+    cursor = conn.cursor()
+
+    months_written = 0
+    for table_name, date_column in MIRROR_TABLES.items():
+        if not get_column_types(cursor, table_name):
+            continue
+        signatures = get_month_signatures(cursor, table_name, date_column)
+        table_manifest = manifest.setdefault(table_name, {})
+        for month, signature in sorted(signatures.items()):
+            if table_manifest.get(month) == signature:
+                continue
+            records = write_month(
+                conn, mirror_dir, table_name, date_column, month
+            )
+            table_manifest[month] = signature
+            months_written += 1
+            logger.info(
+                f"Espelho Parquet: {table_name} {month} ({records:,} registros)"
+            )
+        # Meses anteriores ao mais antigo da conexão podem estar nas partições anuais ou no arquivamento, fora do alcance dela
+        if signatures:
+            oldest_month = min(signatures)
+            for month in sorted(set(table_manifest) - set(signatures)):
+                if month < oldest_month:
+                    continue
+                _remove_month_file(mirror_dir, table_name, month)
+                del table_manifest[month]
+                logger.info(
+                    f"Espelho Parquet: {table_name} {month} removido (mês ausente do banco)"
+                )
+        # Grava o manifesto a cada tabela para não refazer o trabalho se houver falha
+        _save_manifest(mirror_dir, manifest)
+
+    logger.info(
+        f"Espelho Parquet atualizado: {months_written} meses gravados em {mirror_dir}"
+    )
+    return months_written
+
+
+def is_mirror_current(cursor, mirror_dir=None):
+    """Indica se o espelho corresponde ao banco: para cada tabela espelhada, os mesmos meses com a mesma quantidade de registros e o mesmo maior id. Com as partições anuais anexadas ao cursor, os anos encerrados também são comparados."""
+    manifest = _load_manifest(mirror_dir or get_mirror_dir())
+    for table_name, date_column in MIRROR_TABLES.items():
+        if not get_column_types(cursor, table_name):
+            continue
+        signatures = get_month_signatures(cursor, table_name, date_column)
+        if signatures != manifest.get(table_name, {}):
+            return False
+    return True
+
+
+def drop_mirror_months(months, mirror_dir=None):
+    """Remove do espelho os meses que saíram do banco (arquivados por utils/archive.py) e atualiza o manifesto, o que muda a versão do espelho. Retorna a quantidade de arquivos removidos."""
+    mirror_dir = Path(mirror_dir or get_mirror_dir())
+    manifest = _load_manifest(mirror_dir)
+    if not manifest:
+        return 0
+
+    removed = 0
+    for table_name, table_manifest in manifest.items():
+        for month in months:
+            removed += _remove_month_file(mirror_dir, table_name, month)
+            table_manifest.pop(month, None)
+    _save_manifest(mirror_dir, manifest)
+    logger.info(f"Espelho Parquet: {removed} arquivos de meses arquivados removidos")
+    return removed
+
+
+def refresh_mirror_after_ingestion(conn):
+    """Etapa pós-carga: atualiza o espelho se o motor analítico estiver habilitado."""
+    if not is_enabled():
+        return None
+    missing = get_missing_dependencies()
+    if missing:
+        logger.warning(
+            f"Espelho Parquet não atualizado, dependências ausentes: {', '.join(missing)}"
+        )
+        return None
+    return refresh_parquet_mirror(conn)
+
+
+def translate_view_sql(sql):
+    """Converte o script de uma view do dialeto do SQLite para o do DuckDB. Retorna a lista de instruções."""
+    statements = []
+    for statement in sql.split(";"):
+        statement = statement.strip()
+        if not statement or re.match(r"^DROP\s+VIEW", statement, re.I):
+            continue
+        statement = re.sub(
+            r"^CREATE\s+VIEW(\s+IF\s+NOT\s+EXISTS)?",
+            "CREATE OR REPLACE VIEW",
+            statement,
+            flags=re.I,
+        )
+        for pattern, replacement in DATE_TRANSLATIONS:
+            statement = pattern.sub(replacement, statement)
+        statements.append(statement)
+    return statements
+
+
+class DuckDBEngine:
+    """Consulta o espelho em Parquet com o DuckDB embarcado, expondo as tabelas de fatos e as views com os mesmos nomes do SQLite."""
+
+    def __init__(self, mirror_dir=None, views_dir=VIEWS_DIR, threads=None):
+        self.mirror_dir = Path(mirror_dir or get_mirror_dir())
+        self.views_dir = Path(views_dir)
+        self.threads = threads
+        self.relations = set()
+        self._conn = None
+
+    def is_available(self):
+        """Indica se o duckdb está instalado e o espelho já foi gerado."""
+        if importlib.util.find_spec("duckdb") is None:
+            return False
+        return (self.mirror_dir / MANIFEST_FILE).exists()
+
+    def connect(self):
+        """Abre o banco em memória do DuckDB e registra as tabelas do espelho e as views."""
+        if self._conn is not None:
+            return self._conn
+
+        import duckdb
+
+        conn = duckdb.connect(database=":memory:")
+        if self.threads:
+            conn.execute(f"SET threads TO {int(self.threads)}")
+
+        for table_name in MIRROR_TABLES:
+            table_glob = self.mirror_dir / table_name / "*" / MONTH_FILE
+            if not any((self.mirror_dir / table_name).glob(f"*/{MONTH_FILE}")):
+                logger.warning(f"Tabela {table_name} ausente do espelho.")
+                continue
+            conn.execute(
+                f"""CREATE OR REPLACE VIEW {table_name} AS
+                    SELECT * EXCLUDE (mes)
+                    FROM read_parquet('{table_glob.as_posix()}', hive_partitioning = true, union_by_name = true)"""
+            )
+            self.relations.add(table_name)
+
+        # As views só são criadas se todas as tabelas de que dependem estão no espelho
+        for view_file in sorted(self.views_dir.glob("*.sql")):
+            sql = view_file.read_text(encoding="utf-8")
+            dependencies = {
+                name.lower() for name in RELATION_PATTERN.findall(sql)
+            } - {view_file.stem}
+            if not dependencies <= self.relations:
+                continue
+            for statement in translate_view_sql(sql):
+                conn.execute(statement)
+            self.relations.add(view_file.stem)
+
+        logger.info(
+            f"DuckDB conectado ao espelho {self.mirror_dir}: {', '.join(sorted(self.relations))}"
+        )
+        self._conn = conn
+        return conn
+
+    def handles(self, query):
+        """Indica se a consulta usa apenas tabelas e views disponíveis no DuckDB."""
+        names = {name.lower() for name in RELATION_PATTERN.findall(query)}
+        if not names:
+            return False
+        self.connect()
+        return names <= self.relations
+
+    def read_query(self, query, params=None, parse_dates=None, dtype=None):
+        """Executa uma consulta no DuckDB e retorna um DataFrame com os mesmos tipos da leitura no SQLite (parse_dates e dtype como em pandas.read_sql_query)."""
+        for pattern, replacement in DATE_TRANSLATIONS:
+            query = pattern.sub(replacement, query)
+        # read_frame abre um cursor próprio por chamada, que pode ser usado em outra thread. Com .df(), as somas de inteiros (HUGEINT) viriam como float64
+        df = read_frame(self.connect(), query, params=list(params or ()))
+
+        # Literais decimais do DuckDB (DECIMAL) são REAL no SQLite
+        for column in df.columns[df.dtypes == object]:
+            values = df[column].dropna()
+            if len(values) and all(isinstance(value, Decimal) for value in values):
+                df[column] = df[column].astype("float64")
+
+        if dtype:
+            df = df.astype(dtype)
+        for column in parse_dates or []:
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column], errors="coerce")
+        return df
+
+    def close(self):
+        """Fecha o banco em memória do DuckDB."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            self.relations = set()
+
+
+def get_engine():
+    """Retorna o motor analítico se estiver habilitado, instalado e com o espelho gerado; caso contrário, None (as consultas seguem no SQLite)."""
+    if not is_enabled():
+        return None
+    engine = DuckDBEngine()
+    if not engine.is_available():
+        logger.warning(
+            "ANALYTICS_ENGINE=duckdb, mas o duckdb não está instalado ou o espelho Parquet não foi gerado. Usando o SQLite."
+        )
+        return None
+    return engine
+
+
+def parse_arguments(argv=None):
+    """Interpreta as opções da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Atualiza o espelho em Parquet das tabelas de fatos."
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Regrava todos os meses, incluindo os anos das partições anuais",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Função principal de execução."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    args = parse_arguments(argv)
+
+    from analytics.database import DatabaseManager
+
+    # Conexão de leitura com as partições anuais anexadas
+    db_manager = DatabaseManager(use_cache=False, engine="sqlite")
+    try:
+        with db_manager.get_database_connection() as conn:
+            refresh_parquet_mirror(conn, rebuild=args.rebuild)
+    finally:
+        db_manager.disconnect()
+
+
+if __name__ == "__main__":
+    main()
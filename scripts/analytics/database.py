@@ -0,0 +1,279 @@
+"""
+Camada de acesso aos dados para as análises: conexões somente leitura reaproveitadas em um pool (ver utils/connection.py), leitura tipada direto para DataFrames (em lotes convertidos para colunas do NumPy, ver analytics/fetch.py) e cache em disco dos resultados.
+
+O cache é indexado pela consulta e pela versão dos dados do banco (derivada de tb_rastreamento_arquivos), de modo que reexecuções do notebook sem novas cargas não recalculam as views.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from contextlib import contextmanager
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from analytics import columnar
+from analytics.fetch import read_frame
+from utils.connection import ConnectionPool
+from utils.partitions import get_partitions_signature
+from utils.sql_trace import QueryTracer, is_enabled
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def get_database_path():
+    """Obtém o caminho do banco de dados a partir das variáveis de ambiente."""
+    db_path = Path(os.getenv("DB_PATH", "data/db/database.db"))
+
+    # Converte para caminho absoluto se for relativo
+    if not db_path.is_absolute():
+        db_path = PROJECT_ROOT / db_path
+
+    return db_path
+
+
+def get_cache_dir():
+    """Obtém a pasta do cache de consultas."""
+    return PROJECT_ROOT / "data" / "cache" / "queries"
+
+
+class QueryCache:
+    """Cache em disco de resultados de consultas, particionado pela versão dos dados."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def make_key(query, params=None, options=None):
+        """Gera a chave do cache a partir do texto da consulta e dos parâmetros."""
+        payload = json.dumps(
+            {
+                "query": " ".join(query.split()),
+                "params": list(params or ()),
+                "options": options or {},
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _version_dir(self, version):
+        """Pasta do cache para uma versão dos dados."""
+        version_hash = hashlib.sha256(version.encode("utf-8")).hexdigest()
+        return self.cache_dir / version_hash[:16]
+
+    def get(self, key, version):
+        """Retorna o DataFrame em cache ou None."""
+        cache_file = self._version_dir(version) / f"{key}.pkl"
+        if not cache_file.exists():
+            return None
+        try:
+            return pd.read_pickle(cache_file)
+        except Exception as e:
+            logger.warning(f"Cache inválido descartado ({cache_file}): {e}")
+            cache_file.unlink(missing_ok=True)
+            return None
+
+    def set(self, key, version, df):
+        """Grava o DataFrame no cache e descarta versões antigas."""
+        version_dir = self._version_dir(version)
+        try:
+            self.purge(keep=version_dir)
+            version_dir.mkdir(parents=True, exist_ok=True)
+
+            # Grava em arquivo temporário e renomeia para evitar leituras parciais
+            cache_file = version_dir / f"{key}.pkl"
+            tmp_file = version_dir / f"{key}.pkl.tmp"
+            df.to_pickle(tmp_file)
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            logger.warning(f"Não foi possível gravar o cache da consulta: {e}")
+
+    def purge(self, keep=None):
+        """Remove as pastas de versões diferentes de `keep`."""
+        if not self.cache_dir.exists():
+            return
+        for version_dir in self.cache_dir.iterdir():
+            if version_dir.is_dir() and version_dir != keep:
+                shutil.rmtree(version_dir, ignore_errors=True)
+
+
+class DatabaseManager:
+    """Gerencia conexões e operações com bancos de dados.
+
+    Com `trace_sql=True` (ou SQL_TRACE=1), as instruções executadas pelas conexões do pool são rastreadas e o relatório das mais custosas é registrado em `disconnect()`. Com `partitions=True` (padrão), os anos encerrados das partições anuais aparecem nas tabelas de fatos e nas views como se estivessem no banco principal. Com `engine="duckdb"` (ou ANALYTICS_ENGINE=duckdb), as consultas que usam apenas tabelas de fatos e views espelhadas em Parquet são executadas no DuckDB (ver analytics/columnar.py), desde que o espelho corresponda ao banco; caso contrário, seguem no SQLite.
+    """
+
+    def __init__(
+        self,
+        db_path=None,
+        pool_size=4,
+        cache_dir=None,
+        use_cache=True,
+        trace_sql=None,
+        partitions=True,
+        engine=None,
+    ):
+        self.db_path = Path(db_path) if db_path else get_database_path()
+        trace_sql = is_enabled() if trace_sql is None else trace_sql
+        self.tracer = QueryTracer() if trace_sql else None
+        self.pool = ConnectionPool(
+            self.db_path,
+            size=pool_size,
+            tracer=self.tracer,
+            partitions=partitions,
+        )
+        self.cache = QueryCache(cache_dir or get_cache_dir())
+        self.use_cache = use_cache
+        self.logger = logger
+
+        if engine is None:
+            self.engine = columnar.get_engine()
+        elif engine == "duckdb":
+            self.engine = columnar.DuckDBEngine()
+        else:
+            self.engine = None
+        # Versão dos dados da última verificação do espelho e o resultado
+        self._engine_checked = (None, False)
+
+    @contextmanager
+    def get_database_connection(self):
+        """Gerenciador de contexto que empresta uma conexão do pool."""
+        with self.pool.connection() as conn:
+            yield conn
+
+    def get_data_version(self):
+        """Identifica a versão dos dados a partir do esquema, do rastreamento de arquivos, das partições anuais e do espelho em Parquet. Retorna None se não for possível determiná-la."""
+        try:
+            with self.get_database_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("PRAGMA schema_version")
+                schema_version = cursor.fetchone()[0]
+                cursor.execute(
+                    """SELECT COUNT(*), MAX(id), MAX(ultima_modificacao), MAX(ultimo_processamento)
+                       FROM tb_rastreamento_arquivos"""
+                )
+                tracking = cursor.fetchone()
+            partitions = get_partitions_signature(self.db_path)
+            mirror = columnar.get_mirror_version() if self.engine else ""
+            return "|".join(
+                str(v) for v in (schema_version, *tracking, partitions, mirror)
+            )
+        except Exception as e:
+            logger.warning(f"Não foi possível obter a versão dos dados: {e}")
+            return None
+
+    def is_engine_current(self, version=None):
+        """Indica se o espelho em Parquet corresponde ao banco (ver columnar.is_mirror_current). A comparação é refeita apenas quando a versão dos dados muda."""
+        version = version or self.get_data_version()
+        checked_version, current = self._engine_checked
+        if version is not None and version == checked_version:
+            return current
+        try:
+            with self.get_database_connection() as conn:
+                current = columnar.is_mirror_current(
+                    conn.cursor(), self.engine.mirror_dir
+                )
+        except Exception as e:
+            logger.warning(f"Não foi possível verificar o espelho Parquet: {e}")
+            current = False
+        if not current:
+            logger.warning(
+                "Espelho Parquet desatualizado em relação ao banco. Consultando o SQLite (atualize com scripts/analytics/columnar.py)."
+            )
+        self._engine_checked = (version, current)
+        return current
+
+    def execute_query(self, query, params=None):
+        """Executa uma consulta no SQLite (as conexões do pool são somente leitura)."""
+        try:
+            with self.get_database_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params or ())
+                result = cursor.fetchall()
+                conn.commit()
+            return result
+        except Exception as e:
+            self.logger.error(f"Falha ao executar consulta: {e}")
+            return None
+
+    def read_query(
+        self,
+        query,
+        params=None,
+        parse_dates=None,
+        dtype=None,
+        use_cache=None,
+    ):
+        """Executa uma consulta e retorna um DataFrame tipado, usando o cache em disco quando a versão dos dados não mudou."""
+        use_cache = self.use_cache if use_cache is None else use_cache
+        version = self.get_data_version() if use_cache else None
+        key = QueryCache.make_key(
+            query,
+            params,
+            {"parse_dates": parse_dates, "dtype": dtype},
+        )
+
+        if version is not None:
+            df = self.cache.get(key, version)
+            if df is not None:
+                logger.info(f"Consulta servida do cache ({len(df)} linhas)")
+                return df
+
+        if (
+            self.engine is not None
+            and self.engine.handles(query)
+            and self.is_engine_current(version)
+        ):
+            df = self.engine.read_query(
+                query,
+                params=params,
+                parse_dates=parse_dates,
+                dtype=dtype,
+            )
+            logger.info(f"Consulta executada no DuckDB ({len(df)} linhas)")
+        else:
+            with self.get_database_connection() as conn:
+                df = read_frame(
+                    conn,
+                    query,
+                    params=params,
+                    parse_dates=parse_dates,
+                    dtype=dtype,
+                )
+            logger.info(
+                f"Consulta executada no banco de dados ({len(df)} linhas)"
+            )
+
+        if version is not None:
+            self.cache.set(key, version, df)
+        return df
+
+    def read_view(self, view_name, parse_dates=None, dtype=None):
+        """Lê uma view completa como DataFrame."""
+        return self.read_query(
+            f"SELECT * FROM {view_name}",
+            parse_dates=parse_dates,
+            dtype=dtype,
+        )
+
+    def clear_cache(self):
+        """Remove todo o cache de consultas."""
+        self.cache.purge()
+        logger.info("Cache de consultas removido.")
+
+    def disconnect(self):
+        """Fecha todas as conexões."""
+        if self.tracer is not None:
+            self.tracer.log_report()
+        if self.engine is not None:
+            self.engine.close()
+        self.pool.close_all()
@@ -0,0 +1,105 @@
+"""
+Codificação categórica das colunas de texto dos DataFrames analíticos.
+
+As colunas são convertidas para o dtype category uma única vez e o mapeamento categoria -> código é persistido em disco, de modo que os códigos permanecem estáveis entre atualizações dos dados. Colunas de data são mantidas como datetime64.
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def get_mapping_path():
+    """Obtém o caminho do arquivo com o mapeamento das categorias."""
+    return PROJECT_ROOT / "data" / "cache" / "category_codes.json"
+
+
+class CategoryEncoder:
+    """Converte colunas de texto para category com códigos estáveis entre execuções."""
+
+    def __init__(self, mapping_path=None):
+        self.mapping_path = Path(mapping_path or get_mapping_path())
+        self.mapping = self._load()
+
+    def _load(self):
+        """Carrega o mapeamento persistido, se existir."""
+        if not self.mapping_path.exists():
+            return {}
+        try:
+            with open(self.mapping_path, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(
+                f"Mapeamento de categorias inválido ({self.mapping_path}): {e}"
+            )
+            return {}
+
+    def save(self):
+        """Persiste o mapeamento das categorias em disco."""
+        try:
+            self.mapping_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.mapping_path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.mapping, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.mapping_path)
+        except Exception as e:
+            logger.error(f"Erro ao salvar mapeamento de categorias: {e}")
+
+    def encode_column(self, series):
+        """Converte uma série para category usando as categorias já conhecidas; valores novos recebem os próximos códigos."""
+        categorical = series.astype("category")
+        known = self.mapping.get(series.name, [])
+        known_set = set(known)
+        new_values = sorted(
+            (v for v in categorical.cat.categories if v not in known_set),
+            key=str,
+        )
+
+        if new_values:
+            known = known + new_values
+            self.mapping[series.name] = known
+            logger.info(
+                f"{len(new_values)} novas categorias registradas para '{series.name}'"
+            )
+
+        return categorical.cat.set_categories(known)
+
+    def encode(self, df, columns=None, date_columns=None):
+        """Converte as colunas de texto de um DataFrame para category e as colunas de data para datetime64. Por padrão, colunas iniciadas por 'data_' são tratadas como datas."""
+        df = df.copy()
+
+        if date_columns is None:
+            date_columns = [c for c in df.columns if c.startswith("data_")]
+        for column in date_columns:
+            if not pd.api.types.is_datetime64_any_dtype(df[column]):
+                df[column] = pd.to_datetime(df[column], errors="coerce")
+
+        if columns is None:
+            columns = [
+                c
+                for c in df.select_dtypes(include=["object", "string"]).columns
+                if c not in date_columns
+            ]
+
+        changed = False
+        for column in columns:
+            known_count = len(self.mapping.get(column, []))
+            df[column] = self.encode_column(df[column])
+            changed = changed or (
+                len(self.mapping.get(column, [])) != known_count
+            )
+
+        if changed:
+            self.save()
+        return df
+
+    def codes(self, df, column):
+        """Retorna os códigos inteiros estáveis de uma coluna codificada."""
+        return df[column].cat.codes
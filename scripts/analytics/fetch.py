@@ -0,0 +1,133 @@
+"""
+Leitura de consultas do SQLite direto para colunas tipadas do NumPy.
+
+pandas.read_sql_query busca todas as linhas com fetchall() e monta o DataFrame com DataFrame.from_records, que copia as tuplas para uma matriz de objetos antes de inferir o tipo de cada coluna: todo o resultado fica em memória duas vezes como objetos Python. Aqui as linhas são buscadas em lotes (fetchmany) e cada lote é convertido imediatamente em um array tipado por coluna (int64, float64 ou object para textos), de modo que as tuplas do lote são descartadas antes do próximo. O DataFrame final é montado a partir dessas colunas, sem a matriz intermediária.
+
+Os tipos resultantes são os mesmos de read_sql_query: inteiros sem nulos viram int64, números com nulos viram float64 e textos (ou colunas com tipos misturados) ficam como object, com None nos nulos.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Linhas convertidas por lote (lotes pequenos cabem no cache do processador e mantêm o pico de memória baixo)
+FETCH_BATCH_SIZE = 2_000
+
+INTEGER = "int64"
+FLOAT = "float64"
+OBJECT = "object"
+# Lote só com nulos: o tipo da coluna é decidido pelos demais lotes
+NULL = "null"
+
+
+def infer_kind(values):
+    """Classifica os valores de uma coluna do lote em int64, float64 ou object, como o pandas faria com os objetos Python retornados pelo SQLite."""
+    types = set(map(type, values))
+    has_null = type(None) in types
+    types.discard(type(None))
+    if not types:
+        return NULL
+    if types == {int}:
+        return FLOAT if has_null else INTEGER
+    if types <= {int, float}:
+        return FLOAT
+    return OBJECT
+
+
+def to_array(values, kind):
+    """Converte os valores de uma coluna do lote para um array do tipo informado (nulos viram NaN nas colunas float64)."""
+    if kind in (OBJECT, NULL):
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+    return np.array(values, dtype=kind)
+
+
+def merge_kinds(kinds):
+    """Tipo final de uma coluna a partir dos tipos de cada lote."""
+    kinds = set(kinds)
+    has_null = NULL in kinds
+    kinds.discard(NULL)
+    if not kinds or OBJECT in kinds:
+        return OBJECT
+    if len(kinds) == 1 and not has_null:
+        return kinds.pop()
+    return FLOAT
+
+
+def as_object(array):
+    """Converte um array numérico de um lote para object, restaurando os nulos (o SQLite não armazena NaN, então todo NaN veio de um NULL)."""
+    if array.dtype == object:
+        return array
+    values = array.astype(object)
+    if array.dtype.kind == "f":
+        values[np.isnan(array)] = None
+    return values
+
+
+def concat_column(arrays, kind):
+    """Une os arrays de uma coluna em um único array do tipo final."""
+    if kind == OBJECT:
+        arrays = [as_object(array) for array in arrays]
+    else:
+        arrays = [
+            np.full(len(array), np.nan) if array.dtype == object else array
+            for array in arrays
+        ]
+        arrays = [array.astype(kind, copy=False) for array in arrays]
+    if len(arrays) == 1:
+        return arrays[0]
+    return np.concatenate(arrays)
+
+
+def fetch_columns(cursor, batch_size=FETCH_BATCH_SIZE):
+    """Busca o resultado de uma consulta já executada em lotes e retorna (nomes das colunas, arrays tipados)."""
+    names = [description[0] for description in cursor.description]
+    batches = [[] for _ in names]
+    kinds = [[] for _ in names]
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for position, values in enumerate(zip(*rows)):
+            kind = infer_kind(values)
+            batches[position].append(to_array(values, kind))
+            kinds[position].append(kind)
+        del rows
+
+    columns = [
+        (
+            concat_column(arrays, merge_kinds(column_kinds))
+            if arrays
+            else np.empty(0, dtype=object)
+        )
+        for arrays, column_kinds in zip(batches, kinds)
+    ]
+    return names, columns
+
+
+def read_frame(
+    conn,
+    query,
+    params=None,
+    parse_dates=None,
+    dtype=None,
+    batch_size=FETCH_BATCH_SIZE,
+):
+    """Executa uma consulta e retorna um DataFrame montado a partir de colunas tipadas (parse_dates e dtype como em pandas.read_sql_query)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params or ())
+        names, columns = fetch_columns(cursor, batch_size)
+    finally:
+        cursor.close()
+
+    # Colunas por posição: consultas com junções podem repetir nomes
+    df = pd.DataFrame(dict(enumerate(columns)), copy=False)
+    df.columns = names
+    if dtype:
+        df = df.astype(dtype)
+    for column in parse_dates or []:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+    return df
@@ -0,0 +1,129 @@
+"""
+Rankings pré-calculados dos assessores por mês, consumidos pelos dashboards.
+
+A cada carga, vw_aai é calculada uma única vez e os top N assessores de cada métrica e mês são gravados em tb_ranking_aai com ROW_NUMBER() OVER (PARTITION BY data_referencia ORDER BY ...). Os dashboards leem as linhas já ranqueadas em vez de copiar e ordenar a view inteira a cada gráfico.
+
+A estrutura de tb_ranking_aai (metrica, posicao, valor e as colunas de vw_aai) é definida apenas aqui: a tabela é criada na primeira atualização e recriada quando as colunas de vw_aai mudam, por isso não há script em scripts/database/tables/.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Métrica -> (expressão sobre vw_aai, considerar apenas valores positivos)
+RANKING_METRICS = {
+    "receita_bruta_total": ("receita_bruta_total", False),
+    "net_total": ("net_total", False),
+    "captacao_liquida_total": ("captacao_liquida_total", False),
+    "total_clientes": ("clientes_pf + clientes_pj", True),
+    "volume_operado_total": ("volume_operado_rf + volume_operado_rv", True),
+}
+
+DEFAULT_TOP_N = 50
+
+
+def _get_columns(cursor, table_name, schema="main"):
+    """Obtém a lista de colunas de uma tabela."""
+    cursor.execute(f"PRAGMA {schema}.table_info({table_name})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def refresh_rankings(conn, top_n=DEFAULT_TOP_N):
+    """Recalcula tb_ranking_aai para os meses presentes em vw_aai. Meses que não estão mais na view (arquivados) são preservados."""
+    cursor = conn.cursor()
+    try:
+        # Calcula a view uma única vez para todas as métricas
+        cursor.execute("DROP TABLE IF EXISTS temp.tmp_ranking_vw_aai")
+        cursor.execute(
+            "CREATE TEMP TABLE tmp_ranking_vw_aai AS SELECT * FROM vw_aai"
+        )
+
+        view_columns = _get_columns(cursor, "tmp_ranking_vw_aai", "temp")
+        expected_columns = ["metrica", "posicao", "valor"] + view_columns
+
+        cursor.execute("BEGIN IMMEDIATE")
+
+        # Recria a tabela se a estrutura de vw_aai mudou
+        existing_columns = _get_columns(cursor, "tb_ranking_aai")
+        if existing_columns and existing_columns != expected_columns:
+            logger.info(
+                "Estrutura de vw_aai alterada. Recriando tb_ranking_aai."
+            )
+            cursor.execute("DROP TABLE tb_ranking_aai")
+            existing_columns = []
+
+        if not existing_columns:
+            cursor.execute("""CREATE TABLE tb_ranking_aai AS
+                   SELECT '' AS metrica, 0 AS posicao, 0.0 AS valor, *
+                   FROM temp.tmp_ranking_vw_aai WHERE 0""")
+            cursor.execute(
+                """CREATE INDEX IF NOT EXISTS idx_tb_ranking_aai_metrica_data
+                   ON tb_ranking_aai (metrica, data_referencia, posicao)"""
+            )
+
+        cursor.execute("""DELETE FROM tb_ranking_aai
+               WHERE data_referencia IN (
+                   SELECT DISTINCT data_referencia FROM temp.tmp_ranking_vw_aai
+               )""")
+
+        records_inserted = 0
+        for metric, (expression, only_positive) in RANKING_METRICS.items():
+            where_clause = f"WHERE {expression} > 0" if only_positive else ""
+            cursor.execute(
+                f"""
+                INSERT INTO tb_ranking_aai
+                SELECT * FROM (
+                    SELECT
+                        ? AS metrica,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY data_referencia
+                            ORDER BY {expression} DESC
+                        ) AS posicao,
+                        {expression} AS valor,
+                        a.*
+                    FROM temp.tmp_ranking_vw_aai a
+                    {where_clause}
+                )
+                WHERE posicao <= ?
+                """,
+                (metric, top_n),
+            )
+            records_inserted += cursor.rowcount
+
+        conn.commit()
+        logger.info(
+            f"Rankings dos assessores atualizados: {records_inserted} registros em tb_ranking_aai."
+        )
+        return True
+
+    except Exception as e:
+        logger.error(f"Erro ao atualizar rankings dos assessores: {e}")
+        conn.rollback()
+        return False
+
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS temp.tmp_ranking_vw_aai")
+
+
+def load_rankings(
+    db_manager, data_referencia=None, metrics=None, top_n=DEFAULT_TOP_N
+):
+    """Lê os top N assessores já ranqueados de um mês (por padrão, o mais recente) como DataFrame."""
+    metrics = list(metrics or RANKING_METRICS)
+    placeholders = ", ".join("?" for _ in metrics)
+    query = f"""
+        SELECT *
+        FROM tb_ranking_aai
+        WHERE metrica IN ({placeholders})
+          AND posicao <= ?
+          AND data_referencia = COALESCE(
+              ?, (SELECT MAX(data_referencia) FROM tb_ranking_aai)
+          )
+        ORDER BY metrica, posicao
+    """
+    if hasattr(data_referencia, "strftime"):
+        data_referencia = data_referencia.strftime("%Y-%m-%d")
+    params = [*metrics, top_n, data_referencia]
+    return db_manager.read_query(
+        query, params=params, parse_dates=["data_referencia"]
+    )
@@ -0,0 +1,192 @@
+"""
+Gera o dashboard estático (HTML e, opcionalmente, PNG) com os gráficos do notebook de insights, a partir dos rankings pré-calculados em tb_ranking_aai.
+
+Todos os gráficos são renderizados uma única vez e compartilham um único bundle do plotly.js embutido no HTML, de modo que abrir o dashboard não exige Jupyter nem acesso ao banco de dados.
+
+Uso:
+    python scripts/analytics/report.py [--mes YYYY-MM] [--png] [--top-n 50]
+"""
+
+import sys
+import html
+import logging
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from plotly.offline import get_plotlyjs
+
+from analytics.charts import build_long_frames, plot_decomposition
+from analytics.database import PROJECT_ROOT, DatabaseManager
+from analytics.encoding import CategoryEncoder
+from analytics.rankings import DEFAULT_TOP_N, load_rankings
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script type="text/javascript">{plotlyjs}</script>
+<style>
+body {{ background: black; color: white; font-family: sans-serif; margin: 24px; }}
+.chart {{ margin-bottom: 32px; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>Gerado em {generated_at}</p>
+{charts}
+</body>
+</html>
+"""
+
+
+def get_reports_dir():
+    """Obtém a pasta de saída dos relatórios."""
+    return PROJECT_ROOT / "data" / "reports"
+
+
+def build_figures(db_manager, data_referencia=None, top_n=DEFAULT_TOP_N):
+    """Lê os rankings do mês e monta os gráficos. Retorna (mês de referência, {nome do gráfico: figura})."""
+    ranked = load_rankings(db_manager, data_referencia, top_n=top_n)
+    if ranked is None or ranked.empty:
+        return None, {}
+
+    data_referencia = ranked["data_referencia"].max()
+    ranked = CategoryEncoder().encode(ranked)
+    long_frames = build_long_frames(ranked, top_n=top_n)
+
+    figures = {
+        chart: plot_decomposition(df_long, chart, top_n=top_n)
+        for chart, df_long in long_frames.items()
+        if not df_long.empty
+    }
+    return data_referencia, figures
+
+
+def write_html(figures, output_file, title):
+    """Grava todos os gráficos em um único HTML com o plotly.js embutido uma única vez."""
+    charts = "\n".join(
+        f'<div class="chart">{fig.to_html(full_html=False, include_plotlyjs=False)}</div>'
+        for fig in figures.values()
+    )
+    content = HTML_TEMPLATE.format(
+        title=html.escape(title),
+        plotlyjs=get_plotlyjs(),
+        generated_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        charts=charts,
+    )
+
+    # Grava em arquivo temporário e renomeia para evitar leituras parciais
+    tmp_file = output_file.with_suffix(".html.tmp")
+    tmp_file.write_text(content, encoding="utf-8")
+    tmp_file.replace(output_file)
+    logger.info(f"Dashboard HTML salvo: {output_file}")
+
+
+def write_png(figures, output_dir, suffix):
+    """Exporta cada gráfico como PNG (requer o pacote kaleido)."""
+    for chart, fig in figures.items():
+        output_file = output_dir / f"{chart}_{suffix}.png"
+        try:
+            fig.write_image(output_file)
+            logger.info(f"Gráfico PNG salvo: {output_file}")
+        except Exception as e:
+            logger.warning(
+                f"Não foi possível exportar PNG (verifique se o kaleido está instalado): {e}"
+            )
+            return False
+    return True
+
+
+def render_report(
+    db_manager,
+    data_referencia=None,
+    output_dir=None,
+    png=False,
+    top_n=DEFAULT_TOP_N,
+):
+    """Gera o dashboard do mês (por padrão, o mais recente). Retorna o caminho do HTML ou None."""
+    data_referencia, figures = build_figures(
+        db_manager, data_referencia, top_n
+    )
+    if not figures:
+        logger.warning("Nenhum ranking encontrado para gerar o dashboard.")
+        return None
+
+    output_dir = Path(output_dir or get_reports_dir())
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    month = data_referencia.strftime("%Y-%m")
+    output_file = output_dir / f"dashboard_{month}.html"
+    write_html(figures, output_file, f"Dashboard de Assessores - {month}")
+
+    # Cópia com nome fixo apontando sempre para o mês mais recente gerado
+    latest_file = output_dir / "dashboard.html"
+    latest_file.write_bytes(output_file.read_bytes())
+
+    if png:
+        write_png(figures, output_dir, month)
+
+    return output_file
+
+
+def render_report_after_ingestion(conn):
+    """Etapa pós-carga: regenera o dashboard do mês mais recente usando o mesmo banco da conexão."""
+    db_path = conn.execute("PRAGMA database_list").fetchone()[2]
+    db_manager = DatabaseManager(db_path, use_cache=False)
+    try:
+        return render_report(db_manager)
+    finally:
+        db_manager.disconnect()
+
+
+def main():
+    """Função principal de execução."""
+    parser = argparse.ArgumentParser(
+        description="Gera o dashboard estático de assessores."
+    )
+    parser.add_argument(
+        "--mes", help="Mês de referência no formato YYYY-MM (padrão: último)"
+    )
+    parser.add_argument(
+        "--png", action="store_true", help="Exporta também os gráficos em PNG"
+    )
+    parser.add_argument(
+        "--top-n",
+        type=int,
+        default=DEFAULT_TOP_N,
+        help="Quantidade de assessores por gráfico",
+    )
+    args = parser.parse_args()
+
+    data_referencia = f"{args.mes}-01" if args.mes else None
+    if args.top_n > DEFAULT_TOP_N:
+        logger.warning(
+            f"tb_ranking_aai guarda apenas os top {DEFAULT_TOP_N} assessores."
+        )
+
+    db_manager = DatabaseManager(use_cache=False)
+    try:
+        output_file = render_report(
+            db_manager, data_referencia, png=args.png, top_n=args.top_n
+        )
+    finally:
+        db_manager.disconnect()
+
+    if output_file is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
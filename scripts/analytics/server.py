@@ -0,0 +1,427 @@
+"""
+Serviço HTTP local com os agregados de vw_aai e vw_escritorio por mês e assessor, em JSON ou CSV, para dashboards e planilhas que não usam o Jupyter.
+
+As respostas ficam em cache na memória, indexadas pela versão dos dados do banco (derivada de tb_rastreamento_arquivos, ver analytics/database.py), e levam um ETag derivado dessa versão. Enquanto nenhuma carga nova é registrada, as consultas repetidas dos dashboards são servidas do cache (ou respondidas com 304 quando o cliente envia If-None-Match) sem executar a view novamente; a primeira consulta após uma carga executa a view uma única vez, mesmo com vários clientes aguardando a mesma resposta. As exportações completas (/export) são transmitidas em lotes direto do cursor, sem montar o arquivo inteiro na memória.
+
+Uso:
+    python scripts/analytics/server.py [--host 127.0.0.1] [--port 8050]
+
+Rotas:
+    GET /api/vw_aai?mes=YYYY-MM&assessor=A1234&format=json|csv
+    GET /api/vw_escritorio?mes=YYYY-MM&format=json|csv
+    GET /export/vw_aai.csv
+    GET /export/vw_escritorio.csv
+"""
+
+import io
+import re
+import csv
+import sys
+import json
+import hashlib
+import logging
+import argparse
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analytics.database import DatabaseManager
+from utils.assessor import normalize_assessor_code
+
+logger = logging.getLogger(__name__)
+
+# View -> coluna do assessor (None se a view não é aberta por assessor)
+AGGREGATE_VIEWS = {
+    "vw_aai": "codigo_assessor",
+    "vw_escritorio": None,
+}
+
+CONTENT_TYPES = {
+    "json": "application/json; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+
+MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}$")
+
+# Tamanho máximo do cache de respostas na memória (64 MB)
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Registros lidos do cursor a cada lote das exportações
+EXPORT_BATCH_SIZE = 5000
+
+
+class BadRequest(ValueError):
+    """Parâmetros inválidos na requisição."""
+
+
+class ResponseCache:
+    """Cache LRU de respostas na memória, limitado em bytes e descartado a cada nova versão dos dados."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.version = None
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _reset(self, version):
+        """Descarta as respostas de versões anteriores."""
+        if version != self.version:
+            self._entries.clear()
+            self._key_locks.clear()
+            self._size = 0
+            self.version = version
+
+    def get(self, key, version):
+        """Retorna a resposta em cache da versão, ou None."""
+        with self._lock:
+            self._reset(version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, version, body):
+        """Guarda a resposta, removendo as menos usadas se o limite for excedido."""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._reset(version)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def key_lock(self, key):
+        """Trava da chave, para que requisições simultâneas da mesma resposta executem a consulta uma única vez."""
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+
+def make_etag(version, key):
+    """ETag da resposta, derivado da versão dos dados e da consulta."""
+    digest = hashlib.sha1(f"{version}|{key}".encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def build_query(view_name, params):
+    """Monta a consulta da view com os filtros de mês e assessor. Retorna (consulta, parâmetros)."""
+    conditions = []
+    values = []
+
+    month = params.get("mes")
+    if month:
+        if not MONTH_PATTERN.match(month):
+            raise BadRequest("mes deve estar no formato YYYY-MM")
+        conditions.append("data_referencia = ?")
+        values.append(f"{month}-01")
+
+    assessor = params.get("assessor")
+    if assessor:
+        assessor_column = AGGREGATE_VIEWS[view_name]
+        if assessor_column is None:
+            raise BadRequest(f"{view_name} não é aberta por assessor")
+        code = normalize_assessor_code(assessor)
+        if code is None:
+            raise BadRequest(f"Código de assessor inválido: {assessor}")
+        conditions.append(f"{assessor_column} = ?")
+        values.append(code)
+
+    query = f"SELECT * FROM {view_name}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY data_referencia"
+    return query, values
+
+
+def render_frame(df, output_format):
+    """Serializa o DataFrame da consulta em JSON (lista de registros) ou CSV."""
+    if output_format == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    return df.to_json(
+        orient="records", date_format="iso", force_ascii=False
+    ).encode("utf-8")
+
+
+class QueryService:
+    """Executa as consultas das views com o cache de respostas e gera as exportações."""
+
+    def __init__(self, db_manager, cache_bytes=DEFAULT_CACHE_BYTES):
+        self.db_manager = db_manager
+        self.cache = ResponseCache(cache_bytes)
+
+    def get_version(self):
+        """Versão atual dos dados (None se não for possível determiná-la)."""
+        return self.db_manager.get_data_version()
+
+    def get_aggregate(self, view_name, params, output_format, version):
+        """Retorna o corpo da resposta da view filtrada, do cache quando a versão dos dados não mudou."""
+        query, values = build_query(view_name, params)
+        key = json.dumps([query, values, output_format])
+
+        if version is None:
+            df = self.db_manager.read_query(query, values, use_cache=False)
+            return render_frame(df, output_format)
+
+        body = self.cache.get(key, version)
+        if body is not None:
+            return body
+
+        with self.cache.key_lock(key):
+            # Outra requisição pode ter calculado a resposta enquanto esta aguardava
+            body = self.cache.get(key, version)
+            if body is not None:
+                return body
+            df = self.db_manager.read_query(query, values, use_cache=False)
+            body = render_frame(df, output_format)
+            self.cache.set(key, version, body)
+            logger.info(
+                f"{view_name} calculada para {params or 'todos os meses'} ({len(df)} linhas)"
+            )
+            return body
+
+    def iter_export(self, view_name):
+        """Gera a exportação completa da view em CSV, em lotes lidos direto do cursor."""
+        with self.db_manager.get_database_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT * FROM {view_name} ORDER BY data_referencia")
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(column[0] for column in cursor.description)
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode("utf-8")
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """Atende as rotas /api e /export."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "PyBullSql"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} - {format % args}")
+
+    def end_headers(self):
+        super().end_headers()
+        self.headers_sent = True
+
+    def send_body(self, status, body, content_type, etag=None):
+        """Envia uma resposta completa."""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        """Envia um erro em JSON."""
+        body = json.dumps({"erro": message}, ensure_ascii=False).encode("utf-8")
+        self.send_body(status, body, CONTENT_TYPES["json"])
+
+    def send_not_modified(self, etag):
+        """Responde 304 quando o cliente já tem a versão atual."""
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def is_fresh(self, etag):
+        """Indica se o ETag enviado pelo cliente corresponde ao atual."""
+        if etag is None:
+            return False
+        client_etags = self.headers.get("If-None-Match", "")
+        return etag in [value.strip() for value in client_etags.split(",")]
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {
+            name: values[-1]
+            for name, values in parse_qs(url.query).items()
+        }
+        parts = [part for part in url.path.split("/") if part]
+        # Com keep-alive, a mesma instância atende várias requisições
+        self.headers_sent = False
+
+        try:
+            if len(parts) == 2 and parts[0] == "api":
+                self.handle_aggregate(parts[1], params)
+            elif len(parts) == 2 and parts[0] == "export":
+                self.handle_export(parts[1])
+            elif not parts:
+                self.handle_index()
+            else:
+                self.send_error_json(404, f"Rota não encontrada: {url.path}")
+        except BadRequest as e:
+            self.send_error_json(400, str(e))
+        except (BrokenPipeError, ConnectionResetError):
+            logger.warning(f"Cliente desconectou durante a resposta: {url.path}")
+            self.close_connection = True
+        except Exception as e:
+            logger.error(f"Erro ao atender {url.path}: {e}")
+            if self.headers_sent:
+                # O status 200 já foi enviado: encerra a conexão sem o chunk final, e o cliente percebe a resposta incompleta
+                self.close_connection = True
+                return
+            self.send_error_json(500, "Erro ao consultar o banco de dados")
+
+    def handle_index(self):
+        """Lista as rotas disponíveis."""
+        body = json.dumps(
+            {
+                "api": [f"/api/{view}" for view in AGGREGATE_VIEWS],
+                "export": [f"/export/{view}.csv" for view in AGGREGATE_VIEWS],
+                "parametros": ["mes=YYYY-MM", "assessor", "format=json|csv"],
+            }
+        ).encode("utf-8")
+        self.send_body(200, body, CONTENT_TYPES["json"])
+
+    def handle_aggregate(self, view_name, params):
+        """Responde a view filtrada por mês e assessor, com cache e ETag."""
+        if view_name not in AGGREGATE_VIEWS:
+            self.send_error_json(404, f"View não disponível: {view_name}")
+            return
+        output_format = params.pop("format", "json")
+        if output_format not in CONTENT_TYPES:
+            raise BadRequest("format deve ser json ou csv")
+
+        version = self.service.get_version()
+        etag = (
+            make_etag(version, [view_name, sorted(params.items()), output_format])
+            if version
+            else None
+        )
+        if self.is_fresh(etag):
+            self.send_not_modified(etag)
+            return
+
+        body = self.service.get_aggregate(
+            view_name, params, output_format, version
+        )
+        self.send_body(200, body, CONTENT_TYPES[output_format], etag)
+
+    def handle_export(self, file_name):
+        """Transmite a view completa em CSV com Transfer-Encoding: chunked."""
+        view_name, _, extension = file_name.partition(".")
+        if view_name not in AGGREGATE_VIEWS or extension != "csv":
+            self.send_error_json(404, f"Exportação não disponível: {file_name}")
+            return
+
+        version = self.service.get_version()
+        etag = make_etag(version, [view_name, "export"]) if version else None
+        if self.is_fresh(etag):
+            self.send_not_modified(etag)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES["csv"])
+        self.send_header(
+            "Content-Disposition", f'attachment; filename="{view_name}.csv"'
+        )
+        if etag:
+            self.send_header("ETag", etag)
+        if self.command == "HEAD":
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        for chunk in self.service.iter_export(view_name):
+            self.wfile.write(f"{len(chunk):X}\r\n".encode("ascii"))
+            self.wfile.write(chunk)
+            self.wfile.write(b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class QueryServer(ThreadingHTTPServer):
+    """Servidor HTTP com uma thread por requisição, compartilhando o serviço de consultas."""
+
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, QueryRequestHandler)
+        self.service = service
+
+
+def parse_arguments(argv=None):
+    """Interpreta os argumentos de linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Serviço HTTP local com os agregados das views de análise."
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Endereço de escuta"
+    )
+    parser.add_argument("--port", type=int, default=8050, help="Porta")
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=4,
+        help="Quantidade máxima de conexões de leitura com o banco",
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=int,
+        default=DEFAULT_CACHE_BYTES // (1024 * 1024),
+        help="Tamanho máximo do cache de respostas, em MB",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Função principal de execução."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    args = parse_arguments(argv)
+
+    # O cache de respostas fica na memória; o cache em disco do notebook não é usado
+    db_manager = DatabaseManager(pool_size=args.pool_size, use_cache=False)
+    if db_manager.engine is not None:
+        # Registra as views do DuckDB antes de atender requisições em paralelo
+        db_manager.engine.connect()
+
+    service = QueryService(db_manager, cache_bytes=args.cache_mb * 1024 * 1024)
+    server = QueryServer((args.host, args.port), service)
+    logger.info(f"Servindo em http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Serviço interrompido pelo usuário.")
+    finally:
+        server.server_close()
+        db_manager.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Benchmarks de desempenho da carga e das consultas, executados sobre dados sintéticos."""
@@ -0,0 +1,103 @@
+"""
+Funções compartilhadas pelos benchmarks: criação do banco temporário, resumo das medições, metadados da execução e comparação com uma execução de referência.
+"""
+
+import sqlite3
+import logging
+import datetime
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SQL_DIR = PROJECT_ROOT / "scripts" / "database"
+
+# Diferenças absolutas abaixo deste valor (em segundos) são tratadas como ruído
+MIN_REGRESSION_SECONDS = 0.01
+
+
+def create_benchmark_database(db_path, views=False, indexes=False):
+    """Cria o banco temporário com as tabelas e triggers dos scripts SQL e, opcionalmente, as views e os índices."""
+    conn = sqlite3.connect(db_path)
+    for sql_file in sorted((SQL_DIR / "tables").glob("*.sql")):
+        conn.executescript(sql_file.read_text(encoding="utf-8"))
+
+    folders = ["triggers"]
+    if views:
+        folders.append("views")
+    if indexes:
+        folders.append("indexes")
+    for folder in folders:
+        for sql_file in sorted((SQL_DIR / folder).glob("*.sql")):
+            conn.executescript(sql_file.read_text(encoding="utf-8"))
+
+    conn.commit()
+    return conn
+
+
+def summarize(runs):
+    """Resume as medições de uma etapa."""
+    return {
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "mean": statistics.mean(runs),
+        "runs": runs,
+    }
+
+
+def get_git_commit():
+    """Obtém o commit atual do repositório, se disponível."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def build_metadata(benchmark, **parameters):
+    """Monta os metadados da execução gravados junto dos resultados."""
+    return {
+        "benchmark": benchmark,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": get_git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        **parameters,
+    }
+
+
+def compare_medians(current, baseline, threshold):
+    """Compara medianas ({nome: segundos}) com as de uma execução de referência. Retorna a lista de regressões encontradas."""
+    regressions = []
+    for name, after in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        change = (after - before) / before if before else 0.0
+        status = "ok"
+        if change > threshold and after - before > MIN_REGRESSION_SECONDS:
+            status = "REGRESSÃO"
+            regressions.append(
+                {
+                    "name": name,
+                    "baseline": before,
+                    "current": after,
+                    "change": change,
+                }
+            )
+        logger.info(
+            f"{name:<24} {before:8.3f}s -> {after:8.3f}s ({change:+.1%}) {status}"
+        )
+    return regressions
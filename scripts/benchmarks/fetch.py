@@ -0,0 +1,207 @@
+"""
+Benchmark da leitura de consultas para DataFrames: pandas.read_sql_query (fetchall + DataFrame.from_records) contra a leitura em colunas tipadas de scripts/analytics/fetch.py.
+
+Um banco temporário é populado com N anos x M clientes de fatos sintéticos (os mesmos de scripts/benchmarks/views.py) e cada consulta é lida N vezes por cada método. O pico de memória de cada leitura é medido em uma execução separada com tracemalloc, e os DataFrames dos dois métodos são comparados para garantir que o resultado é o mesmo.
+
+Uso:
+    python scripts/benchmarks/fetch.py [--years 1] [--clients 20000] [--repeat 3] [--output resultado.json] [--compare baseline.json]
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analytics.fetch import FETCH_BATCH_SIZE, read_frame
+from benchmarks.common import (
+    build_metadata,
+    compare_medians,
+    create_benchmark_database,
+    summarize,
+)
+from benchmarks.views import populate_facts
+
+logger = logging.getLogger(__name__)
+
+QUERIES = {
+    "vw_aai": "SELECT * FROM vw_aai",
+    "tb_positivador": "SELECT * FROM tb_positivador",
+}
+
+
+def get_methods(batch_size):
+    """Métodos de leitura comparados."""
+    return {
+        "read_sql_query": lambda conn, query: pd.read_sql_query(query, conn),
+        "colunas_tipadas": lambda conn, query: read_frame(
+            conn, query, batch_size=batch_size
+        ),
+    }
+
+
+def measure_peak(func, *args):
+    """Executa a função uma vez e retorna o pico de memória alocada, em MB."""
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def benchmark_query(conn, query, methods, repeat):
+    """Mede cada método de leitura da consulta e verifica se os resultados são iguais."""
+    results = {}
+    frames = {}
+    for name, method in methods.items():
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            frames[name] = method(conn, query)
+            runs.append(time.perf_counter() - start)
+        df = frames[name]
+        results[name] = {
+            "rows": len(df),
+            "frame_mb": df.memory_usage(deep=True).sum() / 1024 / 1024,
+            "peak_mb": measure_peak(method, conn, query),
+            **summarize(runs),
+        }
+        logger.info(
+            f"{name}: {len(df)} linhas, mediana {results[name]['median']:.3f}s, "
+            f"pico {results[name]['peak_mb']:.1f} MB"
+        )
+
+    reference, *others = frames.values()
+    results["resultados_iguais"] = all(
+        reference.equals(df) and reference.dtypes.equals(df.dtypes)
+        for df in others
+    )
+    if not results["resultados_iguais"]:
+        logger.warning(
+            "Os métodos de leitura retornaram resultados diferentes"
+        )
+    return results
+
+
+def fetch_medians(output):
+    """Extrai as medianas no formato {consulta/método: segundos}."""
+    return {
+        f"{query}/{method}": result["median"]
+        for query, methods in output.get("results", {}).items()
+        for method, result in methods.items()
+        if isinstance(result, dict)
+    }
+
+
+def main():
+    """Função principal de execução."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark da leitura de consultas para DataFrames."
+    )
+    parser.add_argument(
+        "--queries",
+        nargs="+",
+        choices=list(QUERIES),
+        default=list(QUERIES),
+        help="Consultas a medir",
+    )
+    parser.add_argument("--years", type=int, default=1, help="Anos de dados")
+    parser.add_argument(
+        "--clients", type=int, default=20000, help="Quantidade de clientes"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=FETCH_BATCH_SIZE,
+        help="Linhas por lote da leitura em colunas tipadas",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Repetições cronometradas"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    parser.add_argument(
+        "--compare", help="Arquivo JSON de uma execução de referência"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Aumento relativo da mediana considerado regressão (padrão: 0.2)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    methods = get_methods(args.batch_size)
+    with tempfile.TemporaryDirectory(prefix="benchmark_fetch_") as work_dir:
+        conn = create_benchmark_database(
+            Path(work_dir) / "benchmark_fetch.db", views=True, indexes=True
+        )
+        try:
+            logger.info(
+                f"Gerando {args.years} ano(s) de dados para {args.clients} clientes..."
+            )
+            table_rows = populate_facts(
+                conn, args.years, args.clients, seed=args.seed
+            )
+
+            # Execução de aquecimento do cache de páginas do SQLite
+            conn.execute("SELECT COUNT(*) FROM tb_positivador").fetchone()
+            results = {}
+            for name in args.queries:
+                logger.info(f"Consulta: {name}")
+                results[name] = benchmark_query(
+                    conn, QUERIES[name], methods, args.repeat
+                )
+        finally:
+            conn.close()
+
+    output = {
+        "metadata": build_metadata(
+            "fetch",
+            years=args.years,
+            clients=args.clients,
+            batch_size=args.batch_size,
+            repeat=args.repeat,
+            table_rows=table_rows,
+        ),
+        "results": results,
+    }
+
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(output, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        logger.info(f"Resultados gravados em {args.output}")
+    else:
+        print(json.dumps(output, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare_medians(
+            fetch_medians(output), fetch_medians(baseline), args.threshold
+        )
+        if regressions:
+            logger.error(
+                f"{len(regressions)} regressões de desempenho acima de {args.threshold:.0%}."
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Benchmark da carga dos relatórios Excel, medindo separadamente cada etapa dos scripts de upload: leitura (read), transformação (transform), gravação na tabela temporária (staging), troca do mês (swap) e rastreamento (tracking).
+
+Os relatórios são gerados sinteticamente (ver synthetic.py) e carregados em um banco SQLite temporário com as mesmas tabelas e triggers do banco real. Cada relatório passa por uma carga de aquecimento seguida de N repetições cronometradas; como cada repetição substitui o mês carregado na anterior, a etapa swap remove um mês completo, como em produção.
+
+O resultado é gravado em JSON e pode ser comparado com uma execução anterior (--compare); regressões acima do limite fazem o script terminar com código 1.
+
+Uso:
+    python scripts/benchmarks/ingestion.py [--rows 10000] [--repeat 3] [--output resultado.json] [--compare baseline.json]
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import datetime
+import tempfile
+from pathlib import Path
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.common import (
+    build_metadata,
+    compare_medians,
+    create_benchmark_database,
+    summarize,
+)
+from benchmarks.synthetic import REPORTS, write_report
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["read", "transform", "staging", "swap", "tracking"]
+
+
+def run_stages(module, config, conn, file_path, timings=None):
+    """Executa a carga de um arquivo etapa por etapa, acumulando o tempo de cada uma em `timings`. Retorna a quantidade de registros inseridos."""
+    cursor = conn.cursor()
+    table_name = next(iter(config.FILE_TO_DB_MAPPING.values()))
+    data_dados = config.interpret_file_name(file_path.name)
+    modified_time = module.get_file_last_modified(file_path)
+
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        if timings is not None:
+            timings[stage].append(time.perf_counter() - start)
+        return result
+
+    df = timed("read", module.load_excel_file, file_path)
+    df, reference_date = timed(
+        "transform", module.transform_data, df, data_dados
+    )
+    module.create_table(cursor, conn)
+    staging_table, columns = timed("staging", module.stage_data, conn, df)
+    records_inserted = timed(
+        "swap",
+        module.replace_month_data,
+        cursor,
+        conn,
+        reference_date,
+        staging_table,
+        columns,
+    )
+    if records_inserted is None:
+        raise RuntimeError(f"Falha na etapa swap de {file_path.name}")
+    timed(
+        "tracking",
+        module.update_file_tracking,
+        cursor,
+        conn,
+        file_path.name,
+        table_name,
+        modified_time,
+    )
+    return records_inserted
+
+
+def benchmark_report(
+    report, rows, repeat, work_dir, data_dados, seed=42, months=1
+):
+    """Executa o benchmark de um relatório e retorna o resumo das etapas."""
+    module, config = REPORTS[report]
+    file_path = write_report(report, rows, data_dados, work_dir, seed, months)
+
+    db_path = Path(work_dir) / f"benchmark_{report}.db"
+    conn = create_benchmark_database(db_path)
+    try:
+        # Carga de aquecimento: popula o mês que as repetições vão substituir
+        run_stages(module, config, conn, file_path)
+
+        timings = {stage: [] for stage in STAGES}
+        records_inserted = 0
+        for _ in range(repeat):
+            records_inserted = run_stages(
+                module, config, conn, file_path, timings
+            )
+    finally:
+        conn.close()
+
+    stages = {stage: summarize(runs) for stage, runs in timings.items()}
+    total = sum(stage["median"] for stage in stages.values())
+    logger.info(
+        f"{report}: {records_inserted} registros, {total:.3f}s por carga (mediana)"
+    )
+    return {
+        "rows": rows,
+        "records_inserted": records_inserted,
+        "file_size_bytes": file_path.stat().st_size,
+        "total_median": total,
+        "stages": stages,
+    }
+
+
+def stage_medians(output):
+    """Extrai as medianas de cada etapa no formato {relatório.etapa: segundos}."""
+    return {
+        f"{report}.{stage}": summary["median"]
+        for report, result in output.get("results", {}).items()
+        for stage, summary in result["stages"].items()
+    }
+
+
+def main():
+    """Função principal de execução."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark da carga dos relatórios Excel."
+    )
+    parser.add_argument(
+        "--reports",
+        nargs="+",
+        choices=list(REPORTS),
+        default=list(REPORTS),
+        help="Relatórios a medir",
+    )
+    parser.add_argument(
+        "--rows", type=int, default=10_000, help="Linhas por relatório"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Repetições cronometradas"
+    )
+    parser.add_argument(
+        "--data",
+        default="2024-11-29",
+        help="Data dos dados sintéticos no formato YYYY-MM-DD",
+    )
+    parser.add_argument(
+        "--months",
+        type=int,
+        default=1,
+        help="Meses abrangidos pelas exportações de ordens (padrão: 1)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    parser.add_argument(
+        "--compare", help="Arquivo JSON de uma execução de referência"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Aumento relativo da mediana considerado regressão (padrão: 0.2)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    # Os scripts de upload registram cada etapa; no benchmark isso só adiciona ruído
+    logging.getLogger("upload").setLevel(logging.WARNING)
+
+    data_dados = datetime.date.fromisoformat(args.data)
+    results = {}
+    with tempfile.TemporaryDirectory(
+        prefix="benchmark_ingestion_"
+    ) as work_dir:
+        for report in args.reports:
+            logger.info(
+                f"Medindo {report} ({args.rows} linhas, {args.repeat} repetições)..."
+            )
+            results[report] = benchmark_report(
+                report,
+                args.rows,
+                args.repeat,
+                work_dir,
+                data_dados,
+                args.seed,
+                args.months,
+            )
+
+    output = {
+        "metadata": build_metadata(
+            "ingestion", rows=args.rows, repeat=args.repeat, months=args.months
+        ),
+        "results": results,
+    }
+
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(output, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        logger.info(f"Resultados gravados em {args.output}")
+    else:
+        print(json.dumps(output, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare_medians(
+            stage_medians(output), stage_medians(baseline), args.threshold
+        )
+        if regressions:
+            logger.error(
+                f"{len(regressions)} regressões de desempenho acima de {args.threshold:.0%}."
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
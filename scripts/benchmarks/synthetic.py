@@ -0,0 +1,277 @@
+"""
+Geração de relatórios Excel sintéticos (positivador, saldo, ordens_rv e ordens_rf) para os benchmarks.
+
+Os arquivos usam exatamente os cabeçalhos de COLUMN_MAPPING de cada script de upload, seguem o padrão de nome esperado (ex.: positivador_YYYYMMDD_DD-MM-YYYY-HH-MM-SS.xlsx) e reproduzem os formatos encontrados nos relatórios reais: valores em "R$ 1.234,56", taxas em "12,50%" e linhas de rodapé nas ordens.
+
+Uso:
+    python scripts/benchmarks/synthetic.py --rows 10000 --data 2024-11-29 --output data/raw
+"""
+
+import sys
+import logging
+import argparse
+import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from upload import tb_ordens_rf, tb_ordens_rv, tb_positivador, tb_saldo
+
+logger = logging.getLogger(__name__)
+
+# Relatório -> (módulo de upload, classe de configuração)
+REPORTS = {
+    "positivador": (tb_positivador, tb_positivador.PositivadorConfig),
+    "saldo": (tb_saldo, tb_saldo.SaldoConfig),
+    "ordens_rv": (tb_ordens_rv, tb_ordens_rv.OrdensRVConfig),
+    "ordens_rf": (tb_ordens_rf, tb_ordens_rf.OrdensRFConfig),
+}
+
+PROFISSOES = [
+    "Empresário",
+    "Médico",
+    "Engenheiro",
+    "Advogado",
+    "Aposentado",
+    "Servidor Público",
+    "Estudante",
+    "Outros",
+]
+SEGMENTOS = ["Varejo", "Alta Renda", "Private", "Digital"]
+TICKERS_RV = ["PETR4", "VALE3", "ITUB4", "BBDC4", "BOVA11", "WINZ24"]
+PRODUTOS_RV = ["Ações", "Opções", "Futuros", "ETF", "FII"]
+ATIVOS_RF = ["CDB", "LCI", "LCA", "CRI", "CRA", "Debênture", "Tesouro"]
+INDEXADORES = ["CDI", "IPCA", "PRE", "SELIC"]
+
+
+def format_brl(values):
+    """Formata valores numéricos como moeda brasileira (ex.: 'R$ 1.234,56')."""
+    return [
+        "R$ "
+        + f"{v:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+        for v in values
+    ]
+
+
+def format_percent(values):
+    """Formata frações como percentual brasileiro (ex.: 0.125 -> '12,50%')."""
+    return [f"{v * 100:.2f}".replace(".", ",") + "%" for v in values]
+
+
+def build_file_name(report, data_dados, generated_at=None):
+    """Monta o nome do arquivo no padrão <relatório>_YYYYMMDD_DD-MM-YYYY-HH-MM-SS.xlsx."""
+    generated_at = generated_at or datetime.datetime.now()
+    return (
+        f"{report}_{data_dados.strftime('%Y%m%d')}_"
+        f"{generated_at.strftime('%d-%m-%Y-%H-%M-%S')}.xlsx"
+    )
+
+
+def _month_dates(rng, data_dados, rows, months=1):
+    """Sorteia datas entre o início do mês (ou de `months` meses atrás) e a data dos dados."""
+    month_start = pd.Timestamp(data_dados).replace(day=1) - pd.DateOffset(
+        months=months - 1
+    )
+    days = (pd.Timestamp(data_dados) - month_start).days + 1
+    return month_start + pd.to_timedelta(rng.integers(0, days, rows), "D")
+
+
+def generate_positivador(rng, rows, data_dados, assessores=100):
+    """Gera o DataFrame do relatório positivador."""
+    df = pd.DataFrame(
+        {
+            "Assessor": rng.integers(1000, 1000 + assessores, rows),
+            "Cliente": rng.choice(10_000_000, rows, replace=False),
+            "Profissão": rng.choice(PROFISSOES, rows),
+            "Sexo": rng.choice(["M", "F"], rows),
+            "Segmento": rng.choice(SEGMENTOS, rows),
+            "Data de Cadastro": pd.Timestamp("2015-01-01")
+            + pd.to_timedelta(rng.integers(0, 3500, rows), "D"),
+            "Fez Segundo Aporte?": rng.choice(["Sim", "Não"], rows),
+            "Data de Nascimento": pd.Timestamp("1950-01-01")
+            + pd.to_timedelta(rng.integers(0, 20000, rows), "D"),
+            "Status": rng.choice(["ATIVO", "INATIVO"], rows, p=[0.9, 0.1]),
+            "Ativou em M?": rng.choice(["Sim", "Não"], rows, p=[0.05, 0.95]),
+            "Evadiu em M?": rng.choice(["Sim", "Não"], rows, p=[0.02, 0.98]),
+            "Operou Bolsa?": rng.choice(["Sim", "Não"], rows),
+            "Operou Fundo?": rng.choice(["Sim", "Não"], rows),
+            "Operou Renda Fixa?": rng.choice(["Sim", "Não"], rows),
+        }
+    )
+
+    # Colunas monetárias: todas as demais colunas numéricas do mapeamento
+    text_columns = {"Tipo Pessoa", "Data Posição", "Data Atualização"}
+    for column in tb_positivador.PositivadorConfig.COLUMN_MAPPING:
+        if column not in df.columns and column not in text_columns:
+            df[column] = rng.lognormal(8, 2, rows).round(2)
+
+    df["Tipo Pessoa"] = rng.choice(
+        ["PESSOA FÍSICA", "PESSOA JURÍDICA"], rows, p=[0.9, 0.1]
+    )
+    df["Data Posição"] = pd.Timestamp(data_dados)
+    df["Data Atualização"] = pd.Timestamp(data_dados)
+    return df
+
+
+def generate_saldo(rng, rows, data_dados, assessores=100):
+    """Gera o DataFrame do relatório de saldo."""
+    df = pd.DataFrame(
+        {
+            "Conta": rng.choice(10_000_000, rows, replace=False),
+            "Cliente": [f"CLIENTE {i}" for i in range(rows)],
+            "Assessor": rng.integers(1000, 1000 + assessores, rows),
+        }
+    )
+    for column in ["D0", "D+1", "D+2", "D+3"]:
+        df[column] = rng.normal(5000, 20000, rows).round(2)
+    df["Total"] = df[["D0", "D+1", "D+2", "D+3"]].sum(axis=1).round(2)
+    return df
+
+
+def _append_footer(df, first_column):
+    """Adiciona as linhas de rodapé presentes nos relatórios de ordens."""
+    footer = pd.DataFrame(
+        {
+            first_column: [
+                None,
+                "Total",
+                "Filtros Aplicados: Nenhum Filtro Aplicado",
+            ]
+        }
+    )
+    return pd.concat([df, footer], ignore_index=True)
+
+
+def generate_ordens_rv(rng, rows, data_dados, assessores=100, months=1):
+    """Gera o DataFrame do relatório de ordens de renda variável, com ordens dos últimos `months` meses."""
+    df = pd.DataFrame(
+        {
+            "Conta": rng.integers(1, 10_000_000, rows),
+            "Suitability": rng.integers(1, 6, rows),
+            "Cod A": rng.integers(1000, 1000 + assessores, rows),
+            "Matriz": "MATRIZ",
+            "Ativo": rng.choice(TICKERS_RV, rows),
+            "Qtd": rng.integers(1, 10_000, rows),
+            "Corretagem": format_brl(rng.lognormal(2, 1.5, rows)),
+            "Volume Negociado": format_brl(rng.lognormal(9, 2, rows)),
+            "Produto": rng.choice(PRODUTOS_RV, rows),
+            "Canal": rng.choice(["HB", "Mesa", "API"], rows),
+            "Tipo de Corretagem": rng.choice(["Fixa", "Variável"], rows),
+            "Mercado": rng.choice(["Bovespa", "BMF"], rows),
+            "Lado": rng.choice(["C", "V"], rows),
+            "Data": _month_dates(rng, data_dados, rows, months),
+        }
+    )
+    return _append_footer(df, "Data")
+
+
+def generate_ordens_rf(rng, rows, data_dados, assessores=100, months=1):
+    """Gera o DataFrame do relatório de ordens de renda fixa, com ordens dos últimos `months` meses."""
+    df = pd.DataFrame(
+        {
+            "Data": _month_dates(rng, data_dados, rows, months),
+            "Cód. assessor": rng.integers(1000, 1000 + assessores, rows),
+            "Cód. conta": rng.integers(1, 10_000_000, rows),
+            "Tipo ativo": rng.choice(ATIVOS_RF, rows),
+            "Ticker": [f"RF{i:08d}" for i in rng.integers(0, 10**8, rows)],
+            "Nome papel": rng.choice(ATIVOS_RF, rows),
+            "Indexador": rng.choice(INDEXADORES, rows),
+            "Vencimento": pd.Timestamp(data_dados)
+            + pd.to_timedelta(rng.integers(30, 3650, rows), "D"),
+            "Tipo operação": rng.choice(["Aplicação", "Resgate"], rows),
+            "Quantidade": rng.integers(1, 1000, rows),
+            "Volume": format_brl(rng.lognormal(10, 1.5, rows)),
+            "Receita a dividir": format_brl(rng.lognormal(3, 1.5, rows)),
+            "PU Cliente": rng.normal(1000, 50, rows).round(6),
+            "PU TMR": rng.normal(1000, 50, rows).round(6),
+            "Taxa Cliente": format_percent(rng.uniform(0.05, 0.15, rows)),
+            "Taxa TMR": format_percent(rng.uniform(0.05, 0.15, rows)),
+        }
+    )
+    return _append_footer(df, "Data")
+
+
+# Relatórios de ordens, que podem abranger vários meses
+ORDERS_REPORTS = ("ordens_rv", "ordens_rf")
+
+GENERATORS = {
+    "positivador": generate_positivador,
+    "saldo": generate_saldo,
+    "ordens_rv": generate_ordens_rv,
+    "ordens_rf": generate_ordens_rf,
+}
+
+
+def generate_report(report, rows, data_dados, seed=42, months=1):
+    """Gera o DataFrame sintético de um relatório, validando os cabeçalhos contra COLUMN_MAPPING. Nos relatórios de ordens, `months` define quantos meses a exportação abrange."""
+    rng = np.random.default_rng(seed)
+    if report in ORDERS_REPORTS:
+        df = GENERATORS[report](rng, rows, data_dados, months=months)
+    else:
+        df = GENERATORS[report](rng, rows, data_dados)
+
+    _, config = REPORTS[report]
+    expected = list(config.COLUMN_MAPPING)
+    missing = set(expected) - set(df.columns)
+    if missing:
+        raise ValueError(f"Colunas ausentes no relatório {report}: {missing}")
+    return df[expected]
+
+
+def write_report(report, rows, data_dados, output_dir, seed=42, months=1):
+    """Gera e grava o relatório sintético em Excel. Retorna o caminho do arquivo."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    df = generate_report(report, rows, data_dados, seed, months)
+    file_path = output_dir / build_file_name(report, data_dados)
+    df.to_excel(file_path, index=False)
+    logger.info(f"Relatório sintético gerado: {file_path} ({rows} linhas)")
+    return file_path
+
+
+def main():
+    """Função principal de execução."""
+    parser = argparse.ArgumentParser(
+        description="Gera relatórios Excel sintéticos para os benchmarks."
+    )
+    parser.add_argument(
+        "--reports",
+        nargs="+",
+        choices=list(REPORTS),
+        default=list(REPORTS),
+        help="Relatórios a gerar",
+    )
+    parser.add_argument(
+        "--rows", type=int, default=10_000, help="Linhas por relatório"
+    )
+    parser.add_argument(
+        "--data",
+        default=datetime.date.today().isoformat(),
+        help="Data dos dados no formato YYYY-MM-DD",
+    )
+    parser.add_argument(
+        "--output", default="data/raw", help="Pasta de saída dos arquivos"
+    )
+    parser.add_argument(
+        "--months",
+        type=int,
+        default=1,
+        help="Meses abrangidos pelas exportações de ordens (padrão: 1)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    data_dados = datetime.date.fromisoformat(args.data)
+    for report in args.reports:
+        write_report(
+            report, args.rows, data_dados, args.output, args.seed, args.months
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""
+Benchmark das views SQL (vw_aai, vw_escritorio e vw_clientes) sobre um volume configurável de dados sintéticos.
+
+Um banco temporário é populado com N anos x M clientes de fatos sintéticos (positivador, saldo e ordens), recebe as views e, por padrão, os índices de scripts/database/indexes/vw_aai_index.sql. Cada view é executada N vezes e tem o plano de execução (EXPLAIN QUERY PLAN) registrado; varreduras completas de tabelas e ordenações em B-tree temporária são sinalizadas.
+
+Uso:
+    python scripts/benchmarks/views.py [--years 1] [--clients 1000] [--no-indexes] [--output resultado.json] [--compare baseline.json]
+"""
+
+import re
+import sys
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.common import (
+    build_metadata,
+    compare_medians,
+    create_benchmark_database,
+    summarize,
+)
+from benchmarks.synthetic import (
+    ATIVOS_RF,
+    PRODUTOS_RV,
+    PROFISSOES,
+    SEGMENTOS,
+    TICKERS_RV,
+)
+
+logger = logging.getLogger(__name__)
+
+VIEWS = ["vw_aai", "vw_escritorio", "vw_clientes"]
+
+# Linhas inseridas por chamada de executemany
+CHUNK_SIZE = 50_000
+
+POSITIVADOR_MONEY_COLUMNS = [
+    "aplicacao_financeira_declarada_ajustada",
+    "receita_no_mes",
+    "receita_bovespa",
+    "receita_futuros",
+    "receita_rf_bancarios",
+    "receita_rf_privados",
+    "receita_rf_publicos",
+    "captacao_bruta_em_m",
+    "resgate_em_m",
+    "captacao_liquida_em_m",
+    "captacao_ted",
+    "captacao_st",
+    "captacao_ota",
+    "captacao_rf",
+    "captacao_td",
+    "captacao_prev",
+    "net_em_m",
+    "net_renda_fixa",
+    "net_fundos_imobiliarios",
+    "net_renda_variavel",
+    "net_fundos",
+    "net_financeiro",
+    "net_previdencia",
+    "net_outros",
+    "receita_aluguel",
+    "receita_complemento_pacote_corretagem",
+]
+
+
+def insert_frame(conn, table_name, df):
+    """Insere um DataFrame em lotes com executemany."""
+    df = df.astype(object).where(df.notna(), None)
+    columns = ", ".join(df.columns)
+    placeholders = ", ".join("?" for _ in df.columns)
+    query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+    rows = list(df.itertuples(index=False, name=None))
+    for start in range(0, len(rows), CHUNK_SIZE):
+        conn.executemany(query, rows[start : start + CHUNK_SIZE])
+    conn.commit()
+    return len(rows)
+
+
+def month_ends(years, last_month="2024-12"):
+    """Últimos dias dos meses cobertos pelo benchmark, do mais antigo ao mais recente."""
+    return pd.date_range(
+        end=pd.Period(last_month, "M").end_time.normalize(),
+        periods=years * 12,
+        freq="ME",
+    )
+
+
+def populate_facts(
+    conn, years, clients, assessores=100, orders_per_month=2, seed=42
+):
+    """Popula as tabelas de fatos com um mês de positivador e saldo por cliente e `orders_per_month` ordens de cada tipo por cliente e mês. Retorna a quantidade de linhas por tabela."""
+    rng = np.random.default_rng(seed)
+    client_ids = np.arange(1, clients + 1)
+    client_assessor = np.char.add(
+        "A", rng.integers(1000, 1000 + assessores, clients).astype(str)
+    )
+    sexo = rng.choice(["M", "F", None], clients, p=[0.5, 0.4, 0.1])
+    profissao = rng.choice(PROFISSOES, clients)
+    segmento = rng.choice(SEGMENTOS, clients)
+    data_cadastro = (
+        pd.Timestamp("2015-01-01")
+        + pd.to_timedelta(rng.integers(0, 3000, clients), "D")
+    ).strftime("%Y-%m-%d %H:%M:%S")
+    data_nascimento = (
+        pd.Timestamp("1950-01-01")
+        + pd.to_timedelta(rng.integers(0, 20000, clients), "D")
+    ).strftime("%Y-%m-%d %H:%M:%S")
+
+    counts = {
+        "tb_positivador": 0,
+        "tb_saldo": 0,
+        "tb_ordens_rv": 0,
+        "tb_ordens_rf": 0,
+    }
+    for month_end in month_ends(years):
+        positivador = pd.DataFrame(
+            {
+                "codigo_assessor": client_assessor,
+                "codigo_cliente": client_ids,
+                "profissao": profissao,
+                "sexo": sexo,
+                "segmento": segmento,
+                "data_cadastro": data_cadastro,
+                "data_nascimento": data_nascimento,
+                "status": "ATIVO",
+                "ativou_em_m": rng.choice(
+                    ["Sim", "Não"], clients, p=[0.03, 0.97]
+                ),
+                "evadiu_em_m": rng.choice(
+                    ["Sim", "Não"], clients, p=[0.01, 0.99]
+                ),
+                "tipo_pessoa": np.where(
+                    pd.isna(sexo), "PESSOA JURÍDICA", "PESSOA FÍSICA"
+                ),
+                "data_posicao": month_end.strftime("%Y-%m-%d %H:%M:%S"),
+                "data_atualizacao": month_end.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        )
+        for column in POSITIVADOR_MONEY_COLUMNS:
+            positivador[column] = rng.lognormal(8, 2, clients).round(2)
+        positivador["captacao_liquida_em_m"] = rng.normal(
+            0, 150_000, clients
+        ).round(2)
+        counts["tb_positivador"] += insert_frame(
+            conn, "tb_positivador", positivador
+        )
+
+        saldo = pd.DataFrame(
+            {
+                "codigo_cliente": client_ids,
+                "nome_cliente": np.char.add(
+                    "CLIENTE ", client_ids.astype(str)
+                ),
+                "codigo_assessor": client_assessor,
+                "d0": rng.normal(5000, 20000, clients).round(2),
+                "saldo_total": rng.normal(5000, 20000, clients).round(2),
+                "data_saldo": month_end.strftime("%Y-%m-%d"),
+            }
+        )
+        counts["tb_saldo"] += insert_frame(conn, "tb_saldo", saldo)
+
+        orders = clients * orders_per_month
+        order_clients = rng.integers(0, clients, orders)
+        order_dates = (
+            month_end.replace(day=1)
+            + pd.to_timedelta(rng.integers(0, month_end.day, orders), "D")
+        ).strftime("%Y-%m-%d")
+
+        ordens_rv = pd.DataFrame(
+            {
+                "codigo_cliente": client_ids[order_clients],
+                "suitability": rng.integers(1, 6, orders),
+                "codigo_assessor": client_assessor[order_clients],
+                "ticker": rng.choice(TICKERS_RV, orders),
+                "quantidade": rng.integers(1, 10_000, orders),
+                "receita_corretagem": rng.lognormal(2, 1.5, orders).round(2),
+                "volume": rng.lognormal(9, 2, orders).round(2),
+                "tipo_produto": rng.choice(PRODUTOS_RV, orders),
+                "data_ordem": order_dates,
+            }
+        )
+        counts["tb_ordens_rv"] += insert_frame(conn, "tb_ordens_rv", ordens_rv)
+
+        ordens_rf = pd.DataFrame(
+            {
+                "data_ordem": order_dates,
+                "codigo_assessor": client_assessor[order_clients],
+                "codigo_cliente": client_ids[order_clients],
+                "tipo_ativo": rng.choice(ATIVOS_RF, orders),
+                "quantidade": rng.integers(1, 1000, orders),
+                "volume": rng.lognormal(10, 1.5, orders).round(2),
+                "receita_a_dividir": rng.lognormal(3, 1.5, orders).round(2),
+            }
+        )
+        counts["tb_ordens_rf"] += insert_frame(conn, "tb_ordens_rf", ordens_rf)
+
+    return counts
+
+
+def get_query_plan(conn, query):
+    """Obtém o plano de execução da consulta como lista de linhas indentadas pela hierarquia."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+    depth = {0: -1}
+    plan = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        plan.append("  " * depth[node_id] + detail)
+    return plan
+
+
+def analyze_plan(plan, tables):
+    """Sinaliza no plano as varreduras completas de tabelas e as ordenações em B-tree temporária."""
+    flags = []
+    for line in plan:
+        detail = line.strip()
+        scan = re.match(r"SCAN (\w+)", detail)
+        if scan and scan.group(1) in tables and "INDEX" not in detail:
+            flags.append(f"varredura completa: {detail}")
+        elif "USE TEMP B-TREE" in detail:
+            flags.append(f"B-tree temporária: {detail}")
+        elif "AUTOMATIC" in detail and "INDEX" in detail:
+            flags.append(f"índice automático: {detail}")
+    return flags
+
+
+def time_query(conn, query, repeat, timeout):
+    """Executa a consulta `repeat` vezes e retorna (tempos, linhas retornadas). Interrompe a execução que ultrapassar `timeout` segundos."""
+    runs = []
+    rows = 0
+    for _ in range(repeat):
+        deadline = time.perf_counter() + timeout
+        conn.set_progress_handler(
+            lambda: int(time.perf_counter() > deadline), 10_000
+        )
+        start = time.perf_counter()
+        try:
+            rows = len(conn.execute(query).fetchall())
+        finally:
+            conn.set_progress_handler(None, 0)
+        runs.append(time.perf_counter() - start)
+    return runs, rows
+
+
+def benchmark_views(conn, views, repeat, timeout):
+    """Mede cada view e registra seu plano de execução."""
+    tables = {
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+    }
+    results = {}
+    for view in views:
+        query = f"SELECT * FROM {view}"
+        plan = get_query_plan(conn, query)
+        flags = analyze_plan(plan, tables)
+        result = {"plan": plan, "flags": flags}
+        try:
+            runs, rows = time_query(conn, query, repeat, timeout)
+            result.update({"status": "ok", "rows": rows, **summarize(runs)})
+            logger.info(
+                f"{view}: {rows} linhas, mediana {result['median']:.3f}s"
+            )
+        except sqlite3.OperationalError as e:
+            result.update({"status": "timeout", "error": str(e)})
+            logger.warning(f"{view}: interrompida após {timeout}s ({e})")
+
+        for flag in flags:
+            logger.warning(f"{view}: {flag}")
+        results[view] = result
+    return results
+
+
+def view_medians(output):
+    """Extrai as medianas das views medidas com sucesso no formato {view: segundos}."""
+    return {
+        view: result["median"]
+        for view, result in output.get("results", {}).items()
+        if result.get("status") == "ok"
+    }
+
+
+def main():
+    """Função principal de execução."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark das views SQL sobre dados sintéticos."
+    )
+    parser.add_argument(
+        "--views",
+        nargs="+",
+        choices=VIEWS,
+        default=VIEWS,
+        help="Views a medir",
+    )
+    parser.add_argument("--years", type=int, default=1, help="Anos de dados")
+    parser.add_argument(
+        "--clients", type=int, default=1000, help="Quantidade de clientes"
+    )
+    parser.add_argument(
+        "--assessores", type=int, default=100, help="Quantidade de assessores"
+    )
+    parser.add_argument(
+        "--orders-per-month",
+        type=int,
+        default=2,
+        help="Ordens de cada tipo por cliente e mês",
+    )
+    parser.add_argument(
+        "--no-indexes",
+        action="store_true",
+        help="Não aplica scripts/database/indexes/*.sql",
+    )
+    parser.add_argument(
+        "--analyze",
+        action="store_true",
+        help="Executa ANALYZE antes das medições",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Repetições cronometradas"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=120,
+        help="Tempo máximo por execução de cada view, em segundos",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    parser.add_argument(
+        "--compare", help="Arquivo JSON de uma execução de referência"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Aumento relativo da mediana considerado regressão (padrão: 0.2)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    with tempfile.TemporaryDirectory(prefix="benchmark_views_") as work_dir:
+        conn = create_benchmark_database(
+            Path(work_dir) / "benchmark_views.db",
+            views=True,
+            indexes=not args.no_indexes,
+        )
+        try:
+            logger.info(
+                f"Gerando {args.years} ano(s) de dados para {args.clients} clientes..."
+            )
+            start = time.perf_counter()
+            table_rows = populate_facts(
+                conn,
+                args.years,
+                args.clients,
+                args.assessores,
+                args.orders_per_month,
+                args.seed,
+            )
+            logger.info(
+                f"Dados gerados em {time.perf_counter() - start:.1f}s: {table_rows}"
+            )
+            if args.analyze:
+                conn.execute("ANALYZE")
+
+            # Execução de aquecimento do cache de páginas do SQLite
+            conn.execute("SELECT COUNT(*) FROM tb_positivador").fetchone()
+            results = benchmark_views(
+                conn, args.views, args.repeat, args.timeout
+            )
+        finally:
+            conn.close()
+
+    output = {
+        "metadata": build_metadata(
+            "views",
+            years=args.years,
+            clients=args.clients,
+            assessores=args.assessores,
+            orders_per_month=args.orders_per_month,
+            indexes=not args.no_indexes,
+            analyze=args.analyze,
+            repeat=args.repeat,
+            table_rows=table_rows,
+        ),
+        "results": results,
+    }
+
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(output, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        logger.info(f"Resultados gravados em {args.output}")
+    else:
+        print(json.dumps(output, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare_medians(
+            view_medians(output), view_medians(baseline), args.threshold
+        )
+        if regressions:
+            logger.error(
+                f"{len(regressions)} regressões de desempenho acima de {args.threshold:.0%}."
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -62,6 +62,26 @@ def create_database():
             ultimo_processamento DATETIME
         )""")
 
+        # Histórico de execuções da carga (métricas por etapa)
+        logger.info("Criando tabela tb_execucoes...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tb_execucoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_execucao TEXT NOT NULL,
+            nome_arquivo TEXT,
+            nome_tabela TEXT NOT NULL,
+            etapa TEXT NOT NULL,
+            inicio DATETIME NOT NULL,
+            duracao_segundos REAL NOT NULL,
+            registros INTEGER,
+            registros_por_segundo REAL,
+            pico_memoria_mb REAL,
+            sucesso INTEGER NOT NULL
+        )""")
+        cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tb_execucoes_tabela_inicio
+        ON tb_execucoes (nome_tabela, inicio)""")
+
         # Commit das alterações
         conn.commit()
         logger.info("Todas as tabelas foram criadas com sucesso!")
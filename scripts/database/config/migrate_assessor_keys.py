@@ -0,0 +1,196 @@
+"""
+Migração única da chave do assessor para o formato canônico ("A1234") nas tabelas de fatos.
+
+Normaliza os registros já gravados em tb_positivador, tb_saldo, tb_ordens_rv e tb_ordens_rf ("Anan" vira nulo, "1234" e 1234 viram "A1234") e recria tb_ordens_rv com codigo_assessor TEXT, preservando ids, índices, triggers e views. Depois da migração, as junções das views por codigo_assessor comparam textos com textos, e as ordens de renda variável e fixa voltam a ser associadas aos assessores do positivador.
+
+Uso:
+    python scripts/database/config/migrate_assessor_keys.py [--dry-run]
+"""
+
+import re
+import sys
+import logging
+import argparse
+from pathlib import Path
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from analytics.rankings import refresh_rankings
+from upload.tb_positivador import get_database_connection
+from utils.assessor import normalize_assessor_code
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+FACT_TABLES = ["tb_positivador", "tb_saldo", "tb_ordens_rv", "tb_ordens_rf"]
+
+# Função SQL registrada na conexão durante a migração
+NORMALIZE_FUNCTION = "normalizar_assessor"
+
+
+def get_column_type(cursor, table_name, column_name):
+    """Obtém o tipo declarado de uma coluna, ou None se a tabela ou a coluna não existir."""
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    for row in cursor.fetchall():
+        if row[1] == column_name:
+            return row[2].upper()
+    return None
+
+
+def count_pending(cursor, table_name):
+    """Conta os registros cuja chave do assessor ainda não está no formato canônico."""
+    cursor.execute(
+        f"SELECT COUNT(*) FROM {table_name} WHERE codigo_assessor IS NOT {NORMALIZE_FUNCTION}(codigo_assessor) OR typeof(codigo_assessor) NOT IN ('text', 'null')"
+    )
+    return cursor.fetchone()[0]
+
+
+def normalize_table(cursor, table_name):
+    """Normaliza a chave do assessor de uma tabela. Retorna a quantidade de registros alterados."""
+    cursor.execute(
+        f"UPDATE {table_name} SET codigo_assessor = {NORMALIZE_FUNCTION}(codigo_assessor) WHERE codigo_assessor IS NOT {NORMALIZE_FUNCTION}(codigo_assessor)"
+    )
+    return cursor.rowcount
+
+
+def rebuild_as_text(cursor, table_name):
+    """Recria a tabela com codigo_assessor TEXT (o SQLite não altera o tipo de uma coluna existente), copiando os registros já normalizados. Índices, triggers e views dependentes são recriados. Retorna a quantidade de registros copiados."""
+    cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table_name,),
+    )
+    create_sql = re.sub(
+        r"\bcodigo_assessor\s+INTEGER\b",
+        "codigo_assessor TEXT",
+        cursor.fetchone()[0],
+        flags=re.IGNORECASE,
+    )
+
+    # Views referenciam a tabela pelo nome e precisam ser removidas durante a troca
+    cursor.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'view' AND sql IS NOT NULL"
+    )
+    views = cursor.fetchall()
+    cursor.execute(
+        "SELECT type, sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL",
+        (table_name,),
+    )
+    dependents = cursor.fetchall()
+
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = [row[1] for row in cursor.fetchall()]
+    column_list = ", ".join(columns)
+    select_list = ", ".join(
+        (
+            f"{NORMALIZE_FUNCTION}(codigo_assessor)"
+            if column == "codigo_assessor"
+            else column
+        )
+        for column in columns
+    )
+    old_table = f"{table_name}_antiga"
+
+    for view_name, _ in views:
+        cursor.execute(f"DROP VIEW {view_name}")
+    cursor.execute(f"ALTER TABLE {table_name} RENAME TO {old_table}")
+    cursor.execute(create_sql)
+    cursor.execute(
+        f"INSERT INTO {table_name} ({column_list}) SELECT {select_list} FROM {old_table}"
+    )
+    copied_count = cursor.rowcount
+    cursor.execute(f"DROP TABLE {old_table}")
+
+    for _, sql in dependents:
+        cursor.execute(sql)
+    for _, sql in views:
+        cursor.execute(sql)
+    return copied_count
+
+
+def migrate(conn, dry_run=False):
+    """Executa a migração em uma única transação. Retorna um dicionário com a quantidade de registros alterados por tabela."""
+    conn.create_function(
+        NORMALIZE_FUNCTION, 1, normalize_assessor_code, deterministic=True
+    )
+    cursor = conn.cursor()
+    if conn.in_transaction:
+        conn.commit()
+
+    changes = {}
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for table_name in FACT_TABLES:
+            column_type = get_column_type(
+                cursor, table_name, "codigo_assessor"
+            )
+            if column_type is None:
+                logger.info(f"Tabela {table_name} não encontrada. Ignorando.")
+                continue
+
+            pending = count_pending(cursor, table_name)
+            if dry_run:
+                logger.info(
+                    f"{table_name}: {pending:,} registros a normalizar (codigo_assessor {column_type})."
+                )
+                changes[table_name] = pending
+                continue
+
+            if column_type != "TEXT":
+                copied_count = rebuild_as_text(cursor, table_name)
+                logger.info(
+                    f"{table_name}: recriada com codigo_assessor TEXT ({copied_count:,} registros copiados, {pending:,} normalizados)."
+                )
+            else:
+                pending = normalize_table(cursor, table_name)
+                logger.info(
+                    f"{table_name}: {pending:,} registros normalizados."
+                )
+            changes[table_name] = pending
+
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return changes
+
+
+def parse_arguments(argv=None):
+    """Interpreta as opções da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Normaliza a chave do assessor nas tabelas de fatos."
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Apenas conta os registros a normalizar, sem alterar o banco",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Função principal."""
+    args = parse_arguments(argv)
+    with get_database_connection() as conn:
+        try:
+            changes = migrate(conn, dry_run=args.dry_run)
+        except Exception as e:
+            logger.error(f"Erro durante a migração: {e}")
+            raise
+
+        if not args.dry_run and any(changes.values()):
+            # Os rankings materializados guardam a chave antiga
+            refresh_rankings(conn)
+        logger.info("Migração concluída!")
+
+
+if __name__ == "__main__":
+    main()
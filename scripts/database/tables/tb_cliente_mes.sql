@@ -0,0 +1,18 @@
+-- Fato consolidado por cliente e mês, recalculado pelos scripts de upload apenas para o mês substituído.
+-- Mantida por scripts/utils/client_month.py.
+CREATE TABLE IF NOT EXISTS tb_cliente_mes (
+    codigo_cliente INTEGER NOT NULL,
+    data_referencia TEXT NOT NULL,
+    codigo_assessor TEXT,
+    net REAL,
+    captacao_liquida REAL,
+    receita REAL,
+    saldo_fim_mes REAL,
+    volume_operado_rv REAL,
+    volume_operado_rf REAL,
+    ordens_rv INTEGER,
+    ordens_rf INTEGER,
+    PRIMARY KEY (codigo_cliente, data_referencia)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_tb_cliente_mes_data_assessor ON tb_cliente_mes (data_referencia, codigo_assessor);
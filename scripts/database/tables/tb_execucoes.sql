@@ -0,0 +1,17 @@
+-- Histórico de execuções da carga: uma linha por etapa (read, transform, staging, swap, tracking e total) de cada arquivo processado.
+-- Mantida por scripts/utils/metrics.py.
+CREATE TABLE IF NOT EXISTS tb_execucoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_execucao TEXT NOT NULL,
+    nome_arquivo TEXT,
+    nome_tabela TEXT NOT NULL,
+    etapa TEXT NOT NULL,
+    inicio DATETIME NOT NULL,
+    duracao_segundos REAL NOT NULL,
+    registros INTEGER,
+    registros_por_segundo REAL,
+    pico_memoria_mb REAL,
+    sucesso INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_tb_execucoes_tabela_inicio ON tb_execucoes (nome_tabela, inicio);
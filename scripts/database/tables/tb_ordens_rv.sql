@@ -2,7 +2,7 @@ CREATE TABLE IF NOT EXISTS tb_ordens_rv (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     codigo_cliente INTEGER,
     suitability INTEGER,
-    codigo_assessor INTEGER,
+    codigo_assessor TEXT,
     matriz TEXT,
     ticker TEXT,
     quantidade INTEGER,
@@ -0,0 +1 @@
+"""Scripts de carga dos relatórios Excel para o banco de dados SQLite."""
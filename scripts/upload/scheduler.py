@@ -0,0 +1,262 @@
+"""
+Orquestrador assíncrono da carga de vários relatórios de uma vez (por exemplo, no fechamento do mês, quando chegam os quatro relatórios de vários dias).
+
+A leitura do Excel e a transformação, que dominam o tempo da carga, rodam em paralelo em um pool de processos. A gravação passa por uma única fila atendida por um único gravador, já que o SQLite aceita apenas um escritor por vez. A fila é limitada: um processo que terminou a transformação mantém sua vaga até o gravador aceitar o resultado, de modo que no máximo `workers + queue_size` DataFrames ficam em memória ao mesmo tempo. Com isso, o tempo total fica próximo ao da leitura mais lenta, e não à soma de todas.
+
+Como cada carga substitui o mês inteiro dos dados, apenas o arquivo mais recente de cada relatório e mês é carregado.
+
+Uso:
+    python scripts/upload/scheduler.py [--workers 4] [--queue-size 2]
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import argparse
+import importlib
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from upload import tb_positivador
+from upload.watch_folder import LOADERS, build_routes, route_file
+from utils.metrics import RunMetrics
+from utils.post_ingestion import run_post_ingestion
+from utils.sql_trace import enable_tracing
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionJob:
+    """Arquivo a ser carregado e o script de upload responsável por ele."""
+
+    def __init__(
+        self, path, module_name, file_name, table_name, data_dados, modified
+    ):
+        self.path = path
+        self.module_name = module_name
+        self.file_name = file_name
+        self.table_name = table_name
+        self.data_dados = data_dados
+        self.modified_time = modified
+
+
+def select_jobs(conn, folder, routes):
+    """Lista os arquivos que precisam ser carregados, mantendo apenas o mais recente de cada relatório e mês."""
+    configs = dict(LOADERS)
+    newest = {}
+    for path in sorted(Path(folder).glob("*.xlsx")):
+        route = route_file(routes, path)
+        if route is None:
+            continue
+        _, module, file_name, table_name = route
+        data_dados = configs[module].interpret_file_name(path.name)
+        if data_dados is None:
+            continue
+
+        key = (table_name, data_dados.year, data_dados.month)
+        candidate = (data_dados, path.stat().st_mtime, path, route)
+        if key in newest and newest[key][:2] >= candidate[:2]:
+            logger.info(
+                f"Arquivo substituído por versão mais recente: {path.name}"
+            )
+            continue
+        if key in newest:
+            logger.info(
+                f"Arquivo substituído por versão mais recente: {newest[key][2].name}"
+            )
+        newest[key] = candidate
+
+    cursor = conn.cursor()
+    jobs = []
+    for data_dados, _, path, route in newest.values():
+        _, module, file_name, table_name = route
+        modified_time = module.get_file_last_modified(path)
+        if modified_time is None:
+            logger.error(f"Não foi possível obter timestamp do arquivo {path}")
+            continue
+        if module.should_process_file(
+            cursor, path.name, table_name, modified_time, data_dados
+        ):
+            jobs.append(
+                IngestionJob(
+                    path,
+                    module.__name__,
+                    file_name,
+                    table_name,
+                    data_dados,
+                    modified_time,
+                )
+            )
+    return jobs
+
+
+def read_and_transform(job):
+    """Executada no pool de processos: lê o Excel e aplica as transformações do relatório. Retorna as métricas, o DataFrame e a data de referência (None em caso de falha)."""
+    module = importlib.import_module(job.module_name)
+    metrics = RunMetrics(job.table_name, job.path.name)
+    try:
+        with metrics.stage("read") as stage:
+            df = module.load_excel_file(job.path)
+            stage.success = df is not None
+            if stage.success:
+                stage.rows = len(df)
+        if df is None:
+            return metrics, None, None
+
+        with metrics.stage("transform") as stage:
+            df, reference_date = module.transform_data(df, job.data_dados)
+            stage.rows = len(df)
+        return metrics, df, reference_date
+
+    except Exception as e:
+        logger.error(f"Erro ao transformar arquivo {job.path.name}: {e}")
+        return metrics, None, None
+
+
+def write_job(conn, job, metrics, df, reference_date):
+    """Executada pelo gravador: grava os dados, atualiza o rastreamento e registra as métricas. Retorna True se o arquivo foi carregado."""
+    module = importlib.import_module(job.module_name)
+    cursor = conn.cursor()
+
+    loaded = df is not None and module.write_data(
+        cursor, conn, df, reference_date, metrics=metrics
+    )
+    if loaded:
+        with metrics.stage("tracking"):
+            module.update_file_tracking(
+                cursor, conn, job.path.name, job.table_name, job.modified_time
+            )
+        logger.info(f"Arquivo {job.path.name} processado com sucesso.")
+    else:
+        logger.error(f"Falha ao processar arquivo {job.path.name}")
+
+    # Registra as métricas da carga em tb_execucoes
+    metrics.save(conn)
+    return loaded
+
+
+async def parse_job(job, pool, semaphore, queue):
+    """Transforma um arquivo no pool e entrega o resultado ao gravador."""
+    loop = asyncio.get_running_loop()
+    async with semaphore:
+        logger.info(f"Lendo arquivo {job.path.name} -> {job.table_name}")
+        try:
+            result = await loop.run_in_executor(pool, read_and_transform, job)
+        except Exception as e:
+            logger.error(f"Erro ao transformar arquivo {job.path.name}: {e}")
+            result = (RunMetrics(job.table_name, job.path.name), None, None)
+
+        # Mantém a vaga até o gravador aceitar o resultado (contrapressão)
+        await queue.put((job, result))
+
+
+async def write_results(queue, conn, writer):
+    """Gravador único: consome a fila até receber None. A falha de um arquivo é registrada e não interrompe o consumo da fila, que deixaria os produtores bloqueados."""
+    loop = asyncio.get_running_loop()
+    loaded_count = 0
+    while True:
+        item = await queue.get()
+        if item is None:
+            return loaded_count
+        job, (metrics, df, reference_date) = item
+        try:
+            if await loop.run_in_executor(
+                writer, write_job, conn, job, metrics, df, reference_date
+            ):
+                loaded_count += 1
+        except Exception as e:
+            logger.error(f"Falha ao gravar arquivo {job.path.name}: {e}")
+            await loop.run_in_executor(writer, conn.rollback)
+
+
+async def schedule(folder, workers=None, queue_size=2):
+    """Carrega os arquivos pendentes da pasta com leitura paralela e gravação serializada. Retorna a quantidade de arquivos carregados."""
+    loop = asyncio.get_running_loop()
+    workers = workers or min(4, os.cpu_count() or 1)
+
+    # Todas as operações de banco rodam na mesma thread, com a mesma conexão
+    writer = ThreadPoolExecutor(max_workers=1)
+    connection = tb_positivador.get_database_connection()
+    conn = await loop.run_in_executor(writer, connection.__enter__)
+    try:
+        jobs = await loop.run_in_executor(
+            writer, select_jobs, conn, folder, build_routes()
+        )
+        logger.info(
+            f"{len(jobs)} arquivos a carregar ({workers} processos, fila de {queue_size})"
+        )
+        if not jobs:
+            return 0
+
+        queue = asyncio.Queue(maxsize=queue_size)
+        semaphore = asyncio.Semaphore(workers)
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            writer_task = asyncio.create_task(
+                write_results(queue, conn, writer)
+            )
+            await asyncio.gather(
+                *(parse_job(job, pool, semaphore, queue) for job in jobs)
+            )
+            await queue.put(None)
+            loaded_count = await writer_task
+
+        if loaded_count > 0:
+            # Atualiza os agregados consumidos pelos dashboards
+            await loop.run_in_executor(writer, run_post_ingestion, conn)
+        logger.info(
+            f"Processamento concluído. {loaded_count} arquivos processados."
+        )
+        return loaded_count
+
+    finally:
+        await loop.run_in_executor(
+            writer, connection.__exit__, None, None, None
+        )
+        writer.shutdown()
+
+
+def parse_arguments(argv=None):
+    """Interpreta as opções da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Carrega em paralelo os relatórios pendentes em data/raw."
+    )
+    parser.add_argument(
+        "--folder",
+        type=Path,
+        default=None,
+        help="Pasta de entrada (padrão: data/raw)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processos de leitura e transformação (padrão: até 4)",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=2,
+        help="Resultados transformados aguardando gravação (padrão: 2)",
+    )
+    parser.add_argument(
+        "--trace-sql",
+        action="store_true",
+        help="Rastreia as instruções SQL e registra o relatório das mais custosas",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Função principal de execução."""
+    args = parse_arguments(argv)
+    if args.trace_sql:
+        enable_tracing()
+    folder = args.folder or tb_positivador.PositivadorConfig.get_input_folder()
+    return asyncio.run(schedule(folder, args.workers, args.queue_size))
+
+
+if __name__ == "__main__":
+    main()
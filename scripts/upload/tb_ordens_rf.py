@@ -1,12 +1,26 @@
 import os
 import pandas as pd
 from pathlib import Path
-import sqlite3
 import logging
 from dotenv import load_dotenv
 import datetime
 from contextlib import contextmanager
 import glob
+import sys
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.assessor import normalize_assessor_codes
+from utils.br_numbers import parse_br_numbers
+from utils.client_month import refresh_client_month
+from utils.connection import connect_writer
+from utils.dtypes import read_excel_report, to_integer
+from utils.footer import trim_footer
+from utils.metrics import RunMetrics
+from utils.post_ingestion import run_post_ingestion
+from utils.profiling import allocation_snapshot, run_main
+from utils.staging import load_staging, swap_month
+from utils.sql_trace import log_trace_report
 
 # Configurar logging
 logging.basicConfig(
@@ -35,7 +49,7 @@ def get_database_connection():
 
     conn = None
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect_writer(db_path)
         logger.info(
             f"Conexão com o banco de dados SQLite estabelecida: {db_path}"
         )
@@ -45,6 +59,7 @@ def get_database_connection():
         raise
     finally:
         if conn:
+            log_trace_report(conn)
             conn.close()
             logger.info("Conexão com banco de dados fechada.")
 
@@ -66,6 +81,34 @@ class OrdensRFConfig:
 
     FILE_TO_DB_MAPPING = {"ordens_rf.xlsx": "tb_ordens_rf"}
 
+    COLUMN_MAPPING = {
+        "Data": "data_ordem",
+        "Cód. assessor": "codigo_assessor",
+        "Cód. conta": "codigo_cliente",
+        "Tipo ativo": "tipo_ativo",
+        "Ticker": "ticker",
+        "Nome papel": "nome_papel",
+        "Indexador": "indexador",
+        "Vencimento": "data_vencimento",
+        "Tipo operação": "tipo_operacao",
+        "Quantidade": "quantidade",
+        "Volume": "volume",
+        "Receita a dividir": "receita_a_dividir",
+        "PU Cliente": "pu_cliente",
+        "PU TMR": "pu_tmr",
+        "Taxa Cliente": "taxa_cliente",
+        "Taxa TMR": "taxa_tmr",
+    }
+
+    # Colunas de baixa cardinalidade lidas diretamente como category
+    CATEGORY_COLUMNS = [
+        "Tipo ativo",
+        "Ticker",
+        "Nome papel",
+        "Indexador",
+        "Tipo operação",
+    ]
+
     @staticmethod
     def get_input_folder():
         """Obtém o caminho da pasta de entrada com lógica de fallback."""
@@ -198,8 +241,8 @@ def get_identity_column(cursor, table_name):
         return None
 
 
-def delete_non_finished_data(cursor, conn, reference_date):
-    """Se data dos dados for diferente do fechamento do mês atual, substituímos os dados do mês atual. Como os relatórios são extraídos em D+2, pode acontecer de no começo do mês termos dados do mês anterior, especificamente se estivermos nos primeiros dois dias úteis do mês. Nesse caso, continuamos atualizando o mês anterior. Uma vez que os dados do mês anterior são finalizados, começamos anexando os dados do mês atual e assim sucessivamente."""
+def replace_month_data(cursor, conn, reference_date, staging_table, columns):
+    """Se data dos dados for diferente do fechamento do mês atual, substituímos os dados do mês atual. Como os relatórios são extraídos em D+2, pode acontecer de no começo do mês termos dados do mês anterior, especificamente se estivermos nos primeiros dois dias úteis do mês. Nesse caso, continuamos atualizando o mês anterior. Uma vez que os dados do mês anterior são finalizados, começamos anexando os dados do mês atual e assim sucessivamente. Os registros do mês são substituídos pelos da tabela temporária de carga em uma única transação. Retorna a quantidade de registros inseridos, ou None em caso de erro."""
     try:
         current_date = reference_date
 
@@ -233,246 +276,224 @@ def delete_non_finished_data(cursor, conn, reference_date):
                 microsecond=0,
             )
 
-        delete_query = """
-            DELETE FROM tb_ordens_rf
-            WHERE data_ordem >= ? AND data_ordem < ?
-        """
-
         # Converte datetime para string para comparação no SQLite (formato YYYY-MM-DD)
         current_month_str = current_month_start.strftime("%Y-%m-%d")
         next_month_str = next_month_start.strftime("%Y-%m-%d")
 
-        cursor.execute(delete_query, (current_month_str, next_month_str))
-        deleted_count = cursor.rowcount
-        conn.commit()
+        logger.info(
+            f"Substituindo registros entre {current_month_str} e {next_month_str}"
+        )
+
+        deleted_count, inserted_count = swap_month(
+            conn,
+            "tb_ordens_rf",
+            "data_ordem",
+            current_month_str,
+            next_month_str,
+            staging_table,
+            columns,
+            after_swap=refresh_client_month,
+        )
 
         logger.info(
-            f"Removidos {deleted_count:,} registros não concluídos da tabela no banco de dados."
+            f"Removidos {deleted_count:,} registros não concluídos e inseridos {inserted_count:,} na tabela no banco de dados."
         )
-        return True
+        return inserted_count
 
     except Exception as e:
-        logger.error(f"Erro ao remover dados não concluídos: {e}")
-        return False
+        logger.error(f"Erro ao substituir dados não concluídos: {e}")
+        return None
 
 
-def process_ordens_rf(cursor, conn, df, file_modified_time):
-    """Processa dados do arquivo ordends_rf.xlsx."""
-    try:
-        # Filtra linhas indesejadas no final (linhas onde 'Data' não é uma data válida ou é nula)
-        # Remove linhas onde a coluna 'Data' contém strings como 'Total', 'Nenhum filtro aplicado', etc.
-        df = df[df["Data"].notna()]  # Remove null dates
-        df = df[
-            ~df["Data"]
-            .astype(str)
-            .str.contains(
-                "Total|Nenhum Filtro Aplicado|Filtros Aplicados",
-                case=False,
-                na=False,
-            )
-        ]
-
-        column_mapping = {
-            "Data": "data_ordem",
-            "Cód. assessor": "codigo_assessor",
-            "Cód. conta": "codigo_cliente",
-            "Tipo ativo": "tipo_ativo",
-            "Ticker": "ticker",
-            "Nome papel": "nome_papel",
-            "Indexador": "indexador",
-            "Vencimento": "data_vencimento",
-            "Tipo operação": "tipo_operacao",
-            "Quantidade": "quantidade",
-            "Volume": "volume",
-            "Receita a dividir": "receita_a_dividir",
-            "PU Cliente": "pu_cliente",
-            "PU TMR": "pu_tmr",
-            "Taxa Cliente": "taxa_cliente",
-            "Taxa TMR": "taxa_tmr",
-        }
-
-        # Converte a coluna Data para datetime primeiro para filtrar por mês
-        df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
-
-        # Remove linhas com datas inválidas
-        df = df[df["Data"].notna()]
-
-        # Pega a data mais recente no arquivo para determinar o mês não concluído
-        max_date_in_file = df["Data"].max()
-
-        if pd.isna(max_date_in_file):
-            logger.error(
-                "Não foi possível determinar a data mais recente no arquivo."
-            )
-            return False
+def transform_data(df, data_dados=None):
+    """Aplica as transformações de dados do relatório de ordens renda fixa e renomeia as colunas para o esquema do banco de dados. Retorna o DataFrame transformado e a data de referência do mês a ser substituído (a data mais recente do arquivo)."""
+    # Remove as linhas de rodapé no final do arquivo ('Total', 'Nenhum filtro aplicado', linhas vazias etc.)
+    df = trim_footer(df, "Data")
 
-        # Converte para datetime do Python
-        reference_date = pd.to_datetime(max_date_in_file).to_pydatetime()
+    column_mapping = OrdensRFConfig.COLUMN_MAPPING
 
-        logger.info(f"Data mais recente no arquivo: {reference_date.date()}")
+    # Converte apenas a coluna Data para datetime, para filtrar por mês antes das demais transformações
+    order_dates = pd.to_datetime(df["Data"], errors="coerce")
 
-        # Calcular início do mês atual (mês da data de referência)
-        current_month_start = reference_date.replace(
+    # Pega a data mais recente no arquivo para determinar o mês não concluído
+    max_date_in_file = order_dates.max()
+
+    if pd.isna(max_date_in_file):
+        raise ValueError(
+            "Não foi possível determinar a data mais recente no arquivo."
+        )
+
+    # Converte para datetime do Python
+    reference_date = pd.to_datetime(max_date_in_file).to_pydatetime()
+
+    logger.info(f"Data mais recente no arquivo: {reference_date.date()}")
+
+    # Calcular início do mês atual (mês da data de referência)
+    current_month_start = reference_date.replace(
+        day=1,
+        hour=0,
+        minute=0,
+        second=0,
+        microsecond=0,
+    )
+
+    # Calcular início do próximo mês
+    if reference_date.month == 12:
+        next_month_start = reference_date.replace(
+            year=reference_date.year + 1,
+            month=1,
             day=1,
             hour=0,
             minute=0,
             second=0,
             microsecond=0,
         )
-
-        # Calcular início do próximo mês
-        if reference_date.month == 12:
-            next_month_start = reference_date.replace(
-                year=reference_date.year + 1,
-                month=1,
-                day=1,
-                hour=0,
-                minute=0,
-                second=0,
-                microsecond=0,
-            )
-        else:
-            next_month_start = reference_date.replace(
-                month=reference_date.month + 1,
-                day=1,
-                hour=0,
-                minute=0,
-                second=0,
-                microsecond=0,
-            )
-
-        # Filtra o DataFrame para incluir apenas registros do mês não concluído
-        # ANTES de fazer outras transformações
-        df = df[
-            (df["Data"] >= current_month_start)
-            & (df["Data"] < next_month_start)
-        ]
-
-        logger.info(
-            f"Filtrando dados para o período não concluído: {current_month_start.date()} a {next_month_start.date()} ({len(df)} registros)"
+    else:
+        next_month_start = reference_date.replace(
+            month=reference_date.month + 1,
+            day=1,
+            hour=0,
+            minute=0,
+            second=0,
+            microsecond=0,
         )
 
-        # Aplica transformações de dados
-        for file_col, db_col in column_mapping.items():
-            if file_col in df.columns:
-                # Remove R$, pontos como separadores de milhar e substitui vírgulas por pontos em colunas numéricas
-                if db_col in ["volume", "receita_a_dividir"]:
-                    df[file_col] = (
-                        df[file_col]
-                        .astype(str)
-                        .str.replace("R$", "", regex=False)
-                        .str.replace(".", "", regex=False)
-                        .str.replace(",", ".", regex=False)
-                    )
-                    df[file_col] = pd.to_numeric(df[file_col], errors="coerce")
-                elif db_col in ["codigo_cliente", "quantidade"]:
-                    df[file_col] = pd.to_numeric(
+    # Filtra o DataFrame para incluir apenas registros do mês não concluído
+    # ANTES de fazer outras transformações (datas inválidas também ficam de fora)
+    in_month = (order_dates >= current_month_start) & (
+        order_dates < next_month_start
+    )
+    df = df[in_month]
+    df["Data"] = order_dates[in_month]
+
+    logger.info(
+        f"Filtrando dados para o período não concluído: {current_month_start.date()} a {next_month_start.date()} ({len(df)} registros)"
+    )
+
+    # Aplica transformações de dados
+    for file_col, db_col in column_mapping.items():
+        if file_col in df.columns:
+            # Converte valores em reais ("R$ 1.234,56") para número
+            if db_col in ["volume", "receita_a_dividir"]:
+                df[file_col] = parse_br_numbers(df[file_col])
+            # Converte o código do assessor para a chave canônica ("A1234")
+            elif db_col == "codigo_assessor":
+                df[file_col] = normalize_assessor_codes(df[file_col])
+            elif db_col in ["codigo_cliente", "quantidade"]:
+                df[file_col] = to_integer(df[file_col])
+            elif db_col in ["data_ordem", "data_vencimento"]:
+                # Data já foi convertida, apenas converter para date
+                if db_col == "data_ordem":
+                    df[file_col] = df[file_col].dt.date
+                else:
+                    df[file_col] = pd.to_datetime(
                         df[file_col], errors="coerce"
-                    ).astype("Int64")
-                elif db_col in ["data_ordem", "data_vencimento"]:
-                    # Data já foi convertida, apenas converter para date
-                    if db_col == "data_ordem":
-                        df[file_col] = df[file_col].dt.date
-                    else:
-                        df[file_col] = pd.to_datetime(
-                            df[file_col], errors="coerce"
-                        ).dt.date
-                elif db_col in ["taxa_cliente", "taxa_tmr"]:
-                    # remove % e converte para numerico
-                    df[file_col] = (
-                        df[file_col]
-                        .astype(str)
-                        .str.replace("%", "", regex=False)
-                        .str.replace(".", "", regex=False)
-                        .str.replace(",", ".", regex=False)
-                    )
-                    df[file_col] = pd.to_numeric(df[file_col], errors="coerce")
-                    df[file_col] = (
-                        df[file_col] / 100.0
-                    )  # Converte para decimal
-
-        # Renomeia colunas para corresponder ao esquema do banco de dados
-        df = df.rename(columns=column_mapping)
-
-        # Cria tabela se não existir
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS tb_ordens_rf (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data_ordem TEXT,
-            codigo_assessor TEXT,
-            codigo_cliente INTEGER,
-            tipo_ativo TEXT,
-            ticker TEXT,
-            nome_papel TEXT,
-            indexador TEXT,
-            data_vencimento TEXT,
-            tipo_operacao TEXT,
-            quantidade INTEGER,
-            volume REAL,
-            receita_a_dividir REAL,
-            pu_cliente REAL,
-            pu_tmr REAL,
-            taxa_cliente REAL,
-            taxa_tmr REAL
-        )
-        """
-        cursor.execute(create_table_query)
-        conn.commit()
-        logger.info("Tabela tb_ordens_rf criada/verificada com sucesso.")
+                    ).dt.date
+            elif db_col in ["taxa_cliente", "taxa_tmr"]:
+                # Converte percentuais ("12,50%") para decimal
+                df[file_col] = parse_br_numbers(df[file_col], percent=True)
+
+    # Renomeia colunas para corresponder ao esquema do banco de dados
+    df = df.rename(columns=column_mapping)
+
+    return df, reference_date
+
+
+def create_table(cursor, conn):
+    """Cria a tabela tb_ordens_rf se não existir."""
+    create_table_query = """
+    CREATE TABLE IF NOT EXISTS tb_ordens_rf (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data_ordem TEXT,
+        codigo_assessor TEXT,
+        codigo_cliente INTEGER,
+        tipo_ativo TEXT,
+        ticker TEXT,
+        nome_papel TEXT,
+        indexador TEXT,
+        data_vencimento TEXT,
+        tipo_operacao TEXT,
+        quantidade INTEGER,
+        volume REAL,
+        receita_a_dividir REAL,
+        pu_cliente REAL,
+        pu_tmr REAL,
+        taxa_cliente REAL,
+        taxa_tmr REAL
+    )
+    """
+    cursor.execute(create_table_query)
+    conn.commit()
+    logger.info("Tabela tb_ordens_rf criada/verificada com sucesso.")
+
+
+def stage_data(conn, df):
+    """Grava os registros do DataFrame transformado na tabela temporária de carga de tb_ordens_rf. Retorna o nome da tabela temporária e as colunas carregadas."""
+    columns = [
+        db_col
+        for db_col in OrdensRFConfig.COLUMN_MAPPING.values()
+        if db_col in df.columns
+    ]
+
+    return load_staging(conn, "tb_ordens_rf", df, columns), columns
+
+
+def write_data(cursor, conn, df, reference_date, metrics=None):
+    """Grava os dados transformados: cria a tabela, limpa o mês não concluído e insere os registros."""
+    metrics = metrics or RunMetrics("tb_ordens_rf")
+    try:
+        create_table(cursor, conn)
 
-        # Limpa apenas os dados do mês não concluído antes de inserir novos dados
-        if not delete_non_finished_data(cursor, conn, reference_date):
-            return False
+        # Grava os registros na tabela temporária, sem bloquear os leitores
+        with metrics.stage("staging") as stage:
+            staging_table, columns = stage_data(conn, df)
+            stage.rows = len(df)
 
-        # Prepara dados para inserção
-        records_inserted = 0
-        for _, row in df.iterrows():
-            values = []
-            columns = []
-            placeholders = []
-
-            # Adiciona todas as colunas mapeadas (usando os NOVOS nomes de coluna após renomear)
-            for db_col in column_mapping.values():
-                if db_col in df.columns:
-                    columns.append(db_col)
-                    placeholders.append("?")
-                    value = row[db_col]
-
-                    # Converte pandas Timestamp para string devido a limitações do SQLite
-                    if pd.isna(value):
-                        values.append(None)
-                    elif isinstance(value, (pd.Timestamp, datetime.datetime)):
-                        values.append(value.strftime("%Y-%m-%d %H:%M:%S"))
-                    elif isinstance(value, datetime.date):
-                        # Converte date para string no formato YYYY-MM-DD
-                        values.append(value.strftime("%Y-%m-%d"))
-                    else:
-                        values.append(value)
-
-            if columns:
-                insert_query = f"""
-                INSERT INTO tb_ordens_rf ({", ".join(columns)})
-                VALUES ({", ".join(placeholders)})
-                """
-                cursor.execute(insert_query, values)
-                records_inserted += 1
+        # Substitui o mês não concluído em uma única transação curta
+        with metrics.stage("swap") as stage:
+            records_inserted = replace_month_data(
+                cursor, conn, reference_date, staging_table, columns
+            )
+            stage.success = records_inserted is not None
+            stage.rows = records_inserted
+        if not stage.success:
+            return False
 
-        conn.commit()
         logger.info(
             f"Processamento do relatório de ordens renda fixa concluído: {records_inserted} registros inseridos."
         )
         return True
 
     except Exception as e:
-        logger.error(f"Erro ao processar relatório de ordens renda fixa: {e}")
+        logger.error(f"Erro ao gravar relatório de ordens renda fixa: {e}")
         conn.rollback()
         return False
 
 
+def process_ordens_rf(cursor, conn, df, file_modified_time, metrics=None):
+    """Processa dados do arquivo ordens_rf.xlsx."""
+    metrics = metrics or RunMetrics("tb_ordens_rf")
+    try:
+        with metrics.stage("transform") as stage, allocation_snapshot(
+            "tb_ordens_rf_transform"
+        ):
+            df, reference_date = transform_data(df)
+            stage.rows = len(df)
+    except Exception as e:
+        logger.error(f"Erro ao processar relatório de ordens renda fixa: {e}")
+        return False
+
+    return write_data(cursor, conn, df, reference_date, metrics=metrics)
+
+
 def load_excel_file(file_path):
     """Carrega arquivo Excel e retorna DataFrame."""
     try:
-        df = pd.read_excel(file_path)
+        df = read_excel_report(
+            file_path,
+            OrdensRFConfig.COLUMN_MAPPING,
+            OrdensRFConfig.CATEGORY_COLUMNS,
+        )
         logger.info(
             f"Arquivo Excel carregado com sucesso: {file_path} ({len(df)} linhas)"
         )
@@ -489,17 +510,26 @@ def process_file(
     table_name,
     file_path,
     file_modified_time,
+    metrics=None,
 ):
     """Processa um único arquivo com base em seu tipo."""
     try:
+        metrics = metrics or RunMetrics(table_name, file_path.name)
+
         # Carrega o arquivo Excel
-        df = load_excel_file(file_path)
+        with metrics.stage("read") as stage:
+            df = load_excel_file(file_path)
+            stage.success = df is not None
+            if stage.success:
+                stage.rows = len(df)
         if df is None:
             return False
 
         # Processa com base no tipo de arquivo
         if file_name == "ordens_rf.xlsx":
-            return process_ordens_rf(cursor, conn, df, file_modified_time)
+            return process_ordens_rf(
+                cursor, conn, df, file_modified_time, metrics=metrics
+            )
         else:
             logger.warning(f"Tipo de arquivo não reconhecido: {file_name}")
             return False
@@ -509,6 +539,61 @@ def process_file(
         return False
 
 
+def process_path(cursor, conn, file_path, file_name, table_name):
+    """Carrega um arquivo do relatório se ele ainda não foi processado (ou foi modificado), registrando o rastreamento e as métricas da carga. Retorna True se o arquivo foi carregado."""
+    # Verifica data de modificação
+    current_modified_time = get_file_last_modified(file_path)
+    if current_modified_time is None:
+        logger.error(
+            f"Não foi possível obter timestamp do arquivo {file_path}"
+        )
+        return False
+
+    # Interpreta o nome do arquivo para obter data_dados
+    data_dados = OrdensRFConfig.interpret_file_name(file_path.name)
+
+    # Verifica se o arquivo precisa ser processado
+    if not should_process_file(
+        cursor,
+        file_path.name,
+        table_name,
+        current_modified_time,
+        data_dados,
+    ):
+        return False
+
+    logger.info(f"Processando arquivo modificado: {file_path}")
+
+    # Processa o arquivo medindo cada etapa
+    metrics = RunMetrics(table_name, file_path.name)
+    processed = process_file(
+        cursor,
+        conn,
+        file_name,
+        table_name,
+        file_path,
+        current_modified_time,
+        metrics=metrics,
+    )
+    if processed:
+        # Atualiza rastreamento
+        with metrics.stage("tracking"):
+            update_file_tracking(
+                cursor,
+                conn,
+                file_path.name,
+                table_name,
+                current_modified_time,
+            )
+        logger.info(f"Arquivo {file_path.name} processado com sucesso.")
+    else:
+        logger.error(f"Falha ao processar arquivo {file_path.name}")
+
+    # Registra as métricas da carga em tb_execucoes
+    metrics.save(conn)
+    return processed
+
+
 def main():
     """Função principal de execução."""
     try:
@@ -546,54 +631,14 @@ def main():
 
                 logger.info(f"Arquivo encontrado: {file_path.name}")
 
-                # Verifica data de modificação
-                current_modified_time = get_file_last_modified(file_path)
-                if current_modified_time is None:
-                    logger.error(
-                        f"Não foi possível obter timestamp do arquivo {file_path}"
-                    )
-                    continue
-
-                # Interpreta o nome do arquivo para obter data_dados
-                data_dados = OrdensRFConfig.interpret_file_name(file_path.name)
-
-                # Verifica se o arquivo precisa ser processado
-                if not should_process_file(
-                    cursor,
-                    file_path.name,
-                    table_name,
-                    current_modified_time,
-                    data_dados,
-                ):
-                    continue
-
-                logger.info(f"Processando arquivo modificado: {file_path}")
-
-                # Processa o arquivo
-                if process_file(
-                    cursor,
-                    conn,
-                    file_name,
-                    table_name,
-                    file_path,
-                    current_modified_time,
+                if process_path(
+                    cursor, conn, file_path, file_name, table_name
                 ):
-                    # Atualiza rastreamento
-                    update_file_tracking(
-                        cursor,
-                        conn,
-                        file_path.name,
-                        table_name,
-                        current_modified_time,
-                    )
                     processed_count += 1
-                    logger.info(
-                        f"Arquivo {file_path.name} processado com sucesso."
-                    )
-                else:
-                    logger.error(
-                        f"Falha ao processar arquivo {file_path.name}"
-                    )
+
+            if processed_count > 0:
+                # Atualiza os agregados consumidos pelos dashboards
+                run_post_ingestion(conn)
 
             logger.info(
                 f"Processamento concluído. {processed_count} arquivos processados."
@@ -605,4 +650,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, "tb_ordens_rf")
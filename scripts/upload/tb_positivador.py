@@ -1,12 +1,24 @@
 import os
 import pandas as pd
 from pathlib import Path
-import sqlite3
 import logging
 from dotenv import load_dotenv
 import datetime
 from contextlib import contextmanager
 import glob
+import sys
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.assessor import normalize_assessor_codes
+from utils.client_month import refresh_client_month
+from utils.connection import connect_writer
+from utils.dtypes import is_datetime_column, read_excel_report, to_integer
+from utils.metrics import RunMetrics
+from utils.post_ingestion import run_post_ingestion
+from utils.profiling import allocation_snapshot, run_main
+from utils.staging import load_staging, swap_month
+from utils.sql_trace import log_trace_report
 
 # Configurar logging
 logging.basicConfig(
@@ -35,7 +47,7 @@ def get_database_connection():
 
     conn = None
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect_writer(db_path)
         logger.info(
             f"Conexão com o banco de dados SQLite estabelecida: {db_path}"
         )
@@ -45,6 +57,7 @@ def get_database_connection():
         raise
     finally:
         if conn:
+            log_trace_report(conn)
             conn.close()
             logger.info("Conexão com banco de dados fechada.")
 
@@ -66,6 +79,68 @@ class PositivadorConfig:
 
     FILE_TO_DB_MAPPING = {"positivador.xlsx": "tb_positivador"}
 
+    COLUMN_MAPPING = {
+        "Assessor": "codigo_assessor",
+        "Cliente": "codigo_cliente",
+        "Profissão": "profissao",
+        "Sexo": "sexo",
+        "Segmento": "segmento",
+        "Data de Cadastro": "data_cadastro",
+        "Fez Segundo Aporte?": "fez_segundo_aporte",
+        "Data de Nascimento": "data_nascimento",
+        "Status": "status",
+        "Ativou em M?": "ativou_em_m",
+        "Evadiu em M?": "evadiu_em_m",
+        "Operou Bolsa?": "operou_bolsa",
+        "Operou Fundo?": "operou_fundo",
+        "Operou Renda Fixa?": "operou_renda_fixa",
+        "Aplicação Financeira Declarada Ajustada": "aplicacao_financeira_declarada_ajustada",
+        "Receita no Mês": "receita_no_mes",
+        "Receita Bovespa": "receita_bovespa",
+        "Receita Futuros": "receita_futuros",
+        "Receita RF Bancários": "receita_rf_bancarios",
+        "Receita RF Privados": "receita_rf_privados",
+        "Receita RF Públicos": "receita_rf_publicos",
+        "Captação Bruta em M": "captacao_bruta_em_m",
+        "Resgate em M": "resgate_em_m",
+        "Captação Líquida em M": "captacao_liquida_em_m",
+        "Captação TED": "captacao_ted",
+        "Captação ST": "captacao_st",
+        "Captação OTA": "captacao_ota",
+        "Captação RF": "captacao_rf",
+        "Captação TD": "captacao_td",
+        "Captação PREV": "captacao_prev",
+        "Net em M 1": "net_em_m_1",
+        "Net Em M": "net_em_m",
+        "Net Renda Fixa": "net_renda_fixa",
+        "Net Fundos Imobiliários": "net_fundos_imobiliarios",
+        "Net Renda Variável": "net_renda_variavel",
+        "Net Fundos": "net_fundos",
+        "Net Financeiro": "net_financeiro",
+        "Net Previdência": "net_previdencia",
+        "Net Outros": "net_outros",
+        "Receita Aluguel": "receita_aluguel",
+        "Receita Complemento Pacote Corretagem": "receita_complemento_pacote_corretagem",
+        "Tipo Pessoa": "tipo_pessoa",
+        "Data Posição": "data_posicao",
+        "Data Atualização": "data_atualizacao",
+    }
+
+    # Colunas de baixa cardinalidade lidas diretamente como category
+    CATEGORY_COLUMNS = [
+        "Profissão",
+        "Sexo",
+        "Segmento",
+        "Fez Segundo Aporte?",
+        "Status",
+        "Ativou em M?",
+        "Evadiu em M?",
+        "Operou Bolsa?",
+        "Operou Fundo?",
+        "Operou Renda Fixa?",
+        "Tipo Pessoa",
+    ]
+
     @staticmethod
     def get_input_folder():
         """Obtém o caminho da pasta de entrada com lógica de fallback."""
@@ -207,8 +282,8 @@ def get_identity_column(cursor, table_name):
         return None
 
 
-def delete_non_finished_data(cursor, conn, data_dados):
-    """Se data dos dados for diferente do fechamento do mês atual, substituímos os dados do mês atual. Como os relatórios são extraídos em D+2, pode acontecer de no começo do mês termos dados do mês anterior, especificamente se estivermos nos primeiros dois dias úteis do mês. Nesse caso, continuamos atualizando o mês anterior. Uma vez que os dados do mês anterior são finalizados, começamos anexando os dados do mês atual e assim sucessivamente."""
+def replace_month_data(cursor, conn, data_dados, staging_table, columns):
+    """Se data dos dados for diferente do fechamento do mês atual, substituímos os dados do mês atual. Como os relatórios são extraídos em D+2, pode acontecer de no começo do mês termos dados do mês anterior, especificamente se estivermos nos primeiros dois dias úteis do mês. Nesse caso, continuamos atualizando o mês anterior. Uma vez que os dados do mês anterior são finalizados, começamos anexando os dados do mês atual e assim sucessivamente. Os registros do mês são substituídos pelos da tabela temporária de carga em uma única transação. Retorna a quantidade de registros inseridos, ou None em caso de erro."""
     try:
         # Usando data_dados para determinar qual mês excluir
         if data_dados is None:
@@ -250,262 +325,237 @@ def delete_non_finished_data(cursor, conn, data_dados):
                 microsecond=0,
             )
 
-        delete_query = """
-            DELETE FROM tb_positivador 
-            WHERE data_posicao >= ? AND data_posicao < ?
-        """
-
         # Converter datetime para string format para comparação no SQLite
         month_start_str = month_start.strftime("%Y-%m-%d %H:%M:%S")
         next_month_str = next_month.strftime("%Y-%m-%d %H:%M:%S")
 
         logger.info(
-            f"Tentando deletar registros entre {month_start_str} e {next_month_str}"
+            f"Substituindo registros entre {month_start_str} e {next_month_str}"
         )
 
-        cursor.execute(delete_query, (month_start_str, next_month_str))
-        deleted_count = cursor.rowcount
-        conn.commit()
+        deleted_count, inserted_count = swap_month(
+            conn,
+            "tb_positivador",
+            "data_posicao",
+            month_start_str,
+            next_month_str,
+            staging_table,
+            columns,
+            after_swap=refresh_client_month,
+        )
 
         logger.info(
-            f"Removidos {deleted_count:,} registros do mês {data_date.strftime('%Y-%m')} da tabela no banco de dados."
+            f"Removidos {deleted_count:,} registros do mês {data_date.strftime('%Y-%m')} e inseridos {inserted_count:,} na tabela no banco de dados."
         )
-        return True
+        return inserted_count
 
     except Exception as e:
-        logger.error(f"Erro ao remover dados não concluídos: {e}")
-        return False
-        return False
+        logger.error(f"Erro ao substituir dados não concluídos: {e}")
+        return None
 
 
-def process_positivador(cursor, conn, df, file_modified_time, data_dados=None):
-    """Processa dados do arquivo positivador.xlsx."""
+def transform_data(df, data_dados=None):
+    """Aplica as transformações de dados do relatório positivador e renomeia as colunas para o esquema do banco de dados. Retorna o DataFrame transformado e a data de referência do mês a ser substituído (a data dos dados)."""
+    column_mapping = PositivadorConfig.COLUMN_MAPPING
+
+    # Aplica transformações de dados
+    for file_col, db_col in column_mapping.items():
+        if file_col in df.columns:
+            if db_col in [
+                "aplicacao_financeira_declarada_ajustada",
+                "receita_no_mes",
+                "receita_bovespa",
+                "receita_futuros",
+                "receita_rf_bancarios",
+                "receita_rf_privados",
+                "receita_rf_publicos",
+                "captacao_bruta_em_m",
+                "resgate_em_m",
+                "captacao_liquida_em_m",
+                "captacao_ted",
+                "captacao_st",
+                "captacao_ota",
+                "captacao_rf",
+                "captacao_td",
+                "captacao_prev",
+                "net_em_m_1",
+                "net_em_m",
+                "net_renda_fixa",
+                "net_fundos_imobiliarios",
+                "net_renda_variavel",
+                "net_fundos",
+                "net_financeiro",
+                "net_previdencia",
+                "net_outros",
+                "receita_aluguel",
+                "receita_complemento_pacote_corretagem",
+            ]:
+                df[file_col] = pd.to_numeric(df[file_col], errors="coerce")
+            elif db_col == "codigo_cliente":
+                df[file_col] = to_integer(df[file_col])
+            # Converte o código do assessor para a chave canônica ("A1234")
+            elif db_col == "codigo_assessor":
+                df[file_col] = normalize_assessor_codes(df[file_col])
+            elif db_col in [
+                "data_cadastro",
+                "data_nascimento",
+                "data_posicao",
+                "data_atualizacao",
+            ]:
+                # Datas já reconhecidas pelo Excel permanecem em datetime64
+                if is_datetime_column(df[file_col]):
+                    continue
+
+                # Converte data serial do Excel para datetime
+                def convert_excel_date(value):
+                    if pd.isna(value):
+                        return None
+                    try:
+                        if isinstance(value, (int, float)):
+                            # Época do Excel é 1899-12-31, adiciona o número serial como dias
+                            excel_epoch = datetime.datetime(1899, 12, 31)
+                            return excel_epoch + datetime.timedelta(days=value)
+                        else:
+                            # Se já é datetime ou string, tenta fazer parse (Brazilian format DD/MM/YYYY)
+                            return pd.to_datetime(
+                                value, errors="coerce", dayfirst=True
+                            )
+                    except Exception:
+                        return None
+
+                df[file_col] = df[file_col].apply(convert_excel_date)
+
+    # Renomeia colunas para corresponder ao esquema do banco de dados
+    df = df.rename(columns=column_mapping)
+
+    return df, data_dados
+
+
+def create_table(cursor, conn):
+    """Cria a tabela tb_positivador se não existir."""
+    create_table_query = """
+    CREATE TABLE IF NOT EXISTS tb_positivador (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        codigo_assessor TEXT,
+        codigo_cliente INTEGER,
+        profissao TEXT,
+        sexo TEXT,
+        segmento TEXT,
+        data_cadastro TEXT,
+        fez_segundo_aporte TEXT,
+        data_nascimento TEXT,
+        status TEXT,
+        ativou_em_m TEXT,
+        evadiu_em_m TEXT,
+        operou_bolsa TEXT,
+        operou_fundo TEXT,
+        operou_renda_fixa TEXT,
+        aplicacao_financeira_declarada_ajustada REAL,
+        receita_no_mes REAL,
+        receita_bovespa REAL,
+        receita_futuros REAL,
+        receita_rf_bancarios REAL,
+        receita_rf_privados REAL,
+        receita_rf_publicos REAL,
+        captacao_bruta_em_m REAL,
+        resgate_em_m REAL,
+        captacao_liquida_em_m REAL,
+        captacao_ted REAL,
+        captacao_st REAL,
+        captacao_ota REAL,
+        captacao_rf REAL,
+        captacao_td REAL,
+        captacao_prev REAL,
+        net_em_m_1 REAL,
+        net_em_m REAL,
+        net_renda_fixa REAL,
+        net_fundos_imobiliarios REAL,
+        net_renda_variavel REAL,
+        net_fundos REAL,
+        net_financeiro REAL,
+        net_previdencia REAL,
+        net_outros REAL,
+        receita_aluguel REAL,
+        receita_complemento_pacote_corretagem REAL,
+        tipo_pessoa TEXT,
+        data_posicao TEXT,
+        data_atualizacao TEXT
+    )
+    """
+    cursor.execute(create_table_query)
+    conn.commit()
+    logger.info("Tabela tb_positivador criada/verificada com sucesso.")
+
+
+def stage_data(conn, df):
+    """Grava os registros do DataFrame transformado na tabela temporária de carga de tb_positivador. Retorna o nome da tabela temporária e as colunas carregadas."""
+    columns = [
+        db_col
+        for db_col in PositivadorConfig.COLUMN_MAPPING.values()
+        if db_col in df.columns
+    ]
+
+    return load_staging(conn, "tb_positivador", df, columns), columns
+
+
+def write_data(cursor, conn, df, reference_date, metrics=None):
+    """Grava os dados transformados: cria a tabela, limpa o mês não concluído e insere os registros."""
+    metrics = metrics or RunMetrics("tb_positivador")
     try:
-        column_mapping = {
-            "Assessor": "codigo_assessor",
-            "Cliente": "codigo_cliente",
-            "Profissão": "profissao",
-            "Sexo": "sexo",
-            "Segmento": "segmento",
-            "Data de Cadastro": "data_cadastro",
-            "Fez Segundo Aporte?": "fez_segundo_aporte",
-            "Data de Nascimento": "data_nascimento",
-            "Status": "status",
-            "Ativou em M?": "ativou_em_m",
-            "Evadiu em M?": "evadiu_em_m",
-            "Operou Bolsa?": "operou_bolsa",
-            "Operou Fundo?": "operou_fundo",
-            "Operou Renda Fixa?": "operou_renda_fixa",
-            "Aplicação Financeira Declarada Ajustada": "aplicacao_financeira_declarada_ajustada",
-            "Receita no Mês": "receita_no_mes",
-            "Receita Bovespa": "receita_bovespa",
-            "Receita Futuros": "receita_futuros",
-            "Receita RF Bancários": "receita_rf_bancarios",
-            "Receita RF Privados": "receita_rf_privados",
-            "Receita RF Públicos": "receita_rf_publicos",
-            "Captação Bruta em M": "captacao_bruta_em_m",
-            "Resgate em M": "resgate_em_m",
-            "Captação Líquida em M": "captacao_liquida_em_m",
-            "Captação TED": "captacao_ted",
-            "Captação ST": "captacao_st",
-            "Captação OTA": "captacao_ota",
-            "Captação RF": "captacao_rf",
-            "Captação TD": "captacao_td",
-            "Captação PREV": "captacao_prev",
-            "Net em M 1": "net_em_m_1",
-            "Net Em M": "net_em_m",
-            "Net Renda Fixa": "net_renda_fixa",
-            "Net Fundos Imobiliários": "net_fundos_imobiliarios",
-            "Net Renda Variável": "net_renda_variavel",
-            "Net Fundos": "net_fundos",
-            "Net Financeiro": "net_financeiro",
-            "Net Previdência": "net_previdencia",
-            "Net Outros": "net_outros",
-            "Receita Aluguel": "receita_aluguel",
-            "Receita Complemento Pacote Corretagem": "receita_complemento_pacote_corretagem",
-            "Tipo Pessoa": "tipo_pessoa",
-            "Data Posição": "data_posicao",
-            "Data Atualização": "data_atualizacao",
-        }
-
-        # Aplica transformações de dados
-        for file_col, db_col in column_mapping.items():
-            if file_col in df.columns:
-                if db_col in [
-                    "aplicacao_financeira_declarada_ajustada",
-                    "receita_no_mes",
-                    "receita_bovespa",
-                    "receita_futuros",
-                    "receita_rf_bancarios",
-                    "receita_rf_privados",
-                    "receita_rf_publicos",
-                    "captacao_bruta_em_m",
-                    "resgate_em_m",
-                    "captacao_liquida_em_m",
-                    "captacao_ted",
-                    "captacao_st",
-                    "captacao_ota",
-                    "captacao_rf",
-                    "captacao_td",
-                    "captacao_prev",
-                    "net_em_m_1",
-                    "net_em_m",
-                    "net_renda_fixa",
-                    "net_fundos_imobiliarios",
-                    "net_renda_variavel",
-                    "net_fundos",
-                    "net_financeiro",
-                    "net_previdencia",
-                    "net_outros",
-                    "receita_aluguel",
-                    "receita_complemento_pacote_corretagem",
-                ]:
-                    df[file_col] = pd.to_numeric(df[file_col], errors="coerce")
-                elif db_col == "codigo_cliente":
-                    df[file_col] = pd.to_numeric(
-                        df[file_col], errors="coerce"
-                    ).astype("Int64")
-                # Converte Código Assessor para string e prefixa com 'A'
-                elif db_col == "codigo_assessor":
-                    df[file_col] = (
-                        df[file_col]
-                        .astype(str)
-                        .apply(lambda x: f"A{x}" if pd.notnull(x) else x)
-                    )
-                elif db_col in [
-                    "data_cadastro",
-                    "data_nascimento",
-                    "data_posicao",
-                    "data_atualizacao",
-                ]:
-                    # Converte data serial do Excel para datetime
-                    def convert_excel_date(value):
-                        if pd.isna(value):
-                            return None
-                        try:
-                            if isinstance(value, (int, float)):
-                                # Época do Excel é 1899-12-31, adiciona o número serial como dias
-                                excel_epoch = datetime.datetime(1899, 12, 31)
-                                return excel_epoch + datetime.timedelta(
-                                    days=value
-                                )
-                            else:
-                                # Se já é datetime ou string, tenta fazer parse (Brazilian format DD/MM/YYYY)
-                                return pd.to_datetime(
-                                    value, errors="coerce", dayfirst=True
-                                )
-                        except Exception:
-                            return None
-
-                    df[file_col] = df[file_col].apply(convert_excel_date)
-
-        # Renomeia colunas para corresponder ao esquema do banco de dados
-        df = df.rename(columns=column_mapping)
-
-        # Cria tabela se não existir
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS tb_positivador (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            codigo_assessor TEXT,
-            codigo_cliente INTEGER,
-            profissao TEXT,
-            sexo TEXT,
-            segmento TEXT,
-            data_cadastro TEXT,
-            fez_segundo_aporte TEXT,
-            data_nascimento TEXT,
-            status TEXT,
-            ativou_em_m TEXT,
-            evadiu_em_m TEXT,
-            operou_bolsa TEXT,
-            operou_fundo TEXT,
-            operou_renda_fixa TEXT,
-            aplicacao_financeira_declarada_ajustada REAL,
-            receita_no_mes REAL,
-            receita_bovespa REAL,
-            receita_futuros REAL,
-            receita_rf_bancarios REAL,
-            receita_rf_privados REAL,
-            receita_rf_publicos REAL,
-            captacao_bruta_em_m REAL,
-            resgate_em_m REAL,
-            captacao_liquida_em_m REAL,
-            captacao_ted REAL,
-            captacao_st REAL,
-            captacao_ota REAL,
-            captacao_rf REAL,
-            captacao_td REAL,
-            captacao_prev REAL,
-            net_em_m_1 REAL,
-            net_em_m REAL,
-            net_renda_fixa REAL,
-            net_fundos_imobiliarios REAL,
-            net_renda_variavel REAL,
-            net_fundos REAL,
-            net_financeiro REAL,
-            net_previdencia REAL,
-            net_outros REAL,
-            receita_aluguel REAL,
-            receita_complemento_pacote_corretagem REAL,
-            tipo_pessoa TEXT,
-            data_posicao TEXT,
-            data_atualizacao TEXT
-        )
-        """
-        cursor.execute(create_table_query)
-        conn.commit()
-        logger.info("Tabela tb_positivador criada/verificada com sucesso.")
+        create_table(cursor, conn)
 
-        # Limpa apenas os dados do mês atual antes de inserir novos dados
-        if not delete_non_finished_data(cursor, conn, data_dados):
-            return False
+        # Grava os registros na tabela temporária, sem bloquear os leitores
+        with metrics.stage("staging") as stage:
+            staging_table, columns = stage_data(conn, df)
+            stage.rows = len(df)
 
-        # Prepara dados para inserção
-        records_inserted = 0
-        for _, row in df.iterrows():
-            values = []
-            columns = []
-            placeholders = []
-
-            # Adiciona todas as colunas mapeadas (usando os NOVOS nomes de coluna após renomear)
-            for db_col in column_mapping.values():
-                if db_col in df.columns:
-                    columns.append(db_col)
-                    placeholders.append("?")
-                    value = row[db_col]
-
-                    # Converte pandas Timestamp para string devido a limitações do SQLite
-                    if pd.isna(value):
-                        values.append(None)
-                    elif isinstance(value, (pd.Timestamp, datetime.datetime)):
-                        values.append(value.strftime("%Y-%m-%d %H:%M:%S"))
-                    else:
-                        values.append(value)
-
-            if columns:
-                insert_query = f"""
-                INSERT INTO tb_positivador ({", ".join(columns)})
-                VALUES ({", ".join(placeholders)})
-                """
-                cursor.execute(insert_query, values)
-                records_inserted += 1
+        # Substitui o mês não concluído em uma única transação curta
+        with metrics.stage("swap") as stage:
+            records_inserted = replace_month_data(
+                cursor, conn, reference_date, staging_table, columns
+            )
+            stage.success = records_inserted is not None
+            stage.rows = records_inserted
+        if not stage.success:
+            return False
 
-        conn.commit()
         logger.info(
             f"Processamento do relatório positivador concluído: {records_inserted} registros inseridos."
         )
         return True
 
     except Exception as e:
-        logger.error(f"Erro ao processar relatório positivador: {e}")
+        logger.error(f"Erro ao gravar relatório positivador: {e}")
         conn.rollback()
         return False
 
 
+def process_positivador(
+    cursor, conn, df, file_modified_time, data_dados=None, metrics=None
+):
+    """Processa dados do arquivo positivador.xlsx."""
+    metrics = metrics or RunMetrics("tb_positivador")
+    try:
+        with metrics.stage("transform") as stage, allocation_snapshot(
+            "tb_positivador_transform"
+        ):
+            df, reference_date = transform_data(df, data_dados)
+            stage.rows = len(df)
+    except Exception as e:
+        logger.error(f"Erro ao processar relatório positivador: {e}")
+        return False
+
+    return write_data(cursor, conn, df, reference_date, metrics=metrics)
+
+
 def load_excel_file(file_path):
     """Carrega arquivo Excel e retorna DataFrame."""
     try:
-        df = pd.read_excel(file_path)
+        df = read_excel_report(
+            file_path,
+            PositivadorConfig.COLUMN_MAPPING,
+            PositivadorConfig.CATEGORY_COLUMNS,
+        )
         logger.info(
             f"Arquivo Excel carregado com sucesso: {file_path} ({len(df)} linhas)"
         )
@@ -523,18 +573,30 @@ def process_file(
     file_path,
     file_modified_time,
     data_dados=None,
+    metrics=None,
 ):
     """Processa um único arquivo com base em seu tipo."""
     try:
+        metrics = metrics or RunMetrics(table_name, file_path.name)
+
         # Carrega o arquivo Excel
-        df = load_excel_file(file_path)
+        with metrics.stage("read") as stage:
+            df = load_excel_file(file_path)
+            stage.success = df is not None
+            if stage.success:
+                stage.rows = len(df)
         if df is None:
             return False
 
         # Processa com base no tipo de arquivo
         if file_name == "positivador.xlsx":
             return process_positivador(
-                cursor, conn, df, file_modified_time, data_dados
+                cursor,
+                conn,
+                df,
+                file_modified_time,
+                data_dados,
+                metrics=metrics,
             )
         else:
             logger.warning(f"Tipo de arquivo não reconhecido: {file_name}")
@@ -545,6 +607,62 @@ def process_file(
         return False
 
 
+def process_path(cursor, conn, file_path, file_name, table_name):
+    """Carrega um arquivo do relatório se ele ainda não foi processado (ou foi modificado), registrando o rastreamento e as métricas da carga. Retorna True se o arquivo foi carregado."""
+    # Verifica data de modificação
+    current_modified_time = get_file_last_modified(file_path)
+    if current_modified_time is None:
+        logger.error(
+            f"Não foi possível obter timestamp do arquivo {file_path}"
+        )
+        return False
+
+    # Interpreta o nome do arquivo para obter data_dados
+    data_dados = PositivadorConfig.interpret_file_name(file_path.name)
+
+    # Verifica se o arquivo precisa ser processado
+    if not should_process_file(
+        cursor,
+        file_path.name,
+        table_name,
+        current_modified_time,
+        data_dados,
+    ):
+        return False
+
+    logger.info(f"Processando arquivo modificado: {file_path}")
+
+    # Processa o arquivo medindo cada etapa
+    metrics = RunMetrics(table_name, file_path.name)
+    processed = process_file(
+        cursor,
+        conn,
+        file_name,
+        table_name,
+        file_path,
+        current_modified_time,
+        data_dados,
+        metrics=metrics,
+    )
+    if processed:
+        # Atualiza rastreamento
+        with metrics.stage("tracking"):
+            update_file_tracking(
+                cursor,
+                conn,
+                file_path.name,
+                table_name,
+                current_modified_time,
+            )
+        logger.info(f"Arquivo {file_path.name} processado com sucesso.")
+    else:
+        logger.error(f"Falha ao processar arquivo {file_path.name}")
+
+    # Registra as métricas da carga em tb_execucoes
+    metrics.save(conn)
+    return processed
+
+
 def main():
     """Função principal de execução."""
     try:
@@ -582,57 +700,14 @@ def main():
 
                 logger.info(f"Arquivo encontrado: {file_path.name}")
 
-                # Verifica data de modificação
-                current_modified_time = get_file_last_modified(file_path)
-                if current_modified_time is None:
-                    logger.error(
-                        f"Não foi possível obter timestamp do arquivo {file_path}"
-                    )
-                    continue
-
-                # Interpreta o nome do arquivo para obter data_dados
-                data_dados = PositivadorConfig.interpret_file_name(
-                    file_path.name
-                )
-
-                # Verifica se o arquivo precisa ser processado
-                if not should_process_file(
-                    cursor,
-                    file_path.name,
-                    table_name,
-                    current_modified_time,
-                    data_dados,
+                if process_path(
+                    cursor, conn, file_path, file_name, table_name
                 ):
-                    continue
-
-                logger.info(f"Processando arquivo modificado: {file_path}")
-
-                # Processa o arquivo
-                if process_file(
-                    cursor,
-                    conn,
-                    file_name,
-                    table_name,
-                    file_path,
-                    current_modified_time,
-                    data_dados,
-                ):
-                    # Atualiza rastreamento
-                    update_file_tracking(
-                        cursor,
-                        conn,
-                        file_path.name,
-                        table_name,
-                        current_modified_time,
-                    )
                     processed_count += 1
-                    logger.info(
-                        f"Arquivo {file_path.name} processado com sucesso."
-                    )
-                else:
-                    logger.error(
-                        f"Falha ao processar arquivo {file_path.name}"
-                    )
+
+            if processed_count > 0:
+                # Atualiza os agregados consumidos pelos dashboards
+                run_post_ingestion(conn)
 
             logger.info(
                 f"Processamento concluído. {processed_count} arquivos processados."
@@ -644,4 +719,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, "tb_positivador")
@@ -1,12 +1,24 @@
 import os
 import pandas as pd
 from pathlib import Path
-import sqlite3
 import logging
 from dotenv import load_dotenv
 import datetime
 from contextlib import contextmanager
 import glob
+import sys
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.assessor import normalize_assessor_codes
+from utils.client_month import refresh_client_month
+from utils.connection import connect_writer
+from utils.dtypes import read_excel_report, to_integer
+from utils.metrics import RunMetrics
+from utils.post_ingestion import run_post_ingestion
+from utils.profiling import allocation_snapshot, run_main
+from utils.staging import load_staging, swap_month
+from utils.sql_trace import log_trace_report
 
 # Configurar logging
 logging.basicConfig(
@@ -35,7 +47,7 @@ def get_database_connection():
 
     conn = None
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect_writer(db_path)
         logger.info(
             f"Conexão com o banco de dados SQLite estabelecida: {db_path}"
         )
@@ -45,6 +57,7 @@ def get_database_connection():
         raise
     finally:
         if conn:
+            log_trace_report(conn)
             conn.close()
             logger.info("Conexão com banco de dados fechada.")
 
@@ -66,6 +79,20 @@ class SaldoConfig:
 
     FILE_TO_DB_MAPPING = {"saldo.xlsx": "tb_saldo"}
 
+    COLUMN_MAPPING = {
+        "Conta": "codigo_cliente",
+        "Cliente": "nome_cliente",
+        "Assessor": "codigo_assessor",
+        "D0": "d0",
+        "D+1": "d1",
+        "D+2": "d2",
+        "D+3": "d3",
+        "Total": "saldo_total",
+    }
+
+    # Colunas de baixa cardinalidade lidas diretamente como category
+    CATEGORY_COLUMNS = []
+
     @staticmethod
     def get_input_folder():
         """Obtém o caminho da pasta de entrada com lógica de fallback."""
@@ -207,8 +234,8 @@ def get_identity_column(cursor, table_name):
         return None
 
 
-def delete_non_finished_data(cursor, conn, data_dados):
-    """Se data dos dados for diferente do fechamento do mês atual, substituímos os dados do mês atual. Como os relatórios são extraídos em D+2, pode acontecer de no começo do mês termos dados do mês anterior, especificamente se estivermos nos primeiros dois dias úteis do mês. Nesse caso, continuamos atualizando o mês anterior. Uma vez que os dados do mês anterior são finalizados, começamos anexando os dados do mês atual e assim sucessivamente."""
+def replace_month_data(cursor, conn, data_dados, staging_table, columns):
+    """Se data dos dados for diferente do fechamento do mês atual, substituímos os dados do mês atual. Como os relatórios são extraídos em D+2, pode acontecer de no começo do mês termos dados do mês anterior, especificamente se estivermos nos primeiros dois dias úteis do mês. Nesse caso, continuamos atualizando o mês anterior. Uma vez que os dados do mês anterior são finalizados, começamos anexando os dados do mês atual e assim sucessivamente. Os registros do mês são substituídos pelos da tabela temporária de carga em uma única transação. Retorna a quantidade de registros inseridos, ou None em caso de erro."""
     try:
         # Use data_dados to determine which month to delete
         if data_dados is None:
@@ -250,154 +277,164 @@ def delete_non_finished_data(cursor, conn, data_dados):
                 microsecond=0,
             )
 
-        delete_query = """
-            DELETE FROM tb_saldo 
-            WHERE data_saldo >= ? AND data_saldo < ?
-        """
-
         # Converte datetime para string para comparação no SQLite
         month_start_str = month_start.strftime("%Y-%m-%d %H:%M:%S")
         next_month_str = next_month.strftime("%Y-%m-%d %H:%M:%S")
 
-        cursor.execute(delete_query, (month_start_str, next_month_str))
-        deleted_count = cursor.rowcount
-        conn.commit()
+        logger.info(
+            f"Substituindo registros entre {month_start_str} e {next_month_str}"
+        )
+
+        deleted_count, inserted_count = swap_month(
+            conn,
+            "tb_saldo",
+            "data_saldo",
+            month_start_str,
+            next_month_str,
+            staging_table,
+            columns,
+            after_swap=refresh_client_month,
+        )
 
         logger.info(
-            f"Removidos {deleted_count:,} registros do mês {data_date.strftime('%Y-%m')} da tabela no banco de dados."
+            f"Removidos {deleted_count:,} registros do mês {data_date.strftime('%Y-%m')} e inseridos {inserted_count:,} na tabela no banco de dados."
         )
-        return True
+        return inserted_count
 
     except Exception as e:
-        logger.error(f"Erro ao remover dados não concluídos: {e}")
-        return False
+        logger.error(f"Erro ao substituir dados não concluídos: {e}")
+        return None
 
 
-def process_saldo(cursor, conn, df, file_modified_time, data_dados=None):
-    """Processa dados do arquivo saldo.xlsx."""
+def transform_data(df, data_dados=None):
+    """Aplica as transformações de dados do relatório de saldo e renomeia as colunas para o esquema do banco de dados. Retorna o DataFrame transformado e a data de referência do mês a ser substituído (a data dos dados)."""
+    column_mapping = SaldoConfig.COLUMN_MAPPING
+
+    # Aplica transformações de dados
+    for file_col, db_col in column_mapping.items():
+        if file_col in df.columns:
+            if db_col in [
+                "d0",
+                "d1",
+                "d2",
+                "d3",
+                "saldo_total",
+            ]:
+                df[file_col] = pd.to_numeric(df[file_col], errors="coerce")
+            elif db_col == "codigo_cliente":
+                df[file_col] = to_integer(df[file_col])
+            # Converte o código do assessor para a chave canônica ("A1234")
+            elif db_col == "codigo_assessor":
+                df[file_col] = normalize_assessor_codes(df[file_col])
+
+    # Renomeia colunas para corresponder ao esquema do banco de dados
+    df = df.rename(columns=column_mapping)
+
+    # Adiciona coluna data_saldo usando data_dados passado como parâmetro
+    # Converte data para string para SQLite
+    if data_dados:
+        data_saldo_str = data_dados.strftime("%Y-%m-%d")
+        logger.info(f"data_saldo será definido como: {data_saldo_str}")
+    else:
+        data_saldo_str = None
+        logger.warning("data_dados é None, data_saldo será NULL")
+    df["data_saldo"] = data_saldo_str
+
+    return df, data_dados
+
+
+def create_table(cursor, conn):
+    """Cria a tabela tb_saldo se não existir."""
+    create_table_query = """
+    CREATE TABLE IF NOT EXISTS tb_saldo (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        codigo_cliente INTEGER,
+        nome_cliente TEXT,
+        codigo_assessor TEXT,
+        d0 REAL,
+        d1 REAL,
+        d2 REAL,
+        d3 REAL,
+        saldo_total REAL,
+        data_saldo TEXT
+    )
+    """
+    cursor.execute(create_table_query)
+    conn.commit()
+    logger.info("Tabela tb_saldo criada/verificada com sucesso.")
+
+
+def stage_data(conn, df):
+    """Grava os registros do DataFrame transformado na tabela temporária de carga de tb_saldo. Retorna o nome da tabela temporária e as colunas carregadas."""
+    columns = [
+        db_col
+        for db_col in SaldoConfig.COLUMN_MAPPING.values()
+        if db_col in df.columns
+    ]
+
+    # Adiciona coluna data_saldo que não está no column_mapping
+    if "data_saldo" in df.columns:
+        columns.append("data_saldo")
+
+    return load_staging(conn, "tb_saldo", df, columns), columns
+
+
+def write_data(cursor, conn, df, reference_date, metrics=None):
+    """Grava os dados transformados: cria a tabela, limpa o mês não concluído e insere os registros."""
+    metrics = metrics or RunMetrics("tb_saldo")
     try:
-        column_mapping = {
-            "Conta": "codigo_cliente",
-            "Cliente": "nome_cliente",
-            "Assessor": "codigo_assessor",
-            "D0": "d0",
-            "D+1": "d1",
-            "D+2": "d2",
-            "D+3": "d3",
-            "Total": "saldo_total",
-        }
-
-        # Aplica transformações de dados
-        for file_col, db_col in column_mapping.items():
-            if file_col in df.columns:
-                if db_col in [
-                    "d0",
-                    "d1",
-                    "d2",
-                    "d3",
-                    "saldo_total",
-                ]:
-                    df[file_col] = pd.to_numeric(df[file_col], errors="coerce")
-                elif db_col == "codigo_cliente":
-                    df[file_col] = pd.to_numeric(
-                        df[file_col], errors="coerce"
-                    ).astype("Int64")
-                # Converte Código Assessor para string e prefixa com 'A'
-                elif db_col == "codigo_assessor":
-                    df[file_col] = (
-                        df[file_col]
-                        .astype(str)
-                        .apply(lambda x: f"A{x}" if pd.notnull(x) else x)
-                    )
+        create_table(cursor, conn)
 
-        # Renomeia colunas para corresponder ao esquema do banco de dados
-        df = df.rename(columns=column_mapping)
+        # Grava os registros na tabela temporária, sem bloquear os leitores
+        with metrics.stage("staging") as stage:
+            staging_table, columns = stage_data(conn, df)
+            stage.rows = len(df)
 
-        # Adiciona coluna data_saldo usando data_dados passado como parâmetro
-        # Converte data para string para SQLite
-        if data_dados:
-            data_saldo_str = data_dados.strftime("%Y-%m-%d")
-            logger.info(f"data_saldo será definido como: {data_saldo_str}")
-        else:
-            data_saldo_str = None
-            logger.warning("data_dados é None, data_saldo será NULL")
-        df["data_saldo"] = data_saldo_str
-
-        # Cria tabela se não existir
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS tb_saldo (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            codigo_cliente INTEGER,
-            nome_cliente TEXT,
-            codigo_assessor TEXT,
-            d0 REAL,
-            d1 REAL,
-            d2 REAL,
-            d3 REAL,
-            saldo_total REAL,
-            data_saldo TEXT
-        )
-        """
-        cursor.execute(create_table_query)
-        conn.commit()
-        logger.info("Tabela tb_saldo criada/verificada com sucesso.")
-
-        # Limpa apenas os dados do mês atual antes de inserir novos dados
-        if not delete_non_finished_data(cursor, conn, data_dados):
+        # Substitui o mês não concluído em uma única transação curta
+        with metrics.stage("swap") as stage:
+            records_inserted = replace_month_data(
+                cursor, conn, reference_date, staging_table, columns
+            )
+            stage.success = records_inserted is not None
+            stage.rows = records_inserted
+        if not stage.success:
             return False
 
-        # Prepara dados para inserção
-        records_inserted = 0
-        for _, row in df.iterrows():
-            values = []
-            columns = []
-            placeholders = []
-
-            # Adiciona todas as colunas mapeadas (usando os NOVOS nomes de coluna após renomear)
-            for db_col in column_mapping.values():
-                if db_col in df.columns:
-                    columns.append(db_col)
-                    placeholders.append("?")
-                    value = row[db_col]
-
-                    # Converte pandas Timestamp para string devido a limitações do SQLite
-                    if pd.isna(value):
-                        values.append(None)
-                    elif isinstance(value, (pd.Timestamp, datetime.datetime)):
-                        values.append(value.strftime("%Y-%m-%d %H:%M:%S"))
-                    else:
-                        values.append(value)
-
-            # Adiciona coluna data_saldo que não está no column_mapping
-            if "data_saldo" in df.columns:
-                columns.append("data_saldo")
-                placeholders.append("?")
-                values.append(row["data_saldo"])
-
-            if columns:
-                insert_query = f"""
-                INSERT INTO tb_saldo ({", ".join(columns)})
-                VALUES ({", ".join(placeholders)})
-                """
-                cursor.execute(insert_query, values)
-                records_inserted += 1
-
-        conn.commit()
         logger.info(
             f"Processamento do relatório de saldo concluído: {records_inserted} registros inseridos."
         )
         return True
 
     except Exception as e:
-        logger.error(f"Erro ao processar relatório de saldo: {e}")
+        logger.error(f"Erro ao gravar relatório de saldo: {e}")
         conn.rollback()
         return False
 
 
+def process_saldo(
+    cursor, conn, df, file_modified_time, data_dados=None, metrics=None
+):
+    """Processa dados do arquivo saldo.xlsx."""
+    metrics = metrics or RunMetrics("tb_saldo")
+    try:
+        with metrics.stage("transform") as stage, allocation_snapshot(
+            "tb_saldo_transform"
+        ):
+            df, reference_date = transform_data(df, data_dados)
+            stage.rows = len(df)
+    except Exception as e:
+        logger.error(f"Erro ao processar relatório de saldo: {e}")
+        return False
+
+    return write_data(cursor, conn, df, reference_date, metrics=metrics)
+
+
 def load_excel_file(file_path):
     """Carrega arquivo Excel e retorna DataFrame."""
     try:
-        df = pd.read_excel(file_path)
+        df = read_excel_report(
+            file_path, SaldoConfig.COLUMN_MAPPING, SaldoConfig.CATEGORY_COLUMNS
+        )
         logger.info(
             f"Arquivo Excel carregado com sucesso: {file_path} ({len(df)} linhas)"
         )
@@ -415,18 +452,30 @@ def process_file(
     file_path,
     file_modified_time,
     data_dados=None,
+    metrics=None,
 ):
     """Processa um único arquivo com base em seu tipo."""
     try:
+        metrics = metrics or RunMetrics(table_name, file_path.name)
+
         # Carrega o arquivo Excel
-        df = load_excel_file(file_path)
+        with metrics.stage("read") as stage:
+            df = load_excel_file(file_path)
+            stage.success = df is not None
+            if stage.success:
+                stage.rows = len(df)
         if df is None:
             return False
 
         # Processa com base no tipo de arquivo
         if file_name == "saldo.xlsx":
             return process_saldo(
-                cursor, conn, df, file_modified_time, data_dados
+                cursor,
+                conn,
+                df,
+                file_modified_time,
+                data_dados,
+                metrics=metrics,
             )
         else:
             logger.warning(f"Tipo de arquivo não reconhecido: {file_name}")
@@ -437,6 +486,62 @@ def process_file(
         return False
 
 
+def process_path(cursor, conn, file_path, file_name, table_name):
+    """Carrega um arquivo do relatório se ele ainda não foi processado (ou foi modificado), registrando o rastreamento e as métricas da carga. Retorna True se o arquivo foi carregado."""
+    # Verifica data de modificação
+    current_modified_time = get_file_last_modified(file_path)
+    if current_modified_time is None:
+        logger.error(
+            f"Não foi possível obter timestamp do arquivo {file_path}"
+        )
+        return False
+
+    # Interpreta o nome do arquivo para obter data_dados
+    data_dados = SaldoConfig.interpret_file_name(file_path.name)
+
+    # Verifica se o arquivo precisa ser processado
+    if not should_process_file(
+        cursor,
+        file_path.name,
+        table_name,
+        current_modified_time,
+        data_dados,
+    ):
+        return False
+
+    logger.info(f"Processando arquivo modificado: {file_path}")
+
+    # Processa o arquivo medindo cada etapa
+    metrics = RunMetrics(table_name, file_path.name)
+    processed = process_file(
+        cursor,
+        conn,
+        file_name,
+        table_name,
+        file_path,
+        current_modified_time,
+        data_dados,
+        metrics=metrics,
+    )
+    if processed:
+        # Atualiza rastreamento
+        with metrics.stage("tracking"):
+            update_file_tracking(
+                cursor,
+                conn,
+                file_path.name,
+                table_name,
+                current_modified_time,
+            )
+        logger.info(f"Arquivo {file_path.name} processado com sucesso.")
+    else:
+        logger.error(f"Falha ao processar arquivo {file_path.name}")
+
+    # Registra as métricas da carga em tb_execucoes
+    metrics.save(conn)
+    return processed
+
+
 def main():
     """Função principal de execução."""
     try:
@@ -474,55 +579,14 @@ def main():
 
                 logger.info(f"Arquivo encontrado: {file_path.name}")
 
-                # Verifica data de modificação
-                current_modified_time = get_file_last_modified(file_path)
-                if current_modified_time is None:
-                    logger.error(
-                        f"Não foi possível obter timestamp do arquivo {file_path}"
-                    )
-                    continue
-
-                # Interpreta o nome do arquivo para obter data_dados
-                data_dados = SaldoConfig.interpret_file_name(file_path.name)
-
-                # Verifica se o arquivo precisa ser processado
-                if not should_process_file(
-                    cursor,
-                    file_path.name,
-                    table_name,
-                    current_modified_time,
-                    data_dados,
+                if process_path(
+                    cursor, conn, file_path, file_name, table_name
                 ):
-                    continue
-
-                logger.info(f"Processando arquivo modificado: {file_path}")
-
-                # Processa o arquivo
-                if process_file(
-                    cursor,
-                    conn,
-                    file_name,
-                    table_name,
-                    file_path,
-                    current_modified_time,
-                    data_dados,
-                ):
-                    # Atualiza rastreamento
-                    update_file_tracking(
-                        cursor,
-                        conn,
-                        file_path.name,
-                        table_name,
-                        current_modified_time,
-                    )
                     processed_count += 1
-                    logger.info(
-                        f"Arquivo {file_path.name} processado com sucesso."
-                    )
-                else:
-                    logger.error(
-                        f"Falha ao processar arquivo {file_path.name}"
-                    )
+
+            if processed_count > 0:
+                # Atualiza os agregados consumidos pelos dashboards
+                run_post_ingestion(conn)
 
             logger.info(
                 f"Processamento concluído. {processed_count} arquivos processados."
@@ -534,4 +598,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, "tb_saldo")
@@ -0,0 +1,240 @@
+"""
+Serviço de carga contínua: monitora a pasta data/raw e carrega cada relatório assim que o arquivo termina de ser gravado.
+
+O processo permanece em execução com as bibliotecas já importadas e uma conexão aberta com o banco, evitando o custo de inicialização de cada script de upload. A pasta é verificada por polling (os.scandir, apenas metadados) e um arquivo só é carregado depois que seu tamanho e data de modificação permanecem estáveis por alguns segundos e o conteúdo forma um .xlsx completo. O arquivo é direcionado ao script de upload correspondente pelo padrão do nome (<relatorio>_YYYYMMDD_DD-MM-YYYY-HH-MM-SS.xlsx).
+
+Uso:
+    python scripts/upload/watch_folder.py [--interval 2] [--settle 5] [--once]
+"""
+
+import os
+import re
+import sys
+import time
+import signal
+import logging
+import zipfile
+import argparse
+import threading
+from pathlib import Path
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from upload import tb_ordens_rf, tb_ordens_rv, tb_positivador, tb_saldo
+from utils.post_ingestion import run_post_ingestion
+from utils.sql_trace import enable_tracing
+
+logger = logging.getLogger(__name__)
+
+# Scripts de upload atendidos pelo serviço e suas classes de configuração
+LOADERS = (
+    (tb_positivador, tb_positivador.PositivadorConfig),
+    (tb_saldo, tb_saldo.SaldoConfig),
+    (tb_ordens_rv, tb_ordens_rv.OrdensRVConfig),
+    (tb_ordens_rf, tb_ordens_rf.OrdensRFConfig),
+)
+
+
+def build_routes():
+    """Monta as rotas (padrão do nome, script de upload, arquivo base, tabela) a partir do FILE_TO_DB_MAPPING de cada script."""
+    routes = []
+    for module, config in LOADERS:
+        for file_name, table_name in config.FILE_TO_DB_MAPPING.items():
+            base_name = file_name.replace(".xlsx", "")
+            pattern = re.compile(
+                rf"^{re.escape(base_name)}_\d{{8}}_[^_]+\.xlsx$", re.IGNORECASE
+            )
+            routes.append((pattern, module, file_name, table_name))
+    return routes
+
+
+def route_file(routes, path):
+    """Retorna a rota do arquivo, ou None se o nome não corresponder a nenhum relatório."""
+    for route in routes:
+        if route[0].match(path.name):
+            return route
+    return None
+
+
+def is_complete_workbook(path):
+    """Verifica se o .xlsx está completo (o diretório central do zip fica no fim do arquivo e só existe após a gravação terminar)."""
+    try:
+        return zipfile.is_zipfile(path)
+    except OSError:
+        return False
+
+
+class FolderWatcher:
+    """Acompanha os arquivos da pasta de entrada e identifica os que estão prontos para carga."""
+
+    def __init__(self, folder, routes, settle_seconds=5.0):
+        self.folder = Path(folder)
+        self.routes = routes
+        self.settle_seconds = settle_seconds
+        # Arquivo -> (tamanho, data de modificação, momento em que foi visto assim pela primeira vez)
+        self._pending = {}
+        # Arquivo -> (tamanho, data de modificação) da última tentativa de carga
+        self._handled = {}
+
+    def scan(self):
+        """Lê os metadados dos arquivos da pasta sem abri-los."""
+        entries = {}
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if not entry.is_file() or entry.name.startswith("~$"):
+                        continue
+                    stat = entry.stat()
+                    entries[Path(entry.path)] = (stat.st_size, stat.st_mtime)
+        except FileNotFoundError:
+            logger.warning(f"Pasta de entrada não encontrada: {self.folder}")
+        return entries
+
+    def poll(self, now=None):
+        """Retorna os arquivos novos ou modificados cuja gravação terminou, em ordem de modificação."""
+        now = time.monotonic() if now is None else now
+        entries = self.scan()
+
+        # Esquece arquivos removidos da pasta
+        for path in list(self._pending):
+            if path not in entries:
+                del self._pending[path]
+        for path in list(self._handled):
+            if path not in entries:
+                del self._handled[path]
+
+        ready = []
+        for path, signature in entries.items():
+            if self._handled.get(path) == signature:
+                continue
+            if route_file(self.routes, path) is None:
+                continue
+
+            pending = self._pending.get(path)
+            if pending is None or pending[:2] != signature:
+                # Arquivo novo ou ainda sendo gravado: reinicia a espera
+                self._pending[path] = (*signature, now)
+                continue
+            if now - pending[2] < self.settle_seconds:
+                continue
+            if not is_complete_workbook(path):
+                logger.info(f"Aguardando gravação completa de {path.name}")
+                self._pending[path] = (*signature, now)
+                continue
+            ready.append((signature[1], path))
+
+        return [path for _, path in sorted(ready)]
+
+    def mark_handled(self, path):
+        """Registra a tentativa de carga; o arquivo só volta a ser considerado se for modificado."""
+        pending = self._pending.pop(path, None)
+        if pending is not None:
+            self._handled[path] = pending[:2]
+
+
+def process_ready_files(conn, watcher, files):
+    """Carrega os arquivos prontos e, se algum foi carregado, executa a pós-carga uma única vez."""
+    cursor = conn.cursor()
+    processed_count = 0
+    for path in files:
+        _, module, file_name, table_name = route_file(watcher.routes, path)
+        logger.info(f"Arquivo recebido: {path.name} -> {table_name}")
+        try:
+            if module.process_path(cursor, conn, path, file_name, table_name):
+                processed_count += 1
+        except Exception as e:
+            logger.error(f"Erro ao carregar {path.name}: {e}")
+            conn.rollback()
+        finally:
+            watcher.mark_handled(path)
+
+    if processed_count > 0:
+        # Atualiza os agregados consumidos pelos dashboards
+        run_post_ingestion(conn)
+    return processed_count
+
+
+def watch(folder, interval=2.0, settle_seconds=5.0, once=False):
+    """Monitora a pasta até receber SIGINT/SIGTERM (ou, com `once`, carrega os arquivos existentes e encerra)."""
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info("Encerrando o serviço de carga...")
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    # Com --once os arquivos existentes são considerados estáveis
+    watcher = FolderWatcher(
+        folder, build_routes(), 0 if once else settle_seconds
+    )
+    logger.info(
+        f"Monitorando {watcher.folder} (intervalo {interval}s, estabilização {settle_seconds}s)"
+    )
+
+    total = 0
+    with tb_positivador.get_database_connection() as conn:
+        if once:
+            # A primeira leitura apenas registra os arquivos; a segunda os libera
+            watcher.poll()
+            files = watcher.poll()
+            if files:
+                total += process_ready_files(conn, watcher, files)
+        while not once and not stop.is_set():
+            files = watcher.poll()
+            if files:
+                total += process_ready_files(conn, watcher, files)
+            stop.wait(interval)
+
+    logger.info(f"Serviço de carga encerrado. {total} arquivos carregados.")
+    return total
+
+
+def parse_arguments(argv=None):
+    """Interpreta as opções da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Monitora data/raw e carrega os relatórios assim que chegam."
+    )
+    parser.add_argument(
+        "--folder",
+        type=Path,
+        default=None,
+        help="Pasta monitorada (padrão: data/raw)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="Intervalo entre verificações da pasta, em segundos (padrão: 2)",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=5.0,
+        help="Tempo sem alterações para considerar o arquivo gravado, em segundos (padrão: 5)",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Carrega os arquivos pendentes e encerra",
+    )
+    parser.add_argument(
+        "--trace-sql",
+        action="store_true",
+        help="Rastreia as instruções SQL e registra o relatório das mais custosas",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Função principal de execução."""
+    args = parse_arguments(argv)
+    if args.trace_sql:
+        enable_tracing()
+    folder = args.folder or tb_positivador.PositivadorConfig.get_input_folder()
+    watch(folder, args.interval, args.settle, args.once)
+
+
+if __name__ == "__main__":
+    main()
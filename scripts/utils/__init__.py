@@ -0,0 +1,3 @@
+"""
+Utilitários compartilhados pelos scripts de carga, manutenção e backup do banco de dados.
+"""
@@ -0,0 +1,429 @@
+"""
+Arquivamento dos meses encerrados: os meses anteriores ao horizonte configurado saem das tabelas de fatos do banco principal para um armazenamento de arquivo, e o espaço liberado é devolvido ao sistema com VACUUM incremental (em um banco ainda sem auto_vacuum incremental, apenas com --enable-incremental-vacuum; ver utils/maintenance.py).
+
+A carga diária reescreve apenas o mês corrente, mas os meses encerrados continuam nas mesmas B-trees e deixam maiores todos os índices e as varreduras das views. Com o arquivamento, o banco principal guarda apenas os últimos `--horizon` meses (ARCHIVE_HORIZON_MONTHS, padrão 24), e o trabalho das cargas e dos dashboards não cresce com o histórico.
+
+Formatos de arquivo:
+- sqlite (padrão): um único arquivo ao lado do banco principal (data/db/database_arquivo.db), com as mesmas tabelas e índices. As conexões de leitura o anexam como as partições anuais (ver utils/partitions.py), então as views, o notebook, o serviço HTTP e o backup continuam vendo os meses arquivados. O driver sqlite3 da biblioteca padrão não lê arquivos comprimidos, por isso este formato não é comprimido;
+- parquet: data/archive/<tabela>/mes=YYYY-MM/dados.parquet (ou na pasta de ARCHIVE_DIR), comprimido com zstd (requer pyarrow). É um armazenamento frio: os meses saem das views do SQLite e do espelho do DuckDB.
+
+Cada mês arquivado é registrado em tb_rastreamento_arquivos (nome_arquivo "arquivamento_YYYY-MM"), o que invalida os caches de consultas do notebook e do serviço HTTP. As tabelas agregadas (tb_cliente_mes e tb_ranking_aai) não são alteradas: os meses arquivados continuam nelas, e as rotinas que as recalculam preservam os meses que não estão mais nas tabelas de fatos. Cada mês é copiado primeiro para o arquivo e só então removido do banco principal; uma execução interrompida pode ser repetida, pois a cópia de um mês ainda presente no banco principal é refeita por completo (até lá, as conexões de leitura veem o mês duas vezes).
+
+Uso:
+    python scripts/utils/archive.py [--horizon 24] [--format sqlite|parquet] [--dry-run] [--no-vacuum] [--enable-incremental-vacuum]
+"""
+
+import os
+import re
+import sys
+import logging
+import argparse
+import importlib.util
+from pathlib import Path
+
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.maintenance import (
+    checkpoint_wal,
+    get_file_sizes,
+    get_page_stats,
+    is_incremental_vacuum_enabled,
+    log_stats,
+    reclaim_space,
+)
+from utils.partitions import PARTITIONED_TABLES, get_archive_path
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+ARCHIVE_FORMATS = ("sqlite", "parquet")
+
+# Quantidade de meses mantidos no banco principal, contando o mais recente
+DEFAULT_HORIZON_MONTHS = int(os.getenv("ARCHIVE_HORIZON_MONTHS", "24"))
+
+# O mês corrente e o anterior (ainda atualizado nos primeiros dias úteis) nunca são arquivados
+MIN_HORIZON_MONTHS = 2
+
+PARQUET_COMPRESSION = "zstd"
+
+
+def get_archive_dir():
+    """Obtém a pasta do arquivamento em Parquet."""
+    archive_dir = Path(os.getenv("ARCHIVE_DIR", "data/archive"))
+    if not archive_dir.is_absolute():
+        archive_dir = PROJECT_ROOT / archive_dir
+    return archive_dir
+
+
+def _get_columns(cursor, table_name, schema="main"):
+    """Obtém as colunas de uma tabela e seus tipos declarados (vazio se a tabela não existir)."""
+    cursor.execute(f"PRAGMA {schema}.table_info({table_name})")
+    return {row[1]: row[2] for row in cursor.fetchall()}
+
+
+def _month_bounds(month):
+    """Limites [início, fim) de um mês YYYY-MM para as colunas de data gravadas em texto."""
+    year, month_number = (int(part) for part in month.split("-"))
+    if month_number == 12:
+        return f"{year:04d}-12-01", f"{year + 1:04d}-01-01"
+    return f"{year:04d}-{month_number:02d}-01", f"{year:04d}-{month_number + 1:02d}-01"
+
+
+def shift_month(month, months):
+    """Desloca um mês YYYY-MM em `months` meses (negativo para trás)."""
+    year, month_number = (int(part) for part in month.split("-"))
+    index = year * 12 + month_number - 1 + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def get_latest_month(cursor):
+    """Mês mais recente com dados nas tabelas de fatos do banco principal, ou None."""
+    months = []
+    for table_name, date_column in PARTITIONED_TABLES.items():
+        if not _get_columns(cursor, table_name):
+            continue
+        cursor.execute(f"SELECT MAX({date_column}) FROM main.{table_name}")
+        latest = cursor.fetchone()[0]
+        if latest:
+            months.append(str(latest)[:7])
+    return max(months) if months else None
+
+
+def list_archivable_months(cursor, horizon):
+    """Meses das tabelas de fatos anteriores ao horizonte (os `horizon` meses mais recentes ficam no banco principal)."""
+    if horizon < MIN_HORIZON_MONTHS:
+        raise ValueError(
+            f"O horizonte deve manter ao menos {MIN_HORIZON_MONTHS} meses no banco principal."
+        )
+    latest_month = get_latest_month(cursor)
+    if latest_month is None:
+        return []
+    cutoff, _ = _month_bounds(shift_month(latest_month, -(horizon - 1)))
+
+    months = set()
+    for table_name, date_column in PARTITIONED_TABLES.items():
+        if not _get_columns(cursor, table_name):
+            continue
+        cursor.execute(
+            f"""SELECT DISTINCT substr({date_column}, 1, 7)
+                FROM main.{table_name}
+                WHERE {date_column} < ?""",
+            (cutoff,),
+        )
+        months.update(row[0] for row in cursor.fetchall() if row[0])
+    return sorted(months)
+
+
+def count_month_rows(cursor, month):
+    """Conta os registros de um mês em cada tabela de fatos do banco principal."""
+    month_start, next_month = _month_bounds(month)
+    counts = {}
+    for table_name, date_column in PARTITIONED_TABLES.items():
+        if not _get_columns(cursor, table_name):
+            continue
+        cursor.execute(
+            f"SELECT COUNT(*) FROM main.{table_name} WHERE {date_column} >= ? AND {date_column} < ?",
+            (month_start, next_month),
+        )
+        count = cursor.fetchone()[0]
+        if count:
+            counts[table_name] = count
+    return counts
+
+
+def _prepare_archive_table(cursor, table_name):
+    """Cria a tabela e os índices no arquivo anexado, se ainda não existirem, e acrescenta as colunas criadas no banco principal depois do primeiro arquivamento."""
+    columns = _get_columns(cursor, table_name)
+    archive_columns = _get_columns(cursor, table_name, "arquivo")
+    if not archive_columns:
+        cursor.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+            (table_name,),
+        )
+        cursor.execute(
+            re.sub(
+                r"^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?",
+                "CREATE TABLE arquivo.",
+                cursor.fetchone()[0],
+                flags=re.IGNORECASE,
+            )
+        )
+        cursor.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table_name,),
+        )
+        for (index_sql,) in cursor.fetchall():
+            cursor.execute(
+                re.sub(
+                    r"^\s*CREATE\s+(UNIQUE\s+)?INDEX\s+(IF\s+NOT\s+EXISTS\s+)?",
+                    r"CREATE \1INDEX IF NOT EXISTS arquivo.",
+                    index_sql,
+                    flags=re.IGNORECASE,
+                )
+            )
+        return list(columns)
+
+    for column, declared_type in columns.items():
+        if column not in archive_columns:
+            cursor.execute(
+                f"ALTER TABLE arquivo.{table_name} ADD COLUMN {column} {declared_type}"
+            )
+    return list(columns)
+
+
+def _copy_month_sqlite(conn, archive_path, month, tables):
+    """Copia o mês das tabelas informadas para o arquivo SQLite, substituindo uma cópia anterior do mesmo mês. Retorna a quantidade copiada por tabela."""
+    month_start, next_month = _month_bounds(month)
+    cursor = conn.cursor()
+    cursor.execute("ATTACH DATABASE ? AS arquivo", (str(archive_path),))
+    try:
+        copied = {}
+        cursor.execute("BEGIN")
+        for table_name in tables:
+            date_column = PARTITIONED_TABLES[table_name]
+            column_list = ", ".join(_prepare_archive_table(cursor, table_name))
+            cursor.execute(
+                f"DELETE FROM arquivo.{table_name} WHERE {date_column} >= ? AND {date_column} < ?",
+                (month_start, next_month),
+            )
+            cursor.execute(
+                f"""INSERT INTO arquivo.{table_name} ({column_list})
+                    SELECT {column_list} FROM main.{table_name}
+                    WHERE {date_column} >= ? AND {date_column} < ?""",
+                (month_start, next_month),
+            )
+            copied[table_name] = cursor.rowcount
+        conn.commit()
+        return copied
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute("DETACH DATABASE arquivo")
+
+
+def _copy_month_parquet(conn, archive_dir, month, tables):
+    """Grava o mês das tabelas informadas em arquivos Parquet comprimidos. Retorna a quantidade gravada por tabela."""
+    from analytics.columnar import write_month
+
+    return {
+        table_name: write_month(
+            conn,
+            archive_dir,
+            table_name,
+            PARTITIONED_TABLES[table_name],
+            month,
+            compression=PARQUET_COMPRESSION,
+        )
+        for table_name in tables
+    }
+
+
+def _record_archival(cursor, month):
+    """Registra o arquivamento do mês em tb_rastreamento_arquivos, o que muda a versão dos dados usada pelos caches de consultas (ver analytics/database.py)."""
+    cursor.execute(
+        "SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = 'tb_rastreamento_arquivos'"
+    )
+    if cursor.fetchone() is None:
+        return
+    file_name = f"arquivamento_{month}"
+    cursor.execute(
+        """UPDATE tb_rastreamento_arquivos
+           SET ultima_modificacao = datetime('now'), ultimo_processamento = datetime('now')
+           WHERE nome_arquivo = ?""",
+        (file_name,),
+    )
+    if cursor.rowcount == 0:
+        cursor.execute(
+            """INSERT INTO tb_rastreamento_arquivos (nome_arquivo, nome_tabela, ultima_modificacao, ultimo_processamento)
+               VALUES (?, 'arquivamento', datetime('now'), datetime('now'))""",
+            (file_name,),
+        )
+
+
+def _drop_mirror_months(months):
+    """Remove os meses arquivados do espelho em Parquet do motor analítico, se ele existir."""
+    try:
+        from analytics.columnar import drop_mirror_months
+    except ImportError as e:
+        logger.warning(f"Espelho Parquet não atualizado, dependência ausente: {e}")
+        return 0
+    return drop_mirror_months(months)
+
+
+def _delete_month(conn, month, tables):
+    """Remove o mês das tabelas de fatos do banco principal em uma única transação. Retorna a quantidade removida por tabela."""
+    month_start, next_month = _month_bounds(month)
+    cursor = conn.cursor()
+    deleted = {}
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for table_name in tables:
+            date_column = PARTITIONED_TABLES[table_name]
+            cursor.execute(
+                f"DELETE FROM main.{table_name} WHERE {date_column} >= ? AND {date_column} < ?",
+                (month_start, next_month),
+            )
+            deleted[table_name] = cursor.rowcount
+        _record_archival(cursor, month)
+        conn.commit()
+        return deleted
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def archive_month(conn, month, archive_format, target):
+    """Move um mês das tabelas de fatos para o arquivo (`target`: arquivo SQLite ou pasta Parquet). Retorna a quantidade de registros movidos por tabela."""
+    if conn.in_transaction:
+        conn.commit()
+    pending = count_month_rows(conn.cursor(), month)
+    if not pending:
+        return {}
+
+    if archive_format == "parquet":
+        copied = _copy_month_parquet(conn, target, month, pending)
+    else:
+        copied = _copy_month_sqlite(conn, target, month, pending)
+    if copied != pending:
+        raise RuntimeError(
+            f"Cópia do mês {month} incompleta: {copied} registros copiados, {pending} esperados."
+        )
+
+    deleted = _delete_month(conn, month, pending)
+    if deleted != copied:
+        # O mês já está no arquivo; a cópia é refeita na próxima execução
+        raise RuntimeError(
+            f"Remoção do mês {month} divergente: {deleted} registros removidos, {copied} copiados."
+        )
+
+    for table_name, count in copied.items():
+        logger.info(f"{table_name}: {count:,} registros de {month} arquivados")
+    return copied
+
+
+def archive_months(
+    conn,
+    db_path,
+    horizon=DEFAULT_HORIZON_MONTHS,
+    archive_format="sqlite",
+    target=None,
+    vacuum=True,
+    enable_incremental_vacuum=False,
+):
+    """Arquiva todos os meses anteriores ao horizonte e recupera o espaço liberado. Retorna {mês: {tabela: registros movidos}}."""
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Formato de arquivamento inválido: {archive_format}")
+    if archive_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise RuntimeError("O arquivamento em Parquet requer o pacote pyarrow.")
+    if target is None:
+        target = (
+            get_archive_dir()
+            if archive_format == "parquet"
+            else get_archive_path(db_path)
+        )
+
+    months = list_archivable_months(conn.cursor(), horizon)
+    if not months:
+        logger.info(f"Nenhum mês anterior ao horizonte de {horizon} meses.")
+        return {}
+
+    logger.info(
+        f"Arquivando {len(months)} meses ({months[0]} a {months[-1]}) em {target}"
+    )
+    moved = {}
+    for month in months:
+        moved[month] = archive_month(conn, month, archive_format, target)
+
+    # No formato sqlite, os meses continuam visíveis às conexões de leitura e permanecem no espelho do DuckDB
+    if archive_format == "parquet":
+        _drop_mirror_months(months)
+
+    if vacuum:
+        log_stats("antes", get_page_stats(conn), get_file_sizes(conn))
+        freed = reclaim_space(conn, convert=enable_incremental_vacuum)
+        checkpoint_wal(conn)
+        logger.info(f"VACUUM incremental: {freed:,} páginas liberadas")
+        after = get_page_stats(conn)
+        log_stats("depois", after, get_file_sizes(conn))
+        # Sem auto_vacuum incremental, reclaim_space já registrou o aviso
+        if after["freelist_count"] and is_incremental_vacuum_enabled(conn):
+            logger.warning(
+                f"{after['freelist_count']:,} páginas livres não foram devolvidas ao sistema pelo VACUUM incremental."
+            )
+    return moved
+
+
+def parse_arguments(argv=None):
+    """Interpreta as opções da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Arquiva os meses anteriores ao horizonte fora das tabelas de fatos do banco principal."
+    )
+    parser.add_argument(
+        "--horizon",
+        type=int,
+        default=DEFAULT_HORIZON_MONTHS,
+        help="Quantidade de meses mantidos no banco principal, contando o mais recente",
+    )
+    parser.add_argument(
+        "--format",
+        choices=ARCHIVE_FORMATS,
+        default="sqlite",
+        help="Formato do arquivo: SQLite separado ou Parquet comprimido",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Apenas lista os meses que seriam arquivados",
+    )
+    parser.add_argument(
+        "--no-vacuum",
+        action="store_true",
+        help="Não executa o VACUUM incremental após o arquivamento",
+    )
+    parser.add_argument(
+        "--enable-incremental-vacuum",
+        action="store_true",
+        help="Converte o banco para auto_vacuum incremental com um VACUUM completo, se ainda não estiver convertido",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Função principal de execução."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    args = parse_arguments(argv)
+
+    from analytics.database import get_database_path
+    from utils.connection import connect_writer
+
+    db_path = get_database_path()
+    conn = connect_writer(db_path)
+    try:
+        if args.dry_run:
+            for month in list_archivable_months(conn.cursor(), args.horizon):
+                counts = count_month_rows(conn.cursor(), month)
+                logger.info(f"{month}: {counts}")
+            return
+        archive_months(
+            conn,
+            db_path,
+            horizon=args.horizon,
+            archive_format=args.format,
+            vacuum=not args.no_vacuum,
+            enable_incremental_vacuum=args.enable_incremental_vacuum,
+        )
+    except Exception as e:
+        logger.error(f"Erro ao arquivar os meses encerrados: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Chave canônica do assessor ("A" seguido dos dígitos do código, ex.: "A1234") usada por todas as tabelas de fatos.
+
+Os relatórios trazem o código em formatos diferentes: número inteiro (1234), número lido como float quando a coluna tem vazios (1234.0), texto com ou sem o prefixo ("A1234", "a1234 ", "1234"). Todos são convertidos para a mesma chave em texto, e valores vazios ou inválidos ficam nulos (e não "Anan"), de modo que as junções das views por codigo_assessor comparem textos com textos.
+"""
+
+import re
+
+import pandas as pd
+
+ASSESSOR_PREFIX = "A"
+
+# Prefixo opcional, dígitos e parte decimal zerada opcional (ex.: "A1234", "1234.0")
+ASSESSOR_PATTERN = r"^(?:A)?0*(\d+?)(?:\.0+)?$"
+ASSESSOR_REGEX = re.compile(ASSESSOR_PATTERN)
+
+
+def normalize_assessor_code(value):
+    """Converte um código de assessor isolado para a chave canônica. Retorna None para valores vazios ou inválidos."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    match = ASSESSOR_REGEX.match(str(value).strip().upper())
+    if match is None:
+        return None
+    return f"{ASSESSOR_PREFIX}{match.group(1)}"
+
+
+def normalize_assessor_codes(series):
+    """Converte uma coluna de códigos de assessor para a chave canônica com operações vetorizadas. Valores vazios ou inválidos viram nulos."""
+    if pd.api.types.is_numeric_dtype(series):
+        # Inteiros lidos como float (coluna com vazios) perdem o ".0"
+        numbers = pd.to_numeric(series, errors="coerce")
+        integers = numbers.where(numbers == numbers.round()).astype("Int64")
+        text = integers.astype("string")
+    else:
+        text = series.astype("string").str.strip().str.upper()
+
+    digits = text.str.extract(ASSESSOR_PATTERN, expand=False)
+    codes = (ASSESSOR_PREFIX + digits).astype(object)
+    return codes.where(digits.notna(), None)
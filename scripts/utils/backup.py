@@ -1,14 +1,21 @@
 """
 Itera sobre todas as tabelas do banco de dados e cria backups no formato Excel, o caminho de saída é "data/backups/nome_da_tabela (extraída do information.schema)/ano (extraída da coluna de data)/mês (extraída da coluna de data)/nome_da_tabela_yyyy_mm_01.xlsx".
+
+As tabelas são lidas por conexões somente leitura em modo WAL (ver utils/connection.py), de modo que o backup pode rodar durante uma carga sem bloqueá-la nem ser bloqueado por ela.
+
+As tabelas são sempre lidas do SQLite, mesmo com ANALYTICS_ENGINE=duckdb: o espelho em Parquet (ver analytics/columnar.py) é uma cópia derivada e pode estar desatualizado.
 """
 
 import sys
 import pandas as pd
-import sqlite3
 import logging
 from pathlib import Path
 from datetime import datetime
 
+# Disponibiliza os módulos compartilhados de scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.connection import connect_reader
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -66,7 +73,8 @@ def extract_table_from_database(
 ) -> pd.DataFrame:
     """Extrai uma tabela do banco de dados SQLite"""
     try:
-        conn = sqlite3.connect(db_path)
+        # Com as partições anexadas, as tabelas de fatos incluem os anos encerrados e os meses arquivados
+        conn = connect_reader(db_path)
         query = f"SELECT * FROM {table_name}"
         df = pd.read_sql_query(query, conn)
         conn.close()
@@ -80,7 +88,7 @@ def extract_table_from_database(
 def get_all_tables(db_path: Path) -> list:
     """Obtém lista de todas as tabelas do banco de dados"""
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect_reader(db_path, partitions=False)
         cursor = conn.cursor()
         cursor.execute(
             "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
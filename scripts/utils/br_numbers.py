@@ -0,0 +1,138 @@
+"""
+Conversão de números no formato brasileiro ("R$ 1.234,56", "-R$ 10,00", "(1.234,56)", "12,50%") usada pelos scripts de upload.
+
+Os exemplos das funções são verificados com:
+    python -m doctest scripts/utils/br_numbers.py
+
+A limpeza é feita em uma única passada de `translate`: o símbolo da moeda, os espaços, os separadores de milhar, o sinal de percentual e o parêntese de fechamento são removidos, a vírgula decimal vira ponto e o parêntese de abertura vira sinal de negativo (formato contábil). Em uma coluna, os textos são unidos em um único buffer e limpos de uma vez, em vez de gerar uma nova coluna de objetos a cada `str.replace`. Colunas que o Excel já entregou como números não passam pela limpeza, e valores numéricos em colunas mistas são mantidos como estão.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Caracteres removidos e substituídos na limpeza
+REMOVED_CHARS = "R$ .%)"
+REPLACED_CHARS = {",": ".", "(": "-"}
+
+# Espaço não separável e sinal de menos tipográfico, comuns em textos copiados
+SPECIAL_CHARS = {"\xa0": " ", "−": "-"}
+
+# Em uma única passada de str.translate, o espaço não separável é removido diretamente
+TEXT_TRANSLATION = str.maketrans(
+    {
+        **{char: None for char in REMOVED_CHARS},
+        **REPLACED_CHARS,
+        **SPECIAL_CHARS,
+        "\xa0": None,
+    }
+)
+BYTES_TRANSLATION = bytes.maketrans(
+    "".join(REPLACED_CHARS).encode(), "".join(REPLACED_CHARS.values()).encode()
+)
+
+
+def clean_br_number(text):
+    """Converte um texto no formato brasileiro para o formato aceito por float (ex.: 'R$ 1.234,56' -> '1234.56', '(10,00)' -> '-10.00').
+
+    >>> [clean_br_number(text) for text in ["R$ 1.234,56", "-R$ 10,00", "R$ -10,00"]]
+    ['1234.56', '-10.00', '-10.00']
+    >>> [clean_br_number(text) for text in ["(1.234,56)", "-R$ (5,00)", "12,50%"]]
+    ['-1234.56', '-5.00', '12.50']
+    >>> [clean_br_number(text) for text in ["R$\\xa01.234,56", "−R$ 10,00", "R$ -", ""]]
+    ['1234.56', '-10.00', '-', '']
+    """
+    # Sinal repetido, como em "-R$ (10,00)", continua negativo
+    return text.translate(TEXT_TRANSLATION).replace("--", "-")
+
+
+def clean_br_numbers(texts):
+    """Limpa uma lista de textos de uma só vez, unindo-os em um único buffer. Retorna a lista de textos limpos.
+
+    >>> clean_br_numbers(["R$ 1.234,56", "-R$ (5,00)", "R$\\xa010,00", "−R$ 1,00"])
+    ['1234.56', '-5.00', '10.00', '-1.00']
+
+    Um texto com quebra de linha mudaria a quantidade de partes do buffer; a lista é então limpa texto a texto:
+
+    >>> clean_br_numbers(["R$ 1,00\\n", "(2,00)"])
+    ['1.00\\n', '-2.00']
+    """
+    joined = "\n".join(texts)
+    for char, replacement in SPECIAL_CHARS.items():
+        joined = joined.replace(char, replacement)
+    cleaned = (
+        joined.encode()
+        .translate(BYTES_TRANSLATION, REMOVED_CHARS.encode())
+        .replace(b"--", b"-")
+        .decode()
+        .split("\n")
+    )
+    # Textos com quebra de linha são limpos um a um
+    if len(cleaned) != len(texts):
+        return [clean_br_number(text) for text in texts]
+    return cleaned
+
+
+def parse_br_number(value, percent=False):
+    """Converte um valor isolado (texto ou número) para float. Textos com percentual são divididos por 100; valores inválidos retornam None.
+
+    >>> parse_br_number("-R$ (5,00)"), parse_br_number("12,50%", percent=True)
+    (-5.0, 0.125)
+    >>> parse_br_number("R$ -"), parse_br_number(""), parse_br_number(float("nan")), parse_br_number(1234.56)
+    (None, None, None, 1234.56)
+    """
+    if isinstance(value, str):
+        try:
+            number = float(clean_br_number(value))
+        except ValueError:
+            return None
+        return number / 100.0 if percent else number
+    if pd.isna(value):
+        return None
+    return float(value)
+
+
+def parse_br_numbers(series, percent=False):
+    """Converte uma coluna de valores monetários ou percentuais no formato brasileiro para float64. Valores inválidos viram NaN.
+
+    Com percent=True, os textos ("12,50%") são divididos por 100. Números entregues pelo Excel em células formatadas como percentual já são frações (0,125) e não são alterados.
+
+    >>> texts = pd.Series(["R$ 1.234,56", "-R$ 10,00", "R$ -10,00", "(1.234,56)", "-R$ (5,00)"])
+    >>> parse_br_numbers(texts).tolist()
+    [1234.56, -10.0, -10.0, -1234.56, -5.0]
+    >>> parse_br_numbers(pd.Series(["R$\\xa01.234,56", "−R$ 10,00", "R$ 1,00\\n"])).tolist()
+    [1234.56, -10.0, 1.0]
+    >>> parse_br_numbers(pd.Series([np.nan, "", "R$ -"], dtype=object)).tolist()
+    [nan, nan, nan]
+    >>> parse_br_numbers(pd.Series(["12,50%", "-3,5%"]), percent=True).tolist()
+    [0.125, -0.035]
+    >>> parse_br_numbers(pd.Series([0.125, 2]), percent=True).tolist()
+    [0.125, 2.0]
+    >>> parse_br_numbers(pd.Series(["R$ 10,00", 1234.56, None], dtype=object)).tolist()
+    [10.0, 1234.56, nan]
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype("float64")
+
+    values = series.astype(object)
+    if pd.api.types.infer_dtype(values, skipna=False) == "string":
+        is_text = None
+        texts = values.tolist()
+    else:
+        is_text = (values.map(type) == str).to_numpy()
+        texts = values[is_text].tolist()
+
+    parsed = pd.to_numeric(
+        np.array(clean_br_numbers(texts), dtype=object), errors="coerce"
+    ).astype("float64")
+    if percent:
+        parsed = parsed / 100.0
+
+    if is_text is None:
+        return pd.Series(parsed, index=series.index, name=series.name)
+
+    # Valores que já são números (ou nulos) seguem sem limpeza
+    result = pd.to_numeric(values.where(~is_text), errors="coerce").astype(
+        "float64"
+    )
+    result[is_text] = parsed
+    return result
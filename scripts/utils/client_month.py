@@ -0,0 +1,272 @@
+"""
+Fato consolidado por cliente e mês (tb_cliente_mes), mantido pelos scripts de upload.
+
+Cada linha reúne, para um (codigo_cliente, data_referencia), a custódia, a captação líquida e a receita do positivador, o saldo do fim do mês, o volume operado e a quantidade de ordens de renda variável e renda fixa. As análises por cliente leem essa tabela estreita e indexada em vez de juntar positivador, saldo e ordens a cada consulta.
+
+Os scripts de upload recalculam apenas o mês substituído, na mesma transação da troca do mês (ver utils/staging.py), de modo que a tabela nunca fica defasada em relação às tabelas de fatos. Bancos existentes podem ser preenchidos uma única vez com:
+    python scripts/utils/client_month.py --rebuild
+
+Os exemplos de refresh_client_month são verificados com:
+    python -m doctest scripts/utils/client_month.py
+"""
+
+import sys
+import logging
+import argparse
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Definição única da tabela e do índice, também aplicada com os demais scripts de database/tables
+SCHEMA_FILE = (
+    Path(__file__).resolve().parents[1]
+    / "database"
+    / "tables"
+    / "tb_cliente_mes.sql"
+)
+
+# Tabela de origem -> (coluna de data, colunas agregadas, consulta por cliente no mês [:inicio, :fim))
+# Os limites são datas 'YYYY-MM-DD', que comparam corretamente tanto com 'YYYY-MM-DD' (ordens, saldo) quanto com 'YYYY-MM-DD HH:MM:SS' (positivador)
+# Positivador e saldo são fotografias: usa-se a última data do mês
+SOURCES = {
+    "tb_positivador": (
+        "data_posicao",
+        ["codigo_assessor", "net", "captacao_liquida", "receita"],
+        """SELECT codigo_cliente,
+                  MAX(codigo_assessor) AS codigo_assessor,
+                  SUM(net_em_m) AS net,
+                  SUM(captacao_liquida_em_m) AS captacao_liquida,
+                  SUM(receita_no_mes) AS receita
+           FROM tb_positivador
+           WHERE data_posicao = (
+               SELECT MAX(data_posicao) FROM tb_positivador
+               WHERE data_posicao >= :inicio AND data_posicao < :fim
+           )
+           GROUP BY codigo_cliente""",
+    ),
+    "tb_saldo": (
+        "data_saldo",
+        ["codigo_assessor", "saldo_fim_mes"],
+        """SELECT codigo_cliente,
+                  MAX(codigo_assessor) AS codigo_assessor,
+                  SUM(saldo_total) AS saldo_fim_mes
+           FROM tb_saldo
+           WHERE data_saldo = (
+               SELECT MAX(data_saldo) FROM tb_saldo
+               WHERE data_saldo >= :inicio AND data_saldo < :fim
+           )
+           GROUP BY codigo_cliente""",
+    ),
+    "tb_ordens_rv": (
+        "data_ordem",
+        ["codigo_assessor", "volume_operado_rv", "ordens_rv"],
+        """SELECT codigo_cliente,
+                  MAX(codigo_assessor) AS codigo_assessor,
+                  ABS(SUM(COALESCE(volume, 0))) AS volume_operado_rv,
+                  COUNT(*) AS ordens_rv
+           FROM tb_ordens_rv
+           WHERE data_ordem >= :inicio AND data_ordem < :fim
+           GROUP BY codigo_cliente""",
+    ),
+    "tb_ordens_rf": (
+        "data_ordem",
+        ["codigo_assessor", "volume_operado_rf", "ordens_rf"],
+        """SELECT codigo_cliente,
+                  MAX(codigo_assessor) AS codigo_assessor,
+                  ABS(SUM(COALESCE(volume, 0))) AS volume_operado_rf,
+                  COUNT(*) AS ordens_rf
+           FROM tb_ordens_rf
+           WHERE data_ordem >= :inicio AND data_ordem < :fim
+           GROUP BY codigo_cliente""",
+    ),
+}
+
+# CTE de cada origem na consulta de recálculo
+SOURCE_ALIASES = {
+    "tb_positivador": "pos",
+    "tb_saldo": "sal",
+    "tb_ordens_rv": "rv",
+    "tb_ordens_rf": "rf",
+}
+
+
+def ensure_table(cursor):
+    """Cria tb_cliente_mes e seu índice, se não existirem."""
+    # execute() instrução a instrução: executescript() faria commit da transação da troca do mês
+    sql = SCHEMA_FILE.read_text(encoding="utf-8")
+    for statement in sql.split(";"):
+        if statement.strip():
+            cursor.execute(statement)
+
+
+def get_existing_tables(cursor):
+    """Tabelas de origem presentes no banco principal."""
+    placeholders = ", ".join("?" for _ in SOURCES)
+    cursor.execute(
+        f"SELECT name FROM main.sqlite_master WHERE type = 'table' AND name IN ({placeholders})",
+        list(SOURCES),
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def build_refresh_query(existing_tables):
+    """Monta o INSERT ... SELECT do mês. Tabelas de origem ainda não criadas entram como conjuntos vazios."""
+    ctes = []
+    for table_name, (_, columns, query) in SOURCES.items():
+        alias = SOURCE_ALIASES[table_name]
+        if table_name not in existing_tables:
+            nulls = ", ".join(f"NULL AS {column}" for column in columns)
+            query = f"SELECT NULL AS codigo_cliente, {nulls} WHERE 0"
+        ctes.append(f"{alias} AS ({query})")
+
+    clients = " UNION ".join(
+        f"SELECT codigo_cliente FROM {alias}"
+        for alias in SOURCE_ALIASES.values()
+    )
+    ctes.append(f"clientes AS ({clients})")
+
+    joins = "\n".join(
+        f"LEFT JOIN {alias} ON {alias}.codigo_cliente = c.codigo_cliente"
+        for alias in SOURCE_ALIASES.values()
+    )
+    return f"""
+        WITH {", ".join(ctes)}
+        INSERT INTO tb_cliente_mes (
+            codigo_cliente, data_referencia, codigo_assessor, net,
+            captacao_liquida, receita, saldo_fim_mes, volume_operado_rv,
+            volume_operado_rf, ordens_rv, ordens_rf
+        )
+        SELECT
+            c.codigo_cliente,
+            DATE(:inicio, 'start of month'),
+            COALESCE(pos.codigo_assessor, sal.codigo_assessor, rv.codigo_assessor, rf.codigo_assessor),
+            pos.net,
+            pos.captacao_liquida,
+            pos.receita,
+            sal.saldo_fim_mes,
+            COALESCE(rv.volume_operado_rv, 0),
+            COALESCE(rf.volume_operado_rf, 0),
+            COALESCE(rv.ordens_rv, 0),
+            COALESCE(rf.ordens_rf, 0)
+        FROM clientes c
+        {joins}
+        WHERE c.codigo_cliente IS NOT NULL
+    """
+
+
+def refresh_client_month(cursor, month_start, next_month):
+    """Recalcula as linhas de tb_cliente_mes do mês [month_start, next_month) a partir das tabelas de fatos. Não faz commit: é executada dentro da transação da troca do mês. Retorna a quantidade de linhas gravadas.
+
+    Os limites podem vir com hora ('2024-12-01 00:00:00', como no positivador e no saldo); apenas a data é usada. Ordens e saldo do dia 1º pertencem ao mês, e os do dia 1º do mês seguinte não:
+
+    >>> import sqlite3
+    >>> conn = sqlite3.connect(":memory:")
+    >>> _ = conn.executescript('''
+    ...     CREATE TABLE tb_ordens_rv (codigo_cliente INTEGER, codigo_assessor TEXT, volume REAL, data_ordem TEXT);
+    ...     CREATE TABLE tb_saldo (codigo_cliente INTEGER, codigo_assessor TEXT, saldo_total REAL, data_saldo TEXT);
+    ...     INSERT INTO tb_ordens_rv VALUES (1, 'A1', 100, '2024-12-01'), (1, 'A1', 50, '2024-12-31'), (1, 'A1', 900, '2025-01-01');
+    ...     INSERT INTO tb_saldo VALUES (1, 'A1', 10, '2024-12-01'), (1, 'A1', 99, '2025-01-01');
+    ... ''')
+    >>> refresh_client_month(conn.cursor(), "2024-12-01 00:00:00", "2025-01-01 00:00:00")
+    1
+    >>> conn.execute("SELECT data_referencia, saldo_fim_mes, volume_operado_rv, ordens_rv FROM tb_cliente_mes").fetchall()
+    [('2024-12-01', 10.0, 150.0, 2)]
+    """
+    month_start, next_month = month_start[:10], next_month[:10]
+    ensure_table(cursor)
+    cursor.execute(
+        "DELETE FROM tb_cliente_mes WHERE data_referencia = DATE(?, 'start of month')",
+        (month_start,),
+    )
+    cursor.execute(
+        build_refresh_query(get_existing_tables(cursor)),
+        {"inicio": month_start, "fim": next_month},
+    )
+    # rowcount não é preenchido para INSERT iniciado por WITH
+    inserted_count = cursor.execute("SELECT changes()").fetchone()[0]
+    logger.info(
+        f"tb_cliente_mes: {inserted_count:,} clientes recalculados para o mês {month_start[:7]}"
+    )
+    return inserted_count
+
+
+def get_months(cursor):
+    """Meses presentes em alguma tabela de fatos, como [('YYYY-MM-01', 'YYYY-MM-01' do mês seguinte)]."""
+    existing_tables = get_existing_tables(cursor)
+    selects = [
+        f"SELECT DISTINCT DATE({date_column}, 'start of month') AS mes FROM {table_name}"
+        for table_name, (date_column, _, _) in SOURCES.items()
+        if table_name in existing_tables
+    ]
+    if not selects:
+        return []
+    cursor.execute(
+        f"""SELECT mes, DATE(mes, '+1 month')
+            FROM ({" UNION ".join(selects)})
+            WHERE mes IS NOT NULL
+            ORDER BY mes"""
+    )
+    return cursor.fetchall()
+
+
+def rebuild_client_month(conn):
+    """Recalcula tb_cliente_mes para todos os meses do banco principal, um mês por transação."""
+    cursor = conn.cursor()
+    ensure_table(cursor)
+    conn.commit()
+    months = get_months(cursor)
+    for month_start, next_month in months:
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            refresh_client_month(cursor, month_start, next_month)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    logger.info(f"tb_cliente_mes reconstruída para {len(months)} meses.")
+    return len(months)
+
+
+def parse_arguments(argv=None):
+    """Interpreta as opções da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Mantém o fato consolidado por cliente e mês (tb_cliente_mes)."
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Recalcula todos os meses a partir das tabelas de fatos",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Função principal de execução."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    args = parse_arguments(argv)
+
+    # Disponibiliza os módulos compartilhados de scripts/
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from analytics.database import get_database_path
+    from utils.connection import connect_writer
+
+    if not args.rebuild:
+        logger.info("Nada a fazer. Use --rebuild para recalcular todos os meses.")
+        return
+
+    conn = connect_writer(get_database_path())
+    try:
+        rebuild_client_month(conn)
+    except Exception as e:
+        logger.error(f"Erro ao reconstruir tb_cliente_mes: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Fábrica de conexões compartilhada: conexões de escrita em modo WAL para as cargas e um pool limitado de conexões somente leitura para o notebook, o dashboard, o backup e análises avulsas.
+
+No modo de journal padrão (rollback), a carga mantém o banco bloqueado durante a gravação e os leitores esperam ou recebem "database is locked". Em WAL, os leitores continuam lendo a última versão confirmada enquanto a carga grava, e a carga não espera pelos leitores. O modo WAL fica gravado no arquivo do banco, então basta a primeira conexão de escrita habilitá-lo.
+
+As conexões de leitura abrem o banco com `mode=ro` e `query_only`, usam `mmap_size` para ler as páginas direto do cache do sistema operacional e, como as de escrita, aguardam `busy_timeout` antes de desistir de um bloqueio.
+
+Uso em análises avulsas:
+    from utils.connection import connect_reader
+    conn = connect_reader("data/db/database.db")
+"""
+
+import os
+import queue
+import logging
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+from utils.partitions import attach_partitions
+from utils.sql_trace import traced_connect
+
+logger = logging.getLogger(__name__)
+
+# Tempo máximo de espera por um bloqueio, em milissegundos
+BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "30000"))
+
+# Tamanho máximo do banco mapeado em memória pelas conexões de leitura (256 MB)
+MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def get_read_uri(db_path):
+    """URI do banco para abertura somente leitura."""
+    return f"{Path(db_path).resolve().as_uri()}?mode=ro"
+
+
+def connect_writer(db_path, tracer=None, **kwargs):
+    """Abre uma conexão de escrita com o banco em modo WAL."""
+    conn = traced_connect(
+        db_path, tracer=tracer, timeout=BUSY_TIMEOUT_MS / 1000, **kwargs
+    )
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    journal_mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    if journal_mode.lower() != "wal":
+        logger.warning(
+            f"Não foi possível habilitar o modo WAL em {db_path} (modo atual: {journal_mode})"
+        )
+    return conn
+
+
+def connect_reader(db_path, tracer=None, partitions=True, **kwargs):
+    """Abre uma conexão somente leitura com o banco. Com `partitions=True`, anexa as partições anuais existentes (ver utils/partitions.py)."""
+    db_path = Path(db_path)
+    if not db_path.exists():
+        raise FileNotFoundError(f"Banco de dados não encontrado: {db_path}")
+
+    conn = traced_connect(
+        get_read_uri(db_path),
+        tracer=tracer,
+        uri=True,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        **kwargs,
+    )
+    try:
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        if partitions:
+            attach_partitions(conn, db_path)
+        # Depois das partições: query_only também bloqueia a criação das views TEMP
+        conn.execute("PRAGMA query_only = 1")
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+class ConnectionPool:
+    """Pool limitado de conexões somente leitura reaproveitadas entre consultas. Com `partitions=True`, cada conexão anexa as partições anuais existentes."""
+
+    def __init__(self, db_path, size=4, tracer=None, partitions=True):
+        self.db_path = Path(db_path)
+        self.size = size
+        self.tracer = tracer
+        self.partitions = partitions
+        self._pool = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """Abre uma nova conexão de leitura com o banco de dados."""
+        conn = connect_reader(
+            self.db_path,
+            tracer=self.tracer,
+            partitions=self.partitions,
+            check_same_thread=False,
+        )
+        logger.info(
+            f"Conexão somente leitura com o banco de dados SQLite estabelecida: {self.db_path}"
+        )
+        return conn
+
+    def acquire(self, timeout=None):
+        """Obtém uma conexão livre do pool, abrindo uma nova se necessário. Com o pool cheio, aguarda até `timeout` segundos pela devolução de uma conexão."""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        # Pool cheio: aguarda uma conexão ser devolvida
+        try:
+            return self._pool.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"Nenhuma conexão livre no pool após {timeout}s ({self.size} conexões em uso)"
+            ) from None
+
+    def release(self, conn):
+        """Devolve a conexão ao pool."""
+        self._pool.put_nowait(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Gerenciador de contexto que empresta uma conexão do pool."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except Exception as e:
+            logger.error(f"Erro ao executar operação no banco de dados: {e}")
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Fecha todas as conexões ociosas do pool."""
+        with self._lock:
+            while True:
+                try:
+                    conn = self._pool.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._created -= 1
+        logger.info("Conexões com banco de dados fechadas.")
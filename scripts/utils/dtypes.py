@@ -0,0 +1,31 @@
+"""
+Plano de tipos dos DataFrames da carga, para reduzir a memória usada na leitura e na transformação dos relatórios.
+
+Cada relatório declara as colunas de baixa cardinalidade (sexo, segmento, status, flags "Sim"/"Não", produto, mercado...) que são lidas diretamente como category. Apenas as colunas mapeadas para o banco são lidas do Excel, códigos inteiros sem nulos ficam em inteiros nativos reduzidos ao menor tipo que os comporta, e datas já reconhecidas pelo Excel permanecem em datetime64.
+
+Valores monetários permanecem em float64: float32 tem apenas ~7 dígitos significativos, o que não representa com exatidão os centavos de valores na casa dos milhões.
+"""
+
+import pandas as pd
+
+
+def read_excel_report(file_path, column_mapping, category_columns=()):
+    """Lê apenas as colunas mapeadas do relatório, com as colunas de baixa cardinalidade como category."""
+    return pd.read_excel(
+        file_path,
+        usecols=lambda column: column in column_mapping,
+        dtype={column: "category" for column in category_columns},
+    )
+
+
+def to_integer(series):
+    """Converte para inteiro: tipo nativo reduzido (int8 a int64) quando não há nulos, Int64 quando há valores ausentes."""
+    values = pd.to_numeric(series, errors="coerce").astype("Int64")
+    if values.isna().any():
+        return values
+    return pd.to_numeric(values.astype("int64"), downcast="integer")
+
+
+def is_datetime_column(series):
+    """Indica se a coluna já foi lida como datetime64."""
+    return pd.api.types.is_datetime64_any_dtype(series)
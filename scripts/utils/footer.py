@@ -0,0 +1,40 @@
+"""
+Remoção das linhas de rodapé dos relatórios de ordens ("Total", "Filtros Aplicados: Nenhum Filtro Aplicado" e linhas vazias).
+
+O rodapé fica sempre no final da planilha. Em vez de converter a coluna inteira para texto e procurar os padrões em todas as linhas, o limite do bloco de dados é encontrado percorrendo a coluna de trás para frente até a primeira linha de dados, e o DataFrame é recortado nesse ponto sem copiar as colunas.
+"""
+
+import re
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FOOTER_PATTERN = re.compile(
+    "Total|Nenhum Filtro Aplicado|Filtros Aplicados", re.IGNORECASE
+)
+
+
+def is_footer_value(value):
+    """Indica se o valor da coluna de referência pertence a uma linha de rodapé (vazio ou com um dos textos do rodapé)."""
+    if isinstance(value, str):
+        return FOOTER_PATTERN.search(value) is not None
+    return pd.isna(value)
+
+
+def find_data_end(series):
+    """Retorna a posição logo após a última linha de dados da coluna, ignorando o rodapé no final."""
+    values = series.to_numpy()
+    end = len(values)
+    while end > 0 and is_footer_value(values[end - 1]):
+        end -= 1
+    return end
+
+
+def trim_footer(df, column):
+    """Remove as linhas de rodapé do final do DataFrame, usando a coluna informada como referência."""
+    end = find_data_end(df[column])
+    if end < len(df):
+        logger.info(f"Removidas {len(df) - end} linhas de rodapé")
+    return df.iloc[:end]
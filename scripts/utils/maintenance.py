@@ -0,0 +1,234 @@
+"""
+Manutenção do banco de dados após as cargas: estatísticas do planejador, checkpoint do WAL e VACUUM incremental.
+
+A substituição diária do mês remove e regrava um mês inteiro de páginas. Sem manutenção, as páginas liberadas se acumulam na freelist (o arquivo só cresce), o WAL cresce até o próximo checkpoint completo e as estatísticas usadas pelo planejador na escolha dos índices das views ficam defasadas. Esta etapa:
+- atualiza as estatísticas com ANALYZE na primeira execução e, nas seguintes, com PRAGMA optimize (que reanalisa apenas as tabelas que mudaram, com analysis_limit);
+- faz o checkpoint do WAL e o trunca (PRAGMA wal_checkpoint(TRUNCATE));
+- devolve ao sistema as páginas livres com PRAGMA incremental_vacuum quando a freelist passa de MAINTENANCE_FREELIST_THRESHOLD (padrão 10%) das páginas do arquivo. Em um banco criado sem auto_vacuum incremental, a conversão exige um VACUUM completo (o arquivo inteiro é reescrito, com bloqueio exclusivo e cerca do dobro do espaço em disco). Ela nunca roda após as cargas, que apenas registram um aviso: é executada uma única vez com --enable-incremental-vacuum, em uma janela sem cargas.
+
+O tamanho dos arquivos e as estatísticas de páginas antes e depois são registrados no log. A etapa roda automaticamente após as cargas (ver utils/post_ingestion.py) e pode ser agendada isoladamente:
+    python scripts/utils/maintenance.py [--analyze] [--threshold 0.1] [--enable-incremental-vacuum]
+"""
+
+import os
+import sys
+import logging
+import argparse
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Fração de páginas livres a partir da qual o VACUUM incremental é executado
+DEFAULT_FREELIST_THRESHOLD = float(
+    os.getenv("MAINTENANCE_FREELIST_THRESHOLD", "0.1")
+)
+
+# Linhas amostradas por índice pelo PRAGMA optimize (0 = sem limite)
+ANALYSIS_LIMIT = 1000
+
+
+def get_page_stats(conn):
+    """Tamanho da página, páginas do arquivo e páginas livres do banco principal."""
+    return {
+        "page_size": conn.execute("PRAGMA page_size").fetchone()[0],
+        "page_count": conn.execute("PRAGMA page_count").fetchone()[0],
+        "freelist_count": conn.execute("PRAGMA freelist_count").fetchone()[0],
+    }
+
+
+def get_file_sizes(conn):
+    """Tamanho em MB do arquivo do banco principal e do WAL."""
+    db_path = Path(conn.execute("PRAGMA database_list").fetchone()[2])
+    wal_path = db_path.with_name(f"{db_path.name}-wal")
+    return {
+        "database_mb": db_path.stat().st_size / 1024 / 1024
+        if db_path.exists()
+        else 0.0,
+        "wal_mb": wal_path.stat().st_size / 1024 / 1024
+        if wal_path.exists()
+        else 0.0,
+    }
+
+
+def log_stats(label, stats, sizes):
+    """Registra no log o tamanho dos arquivos e as estatísticas de páginas."""
+    logger.info(
+        f"Manutenção ({label}): banco {sizes['database_mb']:.1f} MB, WAL {sizes['wal_mb']:.1f} MB, "
+        f"{stats['page_count']:,} páginas de {stats['page_size']} bytes, {stats['freelist_count']:,} livres"
+    )
+
+
+def refresh_statistics(conn, full=False):
+    """Atualiza as estatísticas do planejador: ANALYZE completo na primeira vez (ou com `full=True`), PRAGMA optimize nas demais. Retorna o comando executado."""
+    has_stats = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+    ).fetchone()
+    if full or not has_stats:
+        conn.execute("ANALYZE")
+        conn.commit()
+        return "ANALYZE"
+    conn.executescript(
+        f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}; PRAGMA optimize;"
+    )
+    return "PRAGMA optimize"
+
+
+def checkpoint_wal(conn):
+    """Copia o WAL para o banco e o trunca. Retorna False se algum leitor impediu o checkpoint completo."""
+    if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+        return True
+    busy, log_frames, checkpointed = conn.execute(
+        "PRAGMA wal_checkpoint(TRUNCATE)"
+    ).fetchone()
+    if busy:
+        logger.warning(
+            f"Checkpoint do WAL incompleto: {checkpointed} de {log_frames} páginas copiadas (leitores ativos)."
+        )
+    return not busy
+
+
+def ensure_incremental_vacuum(conn):
+    """Habilita auto_vacuum = INCREMENTAL no banco principal. Em um banco criado sem essa opção, a mudança exige um VACUUM completo, executado uma única vez. Retorna True se o banco foi convertido."""
+    if is_incremental_vacuum_enabled(conn):
+        return False
+    if conn.in_transaction:
+        conn.commit()
+    logger.info(
+        "Convertendo o banco para auto_vacuum incremental (VACUUM completo, executado uma única vez)..."
+    )
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+def is_incremental_vacuum_enabled(conn):
+    """Indica se o banco principal usa auto_vacuum = INCREMENTAL."""
+    return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def incremental_vacuum(conn, pages=None):
+    """Devolve ao sistema as páginas livres do banco principal (todas, ou até `pages`). Retorna a quantidade de páginas liberadas."""
+    if conn.in_transaction:
+        conn.commit()
+    before = get_page_stats(conn)["freelist_count"]
+    pragma = (
+        "PRAGMA incremental_vacuum;"
+        if pages is None
+        else f"PRAGMA incremental_vacuum({int(pages)});"
+    )
+    # O pragma libera uma página por passo; execute() avança um único passo, executescript() vai até o fim
+    conn.executescript(pragma)
+    return before - get_page_stats(conn)["freelist_count"]
+
+
+def reclaim_space(conn, convert=False):
+    """Libera todas as páginas livres com o VACUUM incremental. Em um banco sem auto_vacuum incremental, apenas registra um aviso, a menos que `convert=True` autorize a conversão com VACUUM completo. Retorna a quantidade de páginas liberadas."""
+    before = get_page_stats(conn)["freelist_count"]
+    if not is_incremental_vacuum_enabled(conn):
+        if not convert:
+            logger.warning(
+                f"{before:,} páginas livres não devolvidas: o banco não usa auto_vacuum incremental. "
+                "Converta uma única vez, fora do horário das cargas, com: python scripts/utils/maintenance.py --enable-incremental-vacuum"
+            )
+            return 0
+        ensure_incremental_vacuum(conn)
+        # O VACUUM completo da conversão já descartou a freelist
+        return before
+    return incremental_vacuum(conn)
+
+
+def run_maintenance(
+    conn,
+    freelist_threshold=DEFAULT_FREELIST_THRESHOLD,
+    full_analyze=False,
+    enable_incremental_vacuum=False,
+):
+    """Executa a manutenção do banco principal. A conversão para auto_vacuum incremental (VACUUM completo) só é feita com `enable_incremental_vacuum=True`. Retorna as estatísticas de páginas e tamanhos antes e depois."""
+    if conn.in_transaction:
+        conn.commit()
+
+    before = get_page_stats(conn)
+    before_sizes = get_file_sizes(conn)
+    log_stats("antes", before, before_sizes)
+
+    command = refresh_statistics(conn, full=full_analyze)
+    logger.info(f"Manutenção: estatísticas do planejador atualizadas ({command})")
+
+    freelist_ratio = before["freelist_count"] / max(before["page_count"], 1)
+    if enable_incremental_vacuum and ensure_incremental_vacuum(conn):
+        logger.info(
+            f"Manutenção: banco convertido para auto_vacuum incremental ({before['freelist_count']:,} páginas liberadas)"
+        )
+    elif freelist_ratio > freelist_threshold:
+        freed = reclaim_space(conn)
+        if freed:
+            logger.info(
+                f"Manutenção: {freed:,} páginas liberadas (freelist em {freelist_ratio:.0%} das páginas)"
+            )
+
+    checkpoint_wal(conn)
+
+    after = get_page_stats(conn)
+    after_sizes = get_file_sizes(conn)
+    log_stats("depois", after, after_sizes)
+    return {
+        "before": {**before, **before_sizes},
+        "after": {**after, **after_sizes},
+    }
+
+
+def parse_arguments(argv=None):
+    """Interpreta as opções da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Atualiza as estatísticas, faz o checkpoint do WAL e libera as páginas livres do banco de dados."
+    )
+    parser.add_argument(
+        "--analyze",
+        action="store_true",
+        help="Executa ANALYZE completo em vez de PRAGMA optimize",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_FREELIST_THRESHOLD,
+        help="Fração de páginas livres a partir da qual o VACUUM incremental é executado",
+    )
+    parser.add_argument(
+        "--enable-incremental-vacuum",
+        action="store_true",
+        help="Converte o banco para auto_vacuum incremental com um VACUUM completo (uma única vez, sem cargas em andamento)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Função principal de execução."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    args = parse_arguments(argv)
+
+    # Disponibiliza os módulos compartilhados de scripts/
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from analytics.database import get_database_path
+    from utils.connection import connect_writer
+
+    conn = connect_writer(get_database_path())
+    try:
+        run_maintenance(
+            conn,
+            freelist_threshold=args.threshold,
+            full_analyze=args.analyze,
+            enable_incremental_vacuum=args.enable_incremental_vacuum,
+        )
+    except Exception as e:
+        logger.error(f"Erro na manutenção do banco de dados: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Métricas de execução da carga: duração, registros, registros por segundo e pico de memória de cada etapa (leitura, transformação, gravação na tabela temporária, troca do mês e rastreamento).
+
+O pico de memória é o da etapa, e não o do processo inteiro: no Linux, o pico de memória residente (VmHWM) é zerado no início de cada etapa por /proc/self/clear_refs, de modo que, no serviço de carga contínua e nos processos do agendador, uma etapa não herda o pico de um arquivo maior processado antes. Nas plataformas sem esse recurso, a etapa só recebe o pico do processo (ru_maxrss) se ele foi atingido durante ela; caso contrário, o valor fica nulo.
+
+Cada etapa concluída é registrada no log como uma linha JSON e, ao final do processamento do arquivo, todas as etapas são gravadas em tb_execucoes, permitindo acompanhar a latência da carga ao longo do tempo.
+"""
+
+import sys
+import json
+import time
+import uuid
+import logging
+import datetime
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+CREATE_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS tb_execucoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_execucao TEXT NOT NULL,
+        nome_arquivo TEXT,
+        nome_tabela TEXT NOT NULL,
+        etapa TEXT NOT NULL,
+        inicio DATETIME NOT NULL,
+        duracao_segundos REAL NOT NULL,
+        registros INTEGER,
+        registros_por_segundo REAL,
+        pico_memoria_mb REAL,
+        sucesso INTEGER NOT NULL
+    )
+"""
+
+CREATE_INDEX_QUERY = """
+    CREATE INDEX IF NOT EXISTS idx_tb_execucoes_tabela_inicio
+    ON tb_execucoes (nome_tabela, inicio)
+"""
+
+
+def reset_peak_rss():
+    """Zera o pico de memória residente do processo (Linux), para que get_peak_rss_mb informe o pico a partir deste ponto. Retorna False se a plataforma não permite."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def get_peak_rss_mb():
+    """Pico de memória residente do processo em MB desde o início ou desde o último reset_peak_rss(), ou None se não disponível na plataforma."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é informado em KB no Linux e em bytes no macOS
+    if sys.platform == "darwin":
+        return round(peak / 1024 / 1024, 1)
+    return round(peak / 1024, 1)
+
+
+class StageMetrics:
+    """Medição de uma etapa. A etapa preenche `rows` com a quantidade de registros tratados e pode marcar `success = False` quando falhar sem lançar exceção."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = datetime.datetime.now()
+        self.duration = 0.0
+        self.rows = None
+        self.peak_rss_mb = None
+        self.success = None
+
+    def to_record(self):
+        """Converte a medição em dicionário."""
+        rows_per_second = None
+        if self.rows is not None and self.duration > 0:
+            rows_per_second = round(self.rows / self.duration, 1)
+        return {
+            "etapa": self.name,
+            "inicio": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "duracao_segundos": round(self.duration, 4),
+            "registros": self.rows,
+            "registros_por_segundo": rows_per_second,
+            "pico_memoria_mb": self.peak_rss_mb,
+            "sucesso": bool(self.success),
+        }
+
+
+class RunMetrics:
+    """Coleta as métricas das etapas de carga de um arquivo."""
+
+    def __init__(self, table_name, file_name=None):
+        self.run_id = uuid.uuid4().hex
+        self.table_name = table_name
+        self.file_name = file_name
+        self.stages = []
+        self._start = time.perf_counter()
+        self._started_at = datetime.datetime.now()
+
+    @contextmanager
+    def stage(self, name):
+        """Mede uma etapa. Exceções são registradas como falha da etapa e propagadas."""
+        stage = StageMetrics(name)
+        resettable = reset_peak_rss()
+        peak_before = get_peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield stage
+        except Exception:
+            stage.success = False
+            raise
+        else:
+            if stage.success is None:
+                stage.success = True
+        finally:
+            stage.duration = time.perf_counter() - start
+            peak = get_peak_rss_mb()
+            # Sem o reset, o pico do processo só pertence à etapa se foi atingido durante ela
+            if resettable or (peak is not None and peak > peak_before):
+                stage.peak_rss_mb = peak
+            self.stages.append(stage)
+            self._log(stage.to_record())
+
+    def _log(self, record):
+        """Registra a medição no log como uma linha JSON."""
+        logger.info(
+            json.dumps(
+                {
+                    "id_execucao": self.run_id,
+                    "nome_arquivo": self.file_name,
+                    "nome_tabela": self.table_name,
+                    **record,
+                },
+                ensure_ascii=False,
+            )
+        )
+
+    def total(self):
+        """Medição consolidada do arquivo, da criação do coletor até agora."""
+        total = StageMetrics("total")
+        total.started_at = self._started_at
+        total.duration = time.perf_counter() - self._start
+        peaks = [
+            stage.peak_rss_mb
+            for stage in self.stages
+            if stage.peak_rss_mb is not None
+        ]
+        total.peak_rss_mb = max(peaks) if peaks else None
+        total.success = bool(self.stages) and all(
+            stage.success for stage in self.stages
+        )
+        for stage in self.stages:
+            if stage.name == "swap":
+                total.rows = stage.rows
+        return total
+
+    def save(self, conn):
+        """Grava as etapas medidas e o total do arquivo em tb_execucoes."""
+        if not self.stages:
+            return False
+        try:
+            total = self.total()
+            self._log(total.to_record())
+
+            cursor = conn.cursor()
+            cursor.execute(CREATE_TABLE_QUERY)
+            cursor.execute(CREATE_INDEX_QUERY)
+            cursor.executemany(
+                """INSERT INTO tb_execucoes (
+                       id_execucao, nome_arquivo, nome_tabela, etapa, inicio,
+                       duracao_segundos, registros, registros_por_segundo,
+                       pico_memoria_mb, sucesso)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (
+                        self.run_id,
+                        self.file_name,
+                        self.table_name,
+                        *stage.to_record().values(),
+                    )
+                    for stage in [*self.stages, total]
+                ],
+            )
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao gravar métricas da execução: {e}")
+            return False
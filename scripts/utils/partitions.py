@@ -0,0 +1,407 @@
+"""
+Partições anuais do banco de dados: os anos encerrados saem do banco principal para arquivos somente leitura por ano, anexados (ATTACH) nas conexões de leitura.
+
+O banco principal (data/db/database.db) mantém apenas os anos em aberto, de modo que a substituição diária do mês, os índices e o VACUUM trabalham sobre um arquivo pequeno. Cada ano encerrado fica em um arquivo ao lado do principal (data/db/database_2023.db), com as mesmas tabelas de fatos e índices, e nunca mais é alterado.
+
+Nas conexões de leitura (notebook e análises), `attach_partitions` anexa os arquivos dos anos e o arquivo dos meses arquivados por utils/archive.py (data/db/database_arquivo.db) em modo somente leitura e cria, apenas na conexão (TEMP), views com os mesmos nomes das tabelas de fatos (UNION ALL do banco principal com os anos e os meses arquivados) e cópias das views de análise (vw_aai, vw_escritorio, vw_clientes) que leem dessas views. As consultas continuam usando os mesmos nomes; os scripts de upload não anexam as partições e gravam apenas no banco principal.
+
+Uso:
+    python scripts/utils/partitions.py --list
+    python scripts/utils/partitions.py --archive-year 2023 [--vacuum]
+"""
+
+import os
+import re
+import sys
+import stat
+import sqlite3
+import logging
+import argparse
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Tabelas de fatos particionadas e suas colunas de data
+PARTITIONED_TABLES = {
+    "tb_positivador": "data_posicao",
+    "tb_saldo": "data_saldo",
+    "tb_ordens_rv": "data_ordem",
+    "tb_ordens_rf": "data_ordem",
+}
+
+# Nome do banco anexado com os meses arquivados por utils/archive.py
+ARCHIVE_SCHEMA = "arquivo"
+
+# Limite padrão de bancos anexados do SQLite (SQLITE_MAX_ATTACHED)
+DEFAULT_ATTACHED_LIMIT = 10
+
+
+def get_partition_path(db_path, year):
+    """Caminho do arquivo da partição de um ano (ex.: data/db/database_2023.db)."""
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}_{year}{db_path.suffix}")
+
+
+def get_archive_path(db_path):
+    """Caminho do arquivo SQLite dos meses arquivados (ex.: data/db/database_arquivo.db)."""
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}_arquivo{db_path.suffix}")
+
+
+def get_schema_name(year):
+    """Nome do banco anexado de um ano."""
+    return f"ano_{year}"
+
+
+def list_partitions(db_path):
+    """Lista as partições existentes ao lado do banco principal. Retorna [(ano, caminho)] em ordem crescente de ano."""
+    db_path = Path(db_path)
+    pattern = re.compile(
+        rf"^{re.escape(db_path.stem)}_(\d{{4}}){re.escape(db_path.suffix)}$"
+    )
+    partitions = []
+    if not db_path.parent.exists():
+        return partitions
+    for path in db_path.parent.iterdir():
+        match = pattern.match(path.name)
+        if match:
+            partitions.append((int(match.group(1)), path))
+    return sorted(partitions)
+
+
+def list_attachments(db_path):
+    """Bancos anexados nas conexões de leitura: as partições anuais, em ordem crescente de ano, e o arquivo dos meses arquivados, se existir. Retorna [(nome do banco anexado, caminho)]."""
+    attachments = [
+        (get_schema_name(year), path) for year, path in list_partitions(db_path)
+    ]
+    archive_path = get_archive_path(db_path)
+    if archive_path.exists():
+        attachments.append((ARCHIVE_SCHEMA, archive_path))
+    return attachments
+
+
+def get_partitions_signature(db_path):
+    """Identifica o conjunto de partições e o arquivo dos meses arquivados (nomes e datas de modificação), usado na versão dos dados do cache de consultas."""
+    return ",".join(
+        f"{schema}:{path.stat().st_mtime_ns}"
+        for schema, path in list_attachments(db_path)
+    )
+
+
+def _get_columns(cursor, table_name, schema="main"):
+    """Obtém a lista de colunas de uma tabela (vazia se a tabela não existir)."""
+    cursor.execute(f"PRAGMA {schema}.table_info({table_name})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def _get_attached_limit(conn):
+    """Quantidade máxima de bancos anexados permitida na conexão."""
+    try:
+        return conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    except AttributeError:
+        # Connection.getlimit existe apenas a partir do Python 3.11
+        return DEFAULT_ATTACHED_LIMIT
+
+
+def attach_partitions(conn, db_path):
+    """Anexa as partições anuais e o arquivo dos meses arquivados em modo somente leitura e cria as views TEMP que unem o banco principal a eles. A conexão deve ter sido aberta com uri=True. Retorna a lista de bancos anexados."""
+    attachments = list_attachments(db_path)
+    if not attachments:
+        return []
+
+    limit = _get_attached_limit(conn)
+    if len(attachments) > limit:
+        raise RuntimeError(
+            f"{len(attachments)} partições e arquivos excedem o limite de {limit} bancos anexados do SQLite."
+        )
+
+    cursor = conn.cursor()
+    for schema, path in attachments:
+        cursor.execute(
+            f"ATTACH DATABASE ? AS {schema}",
+            (f"{path.resolve().as_uri()}?mode=ro",),
+        )
+
+    for table_name in PARTITIONED_TABLES:
+        columns = _get_columns(cursor, table_name)
+        if not columns:
+            continue
+        column_list = ", ".join(columns)
+        selects = [f"SELECT {column_list} FROM main.{table_name}"]
+        for schema, _ in attachments:
+            partition_columns = set(_get_columns(cursor, table_name, schema))
+            if not partition_columns:
+                continue
+            # Colunas criadas depois do arquivamento do ano (ou do mês) ficam nulas
+            select_list = ", ".join(
+                column if column in partition_columns else f"NULL AS {column}"
+                for column in columns
+            )
+            selects.append(f"SELECT {select_list} FROM {schema}.{table_name}")
+        cursor.execute(
+            f"CREATE TEMP VIEW {table_name} AS {' UNION ALL '.join(selects)}"
+        )
+
+    # Views do banco principal leem as tabelas do próprio banco; as cópias TEMP leem as views acima
+    cursor.execute(
+        "SELECT sql FROM main.sqlite_master WHERE type = 'view' AND sql IS NOT NULL"
+    )
+    for (view_sql,) in cursor.fetchall():
+        cursor.execute(
+            re.sub(
+                r"^\s*CREATE\s+VIEW",
+                "CREATE TEMP VIEW",
+                view_sql,
+                flags=re.IGNORECASE,
+            )
+        )
+
+    schemas = [schema for schema, _ in attachments]
+    logger.info(f"Partições anexadas: {', '.join(schemas)}")
+    return schemas
+
+
+def _year_bounds(year):
+    """Limites [início, fim) de um ano para as colunas de data gravadas em texto."""
+    return f"{year}-01-01", f"{year + 1}-01-01"
+
+
+def count_year_rows(cursor, year, schema="main"):
+    """Conta os registros de um ano em cada tabela de fatos do banco informado."""
+    year_start, year_end = _year_bounds(year)
+    counts = {}
+    for table_name, date_column in PARTITIONED_TABLES.items():
+        if not _get_columns(cursor, table_name, schema):
+            continue
+        cursor.execute(
+            f"SELECT COUNT(*) FROM {schema}.{table_name} WHERE {date_column} >= ? AND {date_column} < ?",
+            (year_start, year_end),
+        )
+        counts[table_name] = cursor.fetchone()[0]
+    return counts
+
+
+def get_latest_year(cursor):
+    """Ano mais recente com dados no banco principal, ou None se as tabelas estiverem vazias."""
+    years = []
+    for table_name, date_column in PARTITIONED_TABLES.items():
+        if not _get_columns(cursor, table_name):
+            continue
+        cursor.execute(f"SELECT MAX({date_column}) FROM main.{table_name}")
+        latest = cursor.fetchone()[0]
+        if latest:
+            years.append(int(str(latest)[:4]))
+    return max(years) if years else None
+
+
+def _copy_year(conn, tmp_path, year):
+    """Copia os registros do ano para um novo arquivo, com as mesmas tabelas e índices do banco principal. Retorna a quantidade copiada por tabela."""
+    year_start, year_end = _year_bounds(year)
+    cursor = conn.cursor()
+    cursor.execute("ATTACH DATABASE ? AS arquivo", (str(tmp_path),))
+    try:
+        copied = {}
+        cursor.execute("BEGIN")
+        for table_name, date_column in PARTITIONED_TABLES.items():
+            cursor.execute(
+                "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                (table_name,),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                continue
+            cursor.execute(
+                re.sub(
+                    r"^\s*CREATE\s+TABLE\s+",
+                    "CREATE TABLE arquivo.",
+                    row[0],
+                    flags=re.IGNORECASE,
+                )
+            )
+            cursor.execute(
+                f"INSERT INTO arquivo.{table_name} SELECT * FROM main.{table_name} WHERE {date_column} >= ? AND {date_column} < ?",
+                (year_start, year_end),
+            )
+            copied[table_name] = cursor.rowcount
+
+            # Índices criados depois da cópia, com os registros já ordenados
+            cursor.execute(
+                "SELECT sql FROM main.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                (table_name,),
+            )
+            for (index_sql,) in cursor.fetchall():
+                cursor.execute(
+                    re.sub(
+                        r"^\s*CREATE\s+(UNIQUE\s+)?INDEX\s+(IF\s+NOT\s+EXISTS\s+)?",
+                        r"CREATE \1INDEX arquivo.",
+                        index_sql,
+                        flags=re.IGNORECASE,
+                    )
+                )
+        conn.commit()
+        return copied
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute("DETACH DATABASE arquivo")
+
+
+def _delete_year(conn, year):
+    """Remove os registros do ano das tabelas de fatos do banco principal em uma única transação. Retorna a quantidade removida por tabela."""
+    year_start, year_end = _year_bounds(year)
+    cursor = conn.cursor()
+    deleted = {}
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for table_name, date_column in PARTITIONED_TABLES.items():
+            if not _get_columns(cursor, table_name):
+                continue
+            cursor.execute(
+                f"DELETE FROM main.{table_name} WHERE {date_column} >= ? AND {date_column} < ?",
+                (year_start, year_end),
+            )
+            deleted[table_name] = cursor.rowcount
+        conn.commit()
+        return deleted
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _finish_partition(tmp_path, partition_path):
+    """Publica o arquivo da partição e o marca como somente leitura."""
+    os.replace(tmp_path, partition_path)
+    os.chmod(partition_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+
+def archive_year(conn, db_path, year):
+    """Move um ano encerrado do banco principal para o arquivo da partição anual. Retorna a quantidade de registros movidos por tabela.
+
+    Os registros são copiados primeiro para um arquivo temporário e só então removidos do banco principal; o arquivo é publicado com o nome final apenas depois da remoção. Se a execução for interrompida, uma nova execução descarta a cópia incompleta ou conclui a publicação, sem duplicar nem perder registros.
+    """
+    partition_path = get_partition_path(db_path, year)
+    tmp_path = partition_path.with_name(f"{partition_path.name}.tmp")
+    if partition_path.exists():
+        raise FileExistsError(
+            f"Partição do ano {year} já existe: {partition_path}"
+        )
+
+    if conn.in_transaction:
+        conn.commit()
+    cursor = conn.cursor()
+    pending = count_year_rows(cursor, year)
+
+    if tmp_path.exists():
+        if not any(pending.values()):
+            # Interrompido depois da remoção: falta apenas publicar o arquivo
+            _finish_partition(tmp_path, partition_path)
+            logger.info(f"Partição do ano {year} concluída: {partition_path}")
+            return {}
+        # Interrompido antes da remoção: a cópia é refeita
+        tmp_path.unlink()
+
+    latest_year = get_latest_year(cursor)
+    if latest_year is None or year >= latest_year:
+        raise ValueError(
+            f"O ano {year} não está encerrado (ano mais recente no banco: {latest_year})."
+        )
+    if not any(pending.values()):
+        raise ValueError(f"Nenhum registro do ano {year} no banco principal.")
+
+    copied = _copy_year(conn, tmp_path, year)
+    if copied != pending:
+        tmp_path.unlink()
+        raise RuntimeError(
+            f"Cópia do ano {year} incompleta: {copied} registros copiados, {pending} esperados."
+        )
+
+    deleted = _delete_year(conn, year)
+    if deleted != copied:
+        # Os registros já estão no arquivo temporário; o ano é refeito na próxima execução
+        raise RuntimeError(
+            f"Remoção do ano {year} divergente: {deleted} registros removidos, {copied} copiados."
+        )
+
+    _finish_partition(tmp_path, partition_path)
+    for table_name, count in copied.items():
+        logger.info(f"{table_name}: {count:,} registros movidos para {year}")
+    logger.info(f"Partição do ano {year} criada: {partition_path}")
+    return copied
+
+
+def log_partitions(db_path):
+    """Registra no log o banco principal e as partições com seus tamanhos."""
+    db_path = Path(db_path)
+    if db_path.exists():
+        logger.info(
+            f"Banco principal: {db_path} ({db_path.stat().st_size / 1024 / 1024:.1f} MB)"
+        )
+    partitions = list_partitions(db_path)
+    if not partitions:
+        logger.info("Nenhuma partição anual.")
+    for year, path in partitions:
+        logger.info(
+            f"Partição {year}: {path} ({path.stat().st_size / 1024 / 1024:.1f} MB)"
+        )
+    archive_path = get_archive_path(db_path)
+    if archive_path.exists():
+        logger.info(
+            f"Meses arquivados: {archive_path} ({archive_path.stat().st_size / 1024 / 1024:.1f} MB)"
+        )
+
+
+def parse_arguments(argv=None):
+    """Interpreta as opções da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Gerencia as partições anuais do banco de dados."
+    )
+    parser.add_argument(
+        "--archive-year",
+        type=int,
+        help="Move um ano encerrado para o arquivo da partição anual",
+    )
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="Executa VACUUM no banco principal após o arquivamento",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="Lista as partições existentes"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Função principal de execução."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    args = parse_arguments(argv)
+
+    # Disponibiliza os módulos compartilhados de scripts/
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from analytics.database import get_database_path
+
+    db_path = get_database_path()
+
+    if args.archive_year is not None:
+        conn = sqlite3.connect(db_path)
+        try:
+            archive_year(conn, db_path, args.archive_year)
+            if args.vacuum:
+                logger.info("Executando VACUUM no banco principal...")
+                conn.execute("VACUUM")
+        except Exception as e:
+            logger.error(f"Erro ao arquivar o ano {args.archive_year}: {e}")
+            sys.exit(1)
+        finally:
+            conn.close()
+
+    log_partitions(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Etapas executadas após uma carga bem-sucedida pelos scripts de upload, mantendo atualizados os agregados e o dashboard consumidos pelos usuários, seguidas da manutenção do banco (ver utils/maintenance.py).
+"""
+
+import logging
+
+from analytics.rankings import refresh_rankings
+from utils.maintenance import run_maintenance
+
+logger = logging.getLogger(__name__)
+
+
+def render_dashboard(conn):
+    """Regenera o dashboard estático, se as dependências de visualização estiverem instaladas."""
+    try:
+        from analytics.report import render_report_after_ingestion
+    except ImportError as e:
+        logger.warning(f"Dashboard não gerado, dependência ausente: {e}")
+        return None
+    return render_report_after_ingestion(conn)
+
+
+def refresh_parquet_mirror(conn):
+    """Atualiza o espelho em Parquet do motor analítico (ANALYTICS_ENGINE=duckdb), se as dependências estiverem instaladas."""
+    try:
+        from analytics.columnar import refresh_mirror_after_ingestion
+    except ImportError as e:
+        logger.warning(
+            f"Espelho Parquet não atualizado, dependência ausente: {e}"
+        )
+        return None
+    return refresh_mirror_after_ingestion(conn)
+
+
+def run_post_ingestion(conn):
+    """Executa as etapas pós-carga. Falhas são registradas, mas não interrompem a carga já concluída."""
+    steps = [
+        ("rankings dos assessores", refresh_rankings),
+        ("dashboard estático", render_dashboard),
+        ("espelho Parquet", refresh_parquet_mirror),
+        # Por último, depois das gravações das etapas anteriores
+        ("manutenção do banco", run_maintenance),
+    ]
+
+    for description, step in steps:
+        try:
+            logger.info(f"Pós-carga: atualizando {description}...")
+            step(conn)
+        except Exception as e:
+            logger.error(f"Erro na etapa pós-carga '{description}': {e}")
@@ -0,0 +1,154 @@
+"""
+Perfilamento dos scripts de upload, habilitado pela opção --profile na linha de comando.
+
+A execução completa roda sob o cProfile; ao final são gravados o arquivo .pstats (para análise com pstats ou snakeviz) e um resumo com as N funções mais custosas. Com --tracemalloc, a etapa de transformação também gera um snapshot das alocações de memória.
+
+Uso:
+    python scripts/upload/tb_positivador.py --profile [--top 30] [--tracemalloc] [--trace-sql]
+"""
+
+import io
+import pstats
+import logging
+import argparse
+import cProfile
+import datetime
+import tracemalloc
+from pathlib import Path
+from contextlib import contextmanager
+
+from utils.sql_trace import enable_tracing
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Pasta de saída dos snapshots de memória; None quando o tracemalloc não foi solicitado
+_tracemalloc_dir = None
+_top_n = 25
+
+
+def get_profiles_dir():
+    """Obtém a pasta de saída dos perfis de execução."""
+    return PROJECT_ROOT / "data" / "profiles"
+
+
+def _timestamp():
+    """Carimbo de data e hora usado nos nomes dos arquivos de saída."""
+    return datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+
+
+def parse_arguments(description, argv=None):
+    """Interpreta as opções de perfilamento comuns aos scripts de upload."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Executa sob o cProfile e grava o .pstats e o resumo das funções mais custosas",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        type=Path,
+        default=get_profiles_dir(),
+        help="Pasta de saída dos perfis (padrão: data/profiles)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=25,
+        help="Quantidade de funções no resumo (padrão: 25)",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="Grava um snapshot das alocações de memória da etapa de transformação",
+    )
+    parser.add_argument(
+        "--trace-sql",
+        action="store_true",
+        help="Rastreia as instruções SQL e registra o relatório das mais custosas (equivale a SQL_TRACE=1)",
+    )
+    return parser.parse_args(argv)
+
+
+def write_summary(profiler, summary_file, top_n):
+    """Grava o resumo das funções mais custosas por tempo acumulado e por tempo próprio."""
+    buffer = io.StringIO()
+    for sort_key in ("cumulative", "tottime"):
+        buffer.write(f"=== Top {top_n} por {sort_key} ===\n")
+        stats = pstats.Stats(profiler, stream=buffer)
+        stats.strip_dirs().sort_stats(sort_key).print_stats(top_n)
+    summary_file.write_text(buffer.getvalue(), encoding="utf-8")
+    return buffer.getvalue()
+
+
+def run_profiled(func, name, output_dir, top_n=25):
+    """Executa `func` sob o cProfile, gravando <nome>_<data>.pstats e o resumo em texto."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    prefix = output_dir / f"{name}_{_timestamp()}"
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        profiler.dump_stats(f"{prefix}.pstats")
+        write_summary(profiler, Path(f"{prefix}.txt"), top_n)
+
+        buffer = io.StringIO()
+        stats = pstats.Stats(profiler, stream=buffer)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(min(top_n, 10))
+        logger.info(
+            f"Perfil gravado em {prefix}.pstats ({stats.total_tt:.2f}s). Resumo: {prefix}.txt\n{buffer.getvalue()}"
+        )
+
+
+@contextmanager
+def allocation_snapshot(label):
+    """Registra as alocações de memória do bloco com o tracemalloc quando habilitado por --tracemalloc; caso contrário, não faz nada."""
+    if _tracemalloc_dir is None:
+        yield
+        return
+
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start(25)
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+
+        prefix = _tracemalloc_dir / f"{label}_{_timestamp()}"
+        snapshot.dump(f"{prefix}.tracemalloc")
+        lines = [
+            f"Memória alocada: atual {current / 1024 / 1024:.1f} MB, pico {peak / 1024 / 1024:.1f} MB",
+            f"=== Top {_top_n} alocações por linha ===",
+        ]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:_top_n]]
+        Path(f"{prefix}_alocacoes.txt").write_text(
+            "\n".join(lines) + "\n", encoding="utf-8"
+        )
+        logger.info(
+            f"Snapshot de memória de '{label}' gravado em {prefix}.tracemalloc (pico {peak / 1024 / 1024:.1f} MB)"
+        )
+
+
+def run_main(main, name, description=None, argv=None):
+    """Ponto de entrada dos scripts de upload: executa `main` diretamente ou sob o perfilador, conforme as opções da linha de comando."""
+    global _tracemalloc_dir, _top_n
+
+    args = parse_arguments(description or f"Carga do relatório {name}.", argv)
+    _top_n = args.top
+    if args.tracemalloc:
+        _tracemalloc_dir = Path(args.profile_dir)
+        _tracemalloc_dir.mkdir(parents=True, exist_ok=True)
+    if args.trace_sql:
+        enable_tracing()
+
+    if args.profile:
+        return run_profiled(main, name, args.profile_dir, args.top)
+    return main()
@@ -0,0 +1,278 @@
+"""
+Rastreamento opcional das instruções SQL executadas no SQLite, com log de instruções lentas e relatório agregado por instrução.
+
+Habilitado pela variável de ambiente SQL_TRACE=1, pela opção --trace-sql dos scripts de upload ou por DatabaseManager(trace_sql=True). As conexões rastreadas registram, via set_trace_callback e set_progress_handler, o texto de cada instrução, o tempo gasto e a quantidade aproximada de passos da máquina virtual do SQLite. Instruções executadas pelos triggers aparecem com o prefixo "[trigger]".
+
+Os valores literais são normalizados para "?", de modo que os INSERTs linha a linha de uma carga são agregados em uma única entrada do relatório.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de instruções da máquina virtual entre chamadas do progress handler
+STEP_INTERVAL = 100
+
+_enabled = False
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b")
+_NULL_VALUE = re.compile(r"(?<=[(,])\s*NULL\b", re.IGNORECASE)
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def enable_tracing():
+    """Habilita o rastreamento para as conexões abertas a partir de agora."""
+    global _enabled
+    _enabled = True
+
+
+def is_enabled():
+    """Indica se o rastreamento foi habilitado pelo código ou pela variável SQL_TRACE."""
+    return _enabled or os.getenv("SQL_TRACE", "").lower() in (
+        "1",
+        "true",
+        "sim",
+    )
+
+
+def get_slow_threshold():
+    """Duração (em segundos) a partir da qual uma instrução é registrada como lenta (SQL_TRACE_SLOW_MS, padrão 100 ms)."""
+    return float(os.getenv("SQL_TRACE_SLOW_MS", "100")) / 1000
+
+
+def normalize_statement(sql):
+    """Substitui literais por '?' e compacta espaços, agrupando execuções da mesma instrução."""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _NULL_VALUE.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    return _VALUE_LIST.sub("(?, ...)", sql) if len(sql) > 200 else sql
+
+
+class QueryTracer:
+    """Agrega o tempo e os passos da máquina virtual por instrução normalizada. Pode ser compartilhado entre conexões de threads diferentes."""
+
+    def __init__(self, slow_threshold=None):
+        self.slow_threshold = (
+            get_slow_threshold() if slow_threshold is None else slow_threshold
+        )
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement, duration, steps, executions=1, elapsed=None):
+        """Registra a execução (ou a continuação, com executions=0) de uma instrução. `elapsed` é o tempo acumulado da execução, incluindo continuações anteriores."""
+        elapsed = duration if elapsed is None else elapsed
+        with self._lock:
+            entry = self.stats.setdefault(
+                statement,
+                {
+                    "execucoes": 0,
+                    "tempo_total": 0.0,
+                    "tempo_max": 0.0,
+                    "passos": 0,
+                },
+            )
+            entry["execucoes"] += executions
+            entry["tempo_total"] += duration
+            entry["tempo_max"] = max(entry["tempo_max"], elapsed)
+            entry["passos"] += steps
+
+        # Registra a instrução lenta uma única vez, quando ultrapassa o limite
+        if elapsed >= self.slow_threshold > elapsed - duration:
+            logger.warning(
+                f"Instrução SQL lenta ({elapsed * 1000:.0f} ms, ~{steps} passos): {statement[:300]}"
+            )
+
+    def report(self, top_n=None):
+        """Retorna as instruções ordenadas pelo tempo total, com a participação de cada uma no tempo de banco."""
+        with self._lock:
+            items = [(sql, dict(entry)) for sql, entry in self.stats.items()]
+        total_time = sum(entry["tempo_total"] for _, entry in items) or 1.0
+
+        records = []
+        for sql, entry in sorted(
+            items, key=lambda item: item[1]["tempo_total"], reverse=True
+        ):
+            executions = entry["execucoes"] or 1
+            records.append(
+                {
+                    "instrucao": sql,
+                    "execucoes": entry["execucoes"],
+                    "tempo_total": round(entry["tempo_total"], 6),
+                    "tempo_medio_ms": round(
+                        entry["tempo_total"] / executions * 1000, 3
+                    ),
+                    "tempo_max_ms": round(entry["tempo_max"] * 1000, 3),
+                    "passos": entry["passos"],
+                    "percentual": round(
+                        entry["tempo_total"] / total_time * 100, 1
+                    ),
+                }
+            )
+        return records[:top_n] if top_n else records
+
+    def log_report(self, top_n=20):
+        """Registra no log o relatório das instruções mais custosas."""
+        records = self.report()
+        if not records:
+            return
+        total_time = sum(r["tempo_total"] for r in records)
+        executions = sum(r["execucoes"] for r in records)
+        lines = [
+            f"Relatório de consultas SQL: {executions} execuções, {total_time:.3f}s no banco",
+            f"{'total (s)':>10} {'%':>6} {'execuções':>10} {'média (ms)':>11} {'máx (ms)':>10} {'passos':>12}  instrução",
+        ]
+        for r in records[:top_n]:
+            lines.append(
+                f"{r['tempo_total']:>10.3f} {r['percentual']:>6.1f} {r['execucoes']:>10} "
+                f"{r['tempo_medio_ms']:>11.3f} {r['tempo_max_ms']:>10.3f} {r['passos']:>12}  {r['instrucao'][:120]}"
+            )
+        logger.info("\n".join(lines))
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor que delimita o tempo de cada chamada para a conexão rastreada."""
+
+    def execute(self, *args, **kwargs):
+        return self.connection._traced_call(super().execute, *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self.connection._traced_call(
+            super().executemany, *args, **kwargs
+        )
+
+    def executescript(self, *args, **kwargs):
+        return self.connection._traced_call(
+            super().executescript, *args, **kwargs
+        )
+
+    def fetchone(self):
+        return self.connection._traced_fetch(super().fetchone)
+
+    def fetchmany(self, *args, **kwargs):
+        return self.connection._traced_fetch(
+            super().fetchmany, *args, **kwargs
+        )
+
+    def fetchall(self):
+        return self.connection._traced_fetch(super().fetchall)
+
+
+class TracedConnection(sqlite3.Connection):
+    """Conexão SQLite que envia ao QueryTracer o tempo e os passos de cada instrução.
+
+    O SQLite informa apenas o início de cada instrução; o tempo de uma instrução vai do seu início até o início da próxima ou até o fim da chamada do cursor que a executou, de modo que o tempo ocioso entre chamadas não é contabilizado.
+    """
+
+    def attach(self, tracer):
+        """Associa o agregador e registra os callbacks de rastreamento."""
+        self.tracer = tracer
+        self._segment = None
+        self._last_sql = None
+        self._last_statement = None
+        self._in_call = False
+        self._elapsed = 0.0
+        self._ticks = 0
+        self.set_trace_callback(self._on_statement)
+        self.set_progress_handler(self._on_progress, STEP_INTERVAL)
+
+    def _on_progress(self):
+        self._ticks += 1
+        return 0
+
+    def _on_statement(self, sql):
+        now = time.perf_counter()
+        self._close_segment(now)
+
+        # Subprogramas de triggers são informados com o texto da instrução que os disparou (ou como comentário "-- trigger")
+        if sql.startswith("--") or (self._in_call and sql == self._last_sql):
+            base = self._last_statement or normalize_statement(sql)
+            statement = f"[trigger] {base}"
+        else:
+            statement = normalize_statement(sql)
+            self._last_sql = sql
+            self._last_statement = statement
+        self._segment = (statement, now, self._ticks, 1)
+
+    def _close_segment(self, now=None):
+        if self._segment is None:
+            return
+        statement, start, ticks, executions = self._segment
+        self._segment = None
+        now = time.perf_counter() if now is None else now
+        duration = now - start
+        self._elapsed = duration if executions else self._elapsed + duration
+        self.tracer.record(
+            statement,
+            duration,
+            (self._ticks - ticks) * STEP_INTERVAL,
+            executions,
+            self._elapsed,
+        )
+
+    def _traced_call(self, func, *args, **kwargs):
+        self._in_call = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._close_segment()
+            self._in_call = False
+            self._last_sql = None
+
+    def _traced_fetch(self, func, *args, **kwargs):
+        # A leitura das linhas continua a execução da última instrução
+        if self._last_statement is not None:
+            self._segment = (
+                self._last_statement,
+                time.perf_counter(),
+                self._ticks,
+                0,
+            )
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._close_segment()
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args, **kwargs):
+        return self.cursor().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self.cursor().executemany(*args, **kwargs)
+
+    def executescript(self, *args, **kwargs):
+        return self.cursor().executescript(*args, **kwargs)
+
+    def commit(self):
+        return self._traced_call(super().commit)
+
+    def rollback(self):
+        return self._traced_call(super().rollback)
+
+
+def traced_connect(database, tracer=None, **kwargs):
+    """Abre uma conexão SQLite, rastreada se `tracer` for informado ou se o rastreamento estiver habilitado."""
+    if tracer is None and is_enabled():
+        tracer = QueryTracer()
+    if tracer is None:
+        return sqlite3.connect(database, **kwargs)
+
+    conn = sqlite3.connect(database, factory=TracedConnection, **kwargs)
+    conn.attach(tracer)
+    return conn
+
+
+def log_trace_report(conn, top_n=20):
+    """Registra o relatório de consultas de uma conexão rastreada; não faz nada em conexões comuns."""
+    tracer = getattr(conn, "tracer", None)
+    if tracer is not None:
+        tracer.log_report(top_n)
@@ -0,0 +1,102 @@
+"""
+Carga em duas fases usada pelos scripts de upload.
+
+Os registros transformados são gravados primeiro em uma tabela temporária (TEMP, sem índices nem triggers) e depois substituem o mês na tabela final em uma única transação curta (DELETE do mês seguido de INSERT ... SELECT). Assim, os leitores das views nunca veem um mês parcialmente carregado, e o bloqueio de escrita do banco é mantido apenas durante a troca, e não durante toda a inserção.
+"""
+
+import datetime
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def to_sql_value(value):
+    """Converte datas em texto, no formato gravado pelos scripts de upload; os demais valores não são alterados."""
+    if isinstance(value, (pd.Timestamp, datetime.datetime)):
+        return value.strftime(DATETIME_FORMAT)
+    if isinstance(value, datetime.date):
+        return value.strftime(DATE_FORMAT)
+    return value
+
+
+def frame_to_records(df, columns):
+    """Converte as colunas do DataFrame em tuplas prontas para o SQLite: valores nulos viram None, datas viram texto e os tipos do numpy viram tipos nativos do Python."""
+    converted = []
+    for column in columns:
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = series.dt.strftime(DATETIME_FORMAT)
+        values = series.astype(object).where(series.notna(), None)
+        if series.dtype == object:
+            values = values.map(to_sql_value)
+        converted.append(values.tolist())
+    return list(zip(*converted))
+
+
+def get_staging_name(table_name):
+    """Nome da tabela temporária de carga de uma tabela."""
+    return f"stg_{table_name}"
+
+
+def load_staging(conn, table_name, df, columns):
+    """Recria a tabela temporária de carga com as colunas informadas (mesma afinidade de tipos da tabela final) e grava os registros do DataFrame. Retorna o nome da tabela temporária."""
+    staging_table = get_staging_name(table_name)
+    column_list = ", ".join(columns)
+    placeholders = ", ".join("?" for _ in columns)
+
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS temp.{staging_table}")
+    cursor.execute(
+        f"CREATE TEMP TABLE {staging_table} AS SELECT {column_list} FROM main.{table_name} WHERE 0"
+    )
+    cursor.executemany(
+        f"INSERT INTO temp.{staging_table} ({column_list}) VALUES ({placeholders})",
+        frame_to_records(df, columns),
+    )
+    conn.commit()
+    return staging_table
+
+
+def swap_month(
+    conn,
+    table_name,
+    date_column,
+    month_start,
+    next_month,
+    staging_table,
+    columns,
+    after_swap=None,
+):
+    """Substitui os registros do mês [month_start, next_month) pelos da tabela temporária em uma única transação. `after_swap(cursor, month_start, next_month)`, se informada, é executada na mesma transação para manter os agregados do mês (ver utils/client_month.py). Retorna a quantidade de registros removidos e inseridos."""
+    column_list = ", ".join(columns)
+    cursor = conn.cursor()
+    if conn.in_transaction:
+        conn.commit()
+
+    # Obtém o bloqueio de escrita já no início, para a troca não falhar no meio
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute(
+            f"DELETE FROM {table_name} WHERE {date_column} >= ? AND {date_column} < ?",
+            (month_start, next_month),
+        )
+        deleted_count = cursor.rowcount
+        cursor.execute(
+            f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM temp.{staging_table}"
+        )
+        inserted_count = cursor.rowcount
+        if after_swap is not None:
+            after_swap(cursor, month_start, next_month)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute(f"DROP TABLE IF EXISTS temp.{staging_table}")
+
+    return deleted_count, inserted_count